@@ -1,5 +1,10 @@
 from haystack.components.embedders import SentenceTransformersDocumentEmbedder
+from haystack.components.rankers import TransformersSimilarityRanker
 
 embedding_model = "BAAI/bge-m3"
 document_embedder = SentenceTransformersDocumentEmbedder(model=embedding_model)
 document_embedder.warm_up()
+
+# related papers batch job에서 사용하는 reranker 모델
+reranker = TransformersSimilarityRanker(model="BAAI/bge-reranker-v2-m3")
+reranker.warm_up()
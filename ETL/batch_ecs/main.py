@@ -1,7 +1,7 @@
 import os
 
 from source.document import download_document_list
-from source.pipeline import write_documents_with_retry
+from source.pipeline import publish_index_version, write_documents_with_retry
 from source.utils import get_mandatory_env
 
 
@@ -14,6 +14,7 @@ def main():
     s3_object_key = get_mandatory_env("S3_OBJECT_KEY")
     documents = download_document_list(bucket_name, s3_object_key)
     write_documents_with_retry(documents)
+    publish_index_version()
 
 
 if __name__ == "__main__":
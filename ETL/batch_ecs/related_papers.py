@@ -0,0 +1,27 @@
+import os
+
+import boto3
+from source.related_papers import build_related_papers_table
+
+
+def main():
+    """
+    Related papers batch job entry point script.
+    Computes the top-N related papers of every indexed document and writes them to
+    a memory-mapped table that the search server serves /correlations from.
+    """
+    output_path = os.getenv("RELATED_PAPERS_OUTPUT", "/tmp/related_papers.bin")
+    top_n = int(os.getenv("RELATED_PAPERS_TOP_N", "20"))
+    rerank = os.getenv("RELATED_PAPERS_RERANK", "true").lower() == "true"
+    build_related_papers_table(output_path, top_n=top_n, rerank=rerank)
+
+    # search server가 내려받을 수 있도록 S3에 업로드 (bucket이 설정된 경우)
+    bucket_name = os.getenv("RELATED_PAPERS_S3_BUCKET")
+    if bucket_name:
+        object_key = os.getenv("RELATED_PAPERS_S3_KEY", "related_papers.bin")
+        boto3.client("s3").upload_file(output_path, bucket_name, object_key)
+        print(f"Uploaded related papers table to s3://{bucket_name}/{object_key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -88,3 +88,16 @@ def write_documents_with_retry(
                     raise e
         else:
             print("Max retries exceeded, document indexing failed for batch")
+
+
+def publish_index_version(store=document_store):
+    """
+    색인이 끝난 뒤 index mapping의 _meta.version을 갱신
+    search server는 이 값(과 문서 수)으로 index 변경을 감지해서 응답 cache를 비운다.
+    """
+    version = str(int(time.time()))
+    store.client.indices.put_mapping(
+        index=index,
+        body={"_meta": {"version": version}},
+    )
+    print(f"Published index version {version}")
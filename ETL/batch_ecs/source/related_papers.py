@@ -0,0 +1,182 @@
+import os
+import struct
+import time
+
+import numpy as np
+import torch
+from haystack import Document
+from haystack.components.rankers import TransformersSimilarityRanker
+from haystack_integrations.document_stores.opensearch import OpenSearchDocumentStore
+from opensearchpy import RequestsHttpConnection
+from opensearchpy.helpers import scan
+
+from .utils import aws_auth, opensearch_vpc_endpoint
+
+reranker_model = "BAAI/bge-reranker-v2-m3"
+index = "new_paper_document_index"
+embedding_dim = 1024
+
+# related papers table 파일 구조 (little endian, 각 section은 8 byte 정렬)
+#   header          : magic(8s), 문서 수, neighbor 총 개수, id blob byte 수, 생성 시각(unix time)
+#   id_offsets      : uint64[문서 수 + 1]  -> id blob 안에서 각 id의 시작 위치 (id는 utf-8 byte 기준 정렬)
+#   id_blob         : utf-8 id를 이어 붙인 byte
+#   neighbor_offsets: uint64[문서 수 + 1]  -> neighbors / scores 안에서 각 문서의 시작 위치
+#   neighbors       : uint32[neighbor 총 개수] -> neighbor 문서 번호 (id_offsets 기준)
+#   scores          : float32[neighbor 총 개수]
+# search server의 repositories/related_papers.py 와 같은 구조를 사용해야 함
+MAGIC = b"RELPAPR1"
+HEADER = struct.Struct("<8sQQQQ")
+
+
+def create_document_store():
+    """색인용 embedding pipeline 없이 OpenSearch만 연결 (pipeline.py와 같은 설정)"""
+    return OpenSearchDocumentStore(
+        hosts=[
+            {
+                "host": opensearch_vpc_endpoint,
+                "port": 443,
+            }
+        ],
+        index=index,
+        http_auth=aws_auth,
+        timeout=900,
+        embedding_dim=embedding_dim,
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=RequestsHttpConnection,
+    )
+
+
+def load_corpus(store, batch_size=1000):
+    """
+    scroll로 전체 문서의 id, content, 정규화된 embedding을 가져옴
+    """
+    ids, contents, vectors = [], [], []
+    for hit in scan(
+        store.client,
+        index=index,
+        query={"query": {"match_all": {}}, "_source": ["content", "embedding"]},
+        size=batch_size,
+    ):
+        embedding = hit["_source"].get("embedding")
+        if not embedding or len(embedding) != embedding_dim:
+            continue
+        ids.append(hit["_id"])
+        contents.append(hit["_source"].get("content") or "")
+        vectors.append(np.asarray(embedding, dtype=np.float32))
+
+    matrix = np.stack(vectors) if vectors else np.empty((0, embedding_dim), np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    print(f"Loaded {len(ids)} documents with embedding")
+    return ids, contents, matrix / norms
+
+
+def nearest_neighbors(vectors, top_n, chunk_size=1024, device=None):
+    """
+    모든 문서에 대해 cosine similarity 상위 top_n개 문서 번호 / 점수 계산 (자기 자신 포함, exact)
+    """
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    top_n = min(top_n, len(vectors))
+    corpus = torch.from_numpy(vectors).to(device)
+    indices = np.empty((len(vectors), top_n), dtype=np.int64)
+    scores = np.empty((len(vectors), top_n), dtype=np.float32)
+
+    with torch.inference_mode():
+        for start in range(0, len(vectors), chunk_size):
+            similarity = corpus[start : start + chunk_size] @ corpus.T
+            values, positions = torch.topk(similarity, k=top_n, dim=1)
+            indices[start : start + chunk_size] = positions.cpu().numpy()
+            scores[start : start + chunk_size] = values.cpu().numpy()
+            if start // chunk_size % 100 == 0:
+                print(f"kNN {start + len(values)}/{len(vectors)}")
+    return indices, scores
+
+
+def rerank_neighbors(ranker, contents, indices, top_n):
+    """
+    search server의 /correlations와 같은 방식으로 kNN 후보를 cross-encoder로 다시 정렬
+    (source 문서 content를 query로 사용하고, 자기 자신은 1.0점)
+    """
+    neighbors, scores = [], []
+    for row, candidates in enumerate(indices):
+        documents = [
+            Document(id=str(candidate), content=contents[candidate])
+            for candidate in candidates
+        ]
+        ranked = ranker.run(query=contents[row], documents=documents, top_k=top_n)
+        ranked_docs = ranked["documents"]
+        neighbors.append([int(doc.id) for doc in ranked_docs])
+        scores.append([1.0 if int(doc.id) == row else doc.score for doc in ranked_docs])
+        if row % 1000 == 0:
+            print(f"Reranked {row}/{len(indices)}")
+    return neighbors, scores
+
+
+def _pad(handle):
+    handle.write(b"\0" * (-handle.tell() % 8))
+
+
+def write_table(path, ids, neighbors, scores):
+    """
+    related papers table을 임시 파일에 쓴 뒤 교체 (읽고 있는 server는 이전 파일을 계속 사용)
+    """
+    encoded = [doc_id.encode("utf-8") for doc_id in ids]
+    order = sorted(range(len(ids)), key=lambda i: encoded[i])
+    position = np.empty(len(ids), dtype=np.uint32)
+    position[order] = np.arange(len(ids), dtype=np.uint32)
+
+    id_offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    id_offsets[1:] = np.cumsum([len(encoded[i]) for i in order])
+    neighbor_offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    neighbor_offsets[1:] = np.cumsum([len(neighbors[i]) for i in order])
+    flat_neighbors = np.asarray(
+        [position[n] for i in order for n in neighbors[i]], dtype=np.uint32
+    )
+    flat_scores = np.asarray(
+        [score for i in order for score in scores[i]], dtype=np.float32
+    )
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(
+            HEADER.pack(
+                MAGIC,
+                len(ids),
+                len(flat_neighbors),
+                int(id_offsets[-1]),
+                int(time.time()),
+            )
+        )
+        handle.write(id_offsets.tobytes())
+        handle.write(b"".join(encoded[i] for i in order))
+        _pad(handle)
+        handle.write(neighbor_offsets.tobytes())
+        handle.write(flat_neighbors.tobytes())
+        _pad(handle)
+        handle.write(flat_scores.tobytes())
+    os.replace(tmp_path, path)
+    print(f"Wrote related papers table for {len(ids)} documents to {path}")
+
+
+def build_related_papers_table(path, top_n=20, rerank=True, store=None):
+    """
+    전체 문서의 연관 논문 top_n개를 계산해서 path에 저장
+    :param rerank: True면 kNN 상위 2 * top_n개를 cross-encoder로 다시 정렬 (/correlations와 동일)
+    """
+    store = store or create_document_store()
+    ids, contents, vectors = load_corpus(store)
+    if not ids:
+        print("No documents to process")
+        return
+
+    if not rerank:
+        indices, scores = nearest_neighbors(vectors, top_n)
+        write_table(path, ids, indices.tolist(), scores.tolist())
+        return
+
+    indices, _ = nearest_neighbors(vectors, top_n * 2)
+    ranker = TransformersSimilarityRanker(model=reranker_model, top_k=top_n)
+    ranker.warm_up()
+    neighbors, scores = rerank_neighbors(ranker, contents, indices, top_n)
+    write_table(path, ids, neighbors, scores)
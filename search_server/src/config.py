@@ -1,15 +1,32 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from fastapi import FastAPI
 from haystack.utils import ComponentDevice
+from repositories.ann_index import LocalAnnIndex
 from repositories.document_store import AwsOpenSearch, LocalOpenSearch
-from repositories.vector_store import InMemoryVectorStore
+from repositories.related_papers import RelatedPapersSync, RelatedPapersTable
+from repositories.vector_store import ArrayVectorStore
 from services.correlations import CorrelationService
-from services.embedding import BgeM3SetenceEmbedder
-from services.ranker import BgeReRankderService
+from services.embedding import BatchingTextEmbedder, CachedTextEmbedder
+from services.fusion import FusionJoiner
+from services.model_registry import ModelRegistry
+from services.ranker import BatchingRanker, CascadeRanker, RerankScheduler
+from services.response_cache import (
+    IndexGenerationTracker,
+    ResponseCache,
+    SearchResultSets,
+)
 from services.search import SearchService
+from utils.admission import AdmissionController
+from utils.cache import LRUCache
+from utils.executor import InferenceExecutor
 from utils.logger import logger
+from utils.metrics import multiprocess_enabled
+from utils.startup import StartupState
+from utils.tracing import enable_metrics_tracing
 
 result_top_k = 50  # ranking 이후 상위 몇개의 결과를 가져올지 결정
 index = "new_paper_document_index"
@@ -19,15 +36,151 @@ verify_certs = True
 embedding_dim = 1024
 DEFAULT_REGION = "ap-northeast-2"
 
+# 추론(embedding, retrieval, ranking) 실행 executor 설정
+# (process 모드에서 worker의 pipeline 단계별 metric을 /metrics에 포함하려면
+#  서버 시작 전에 PROMETHEUS_MULTIPROC_DIR을 비어 있는 폴더로 설정)
+inference_executor_mode = os.getenv(
+    "INFERENCE_EXECUTOR_MODE", "thread"
+)  # thread | process
+inference_executor_workers = int(os.getenv("INFERENCE_EXECUTOR_WORKERS", "2"))
+inference_executor_queue_size = int(os.getenv("INFERENCE_EXECUTOR_QUEUE_SIZE", "64"))
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+# /search, /correlations admission control (동시 실행 수 / 대기열 길이 / 최대 대기 시간(초))
+# 한도를 넘은 요청은 Retry-After(초)와 함께 503으로 바로 거절
+search_max_concurrency = int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
+search_max_queue = int(os.getenv("SEARCH_MAX_QUEUE", "32"))
+correlations_max_concurrency = int(os.getenv("CORRELATIONS_MAX_CONCURRENCY", "8"))
+correlations_max_queue = int(os.getenv("CORRELATIONS_MAX_QUEUE", "32"))
+admission_queue_timeout = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")) or None
+admission_retry_after = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+# hybrid retrieval 실행 방식 (pipeline: 순차 실행, parallel: BM25와 embedding 동시 실행,
+# async: parallel + OpenSearch 요청을 async client로 event loop에서 실행)
+retrieval_mode = os.getenv("RETRIEVAL_MODE", "parallel")
+
+# OpenSearch client connection pool 크기와 async client의 idle keep-alive 시간(초)
+opensearch_pool_size = int(os.getenv("OPENSEARCH_POOL_SIZE", "10"))
+opensearch_keep_alive = float(os.getenv("OPENSEARCH_KEEP_ALIVE", "30"))
+
+# 동시에 들어온 query를 모아서 한 번에 embedding 하는 micro-batching 설정
+embedding_max_batch_size = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+embedding_batch_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "2"))
+
+# correlations에서 사용하는 문서 embedding / content cache 설정
+vector_store_capacity_bytes = int(
+    os.getenv("VECTOR_STORE_CAPACITY_BYTES", str(512 * 1024 * 1024))
+)
+vector_store_dtype = os.getenv("VECTOR_STORE_DTYPE", "float32")  # float32 | float16
+
+# /correlations 후보 검색용 local ANN(IVF) index 설정
+# (process 모드 executor에서는 worker마다 index를 따로 만들므로 메모리 사용량에 주의)
+ann_index_enabled = os.getenv("ANN_INDEX", "false").lower() == "true"
+ann_index_n_lists = int(os.getenv("ANN_INDEX_N_LISTS", "0"))  # 0이면 sqrt(문서 수)
+ann_index_n_probe = int(os.getenv("ANN_INDEX_N_PROBE", "16"))
+ann_index_dtype = os.getenv("ANN_INDEX_DTYPE", "float32")  # float32 | float16
+ann_index_refresh_interval = float(os.getenv("ANN_INDEX_REFRESH_INTERVAL", "300"))
+ann_index_rebuild_interval = float(
+    os.getenv("ANN_INDEX_REBUILD_INTERVAL", str(24 * 60 * 60))
+)
+
+# ETL batch job이 미리 계산한 연관 논문 table (파일이 없으면 사용하지 않음)
+# RELATED_PAPERS_S3_BUCKET / KEY는 ETL/batch_ecs/related_papers.py가 업로드하는 위치와 같게 설정
+# (bucket이 없으면 RELATED_PAPERS_PATH의 파일을 volume 등 다른 방법으로 교체해야 함)
+related_papers_path = os.getenv("RELATED_PAPERS_PATH", "/app/data/related_papers.bin")
+related_papers_check_interval = float(os.getenv("RELATED_PAPERS_CHECK_INTERVAL", "60"))
+related_papers_s3_bucket = os.getenv("RELATED_PAPERS_S3_BUCKET")
+related_papers_s3_key = os.getenv("RELATED_PAPERS_S3_KEY", "related_papers.bin")
+related_papers_sync_interval = float(os.getenv("RELATED_PAPERS_SYNC_INTERVAL", "300"))
+
+# query embedding cache 설정 (용량 byte, TTL 초. TTL 0이면 만료 없음)
+query_embedding_cache_bytes = int(
+    os.getenv("QUERY_EMBEDDING_CACHE_BYTES", str(64 * 1024 * 1024))
+)
+query_embedding_cache_ttl = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "0"))
+
+# /search, /correlations 응답 cache 설정 (index generation은 check 주기마다 확인)
+response_cache_enabled = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+response_cache_bytes = int(os.getenv("RESPONSE_CACHE_BYTES", str(128 * 1024 * 1024)))
+response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+index_generation_check_interval = float(
+    os.getenv("INDEX_GENERATION_CHECK_INTERVAL", "30")
+)
+
+# /search cursor pagination 결과 보관 설정 (TTL이 지난 cursor는 만료)
+search_result_set_bytes = int(
+    os.getenv("SEARCH_RESULT_SET_BYTES", str(32 * 1024 * 1024))
+)
+search_result_set_ttl = float(os.getenv("SEARCH_RESULT_SET_TTL", "600"))
+# page 요청에서 retriever / joiner / reranker를 늘릴 깊이 (cursor로 넘겨볼 수 있는 최대 결과 수)
+search_pagination_depth = int(os.getenv("SEARCH_PAGINATION_DEPTH", "100"))
+
+# search / correlations 요청의 rerank pair를 모아서 한 번에 scoring 하는 scheduler 설정
+rerank_batching = os.getenv("RERANK_BATCHING", "true").lower() == "true"
+rerank_max_batch_pairs = int(os.getenv("RERANK_MAX_BATCH_PAIRS", "128"))
+rerank_max_wait_ms = float(os.getenv("RERANK_MAX_WAIT_MS", "5"))
+rerank_timeout = float(os.getenv("RERANK_TIMEOUT", "30")) or None  # 0이면 제한 없음
+
+# correlations의 (source 문서, 후보 문서) reranker 점수 cache 설정 (0이면 사용하지 않음)
+rerank_pair_cache_bytes = int(
+    os.getenv("RERANK_PAIR_CACHE_BYTES", str(32 * 1024 * 1024))
+)
+
+# /search의 BM25 / kNN 결과 fusion 설정 (top_k: reranker에 넘길 최대 후보 수, 0이면 제한 없음)
+# top_k를 result_top_k보다 작게 설정하면 /search 결과 수도 그만큼 줄어듦
+fusion_mode = os.getenv("FUSION_MODE", "rrf")  # rrf | weighted
+fusion_rrf_k = int(os.getenv("FUSION_RRF_K", "60"))
+fusion_top_k = int(os.getenv("FUSION_TOP_K", str(result_top_k))) or None
+
+# /search rerank 방식 (full: 후보 전체 rerank, cascade: fused score 순으로 필요한 만큼만 rerank)
+rerank_mode = os.getenv("RERANK_MODE", "full")  # full | cascade
+cascade_top_k = int(
+    os.getenv("CASCADE_TOP_K", "10")
+)  # rerank 순서를 보장할 상위 결과 수
+cascade_step = int(os.getenv("CASCADE_STEP", "8"))
+cascade_margin = float(os.getenv("CASCADE_MARGIN", "0.1"))
+
+# embedding / reranker 추론 backend 설정 (onnx: CPU replica용 ONNX Runtime)
+inference_backend = os.getenv("INFERENCE_BACKEND", "torch")  # torch | onnx
+inference_device = os.getenv(
+    "INFERENCE_DEVICE"
+)  # 설정하면 환경별 기본 device 대신 사용
+onnx_quantization = os.getenv("ONNX_QUANTIZATION") or None  # None | int8 | fp16
+onnx_threads = int(os.getenv("ONNX_THREADS", "0")) or None  # 0이면 ONNX Runtime 기본값
+onnx_model_dir = os.getenv("ONNX_MODEL_DIR", "/app/models/onnx")
+
+
+def create_model_registry(environment: str) -> ModelRegistry:
     """
-    fast api life cycle동안 singleton으로 사용할 search service 생성
+    환경에 맞는 device / 추론 backend로 model registry 생성 (모델 load는 사용할 때)
     """
-    environment = os.getenv("ENVIRONMENT", "dev")
-    logger.info(f"environment: {environment}")
+    if environment == "prod":
+        device = ComponentDevice.from_str("cuda:0")
+    else:
+        device = ComponentDevice.from_str("mps")  # for local testing
+    if inference_device:
+        device = ComponentDevice.from_str(inference_device)
+    return ModelRegistry(
+        device=device,
+        backend=inference_backend,
+        quantization=onnx_quantization,
+        threads=onnx_threads,
+        onnx_dir=onnx_model_dir,
+    )
+
 
+def create_services(
+    environment: str,
+    executor: InferenceExecutor,
+    models: Optional[ModelRegistry] = None,
+    inference: bool = True,
+) -> dict:
+    """
+    환경에 맞는 document store, 모델을 생성하고 search / correlation service를 반환
+    :param executor: service가 추론을 넘길 executor (lifespan에서 shutdown)
+    :param models: 이미 모델을 load 한 registry (없으면 새로 생성)
+    :param inference: False면 추론을 executor의 worker process에 넘기기만 하는 API process용
+        service를 생성 (모델 weight, ANN index, 연관 논문 table을 load 하지 않음)
+    """
     if environment == "prod":
         # prod 환경에 맞춘 Document Store
         document_store = AwsOpenSearch(
@@ -37,31 +190,244 @@ async def lifespan(app: FastAPI):
             verify_certs=verify_certs,
             embedding_dim=embedding_dim,
             DEFAULT_REGION=DEFAULT_REGION,
+            pool_maxsize=opensearch_pool_size,
+            keep_alive_timeout=opensearch_keep_alive,
         )
-        device = ComponentDevice.from_str("cuda:0")
     else:
         # dev 환경에 맞춘 Document Store
         document_store = LocalOpenSearch(
             embedding_dim=embedding_dim,
             use_ssl=use_ssl,
+            pool_maxsize=opensearch_pool_size,
+            keep_alive_timeout=opensearch_keep_alive,
+        )
+    # 모델은 registry에서 한 번만 load 하고 service마다 view로 나눠서 사용
+    models = models or create_model_registry(environment)
+
+    vector_store = None
+    if inference:
+        vector_store = ArrayVectorStore(
+            embedding_dim=embedding_dim,
+            capacity_bytes=vector_store_capacity_bytes,
+            dtype=vector_store_dtype,
+        )
+    text_embedder = CachedTextEmbedder(
+        BatchingTextEmbedder(
+            models.embedder(),
+            max_batch_size=embedding_max_batch_size,
+            max_wait_ms=embedding_batch_wait_ms,
+        ),
+        cache=LRUCache(
+            name="query_embedding",
+            max_bytes=query_embedding_cache_bytes,
+            ttl=query_embedding_cache_ttl or None,
+        ),
+    )
+    response_cache = None
+    if response_cache_enabled:
+        response_cache = ResponseCache(
+            IndexGenerationTracker(
+                document_store, check_interval=index_generation_check_interval
+            ),
+            max_bytes=response_cache_bytes,
+            ttl=response_cache_ttl or None,
         )
-        device = ComponentDevice.from_str("mps")  # for local testing
 
-    vector_store = InMemoryVectorStore()
-    text_embedder = BgeM3SetenceEmbedder(device=device)
-    ranker = BgeReRankderService(top_k=result_top_k, device=device)
-    app.state.search_service = SearchService(
+    ann_index = None
+    if inference and ann_index_enabled:
+        # build는 background에서 진행하고, 끝나기 전까지는 OpenSearch kNN 사용
+        ann_index = LocalAnnIndex(
+            document_store,
+            embedding_dim=embedding_dim,
+            n_lists=ann_index_n_lists or None,
+            n_probe=ann_index_n_probe,
+            dtype=ann_index_dtype,
+            refresh_interval=ann_index_refresh_interval,
+            rebuild_interval=ann_index_rebuild_interval,
+        )
+        ann_index.start()
+
+    if rerank_batching:
+        # 하나의 reranker 모델을 scheduler로 공유하고 service별 top_k만 다르게 사용
+        rerank_scheduler = RerankScheduler(
+            models.reranker_model(),
+            max_batch_pairs=rerank_max_batch_pairs,
+            max_wait_ms=rerank_max_wait_ms,
+            timeout=rerank_timeout,
+        )
+        ranker = BatchingRanker(rerank_scheduler, top_k=result_top_k)
+        similiar_ranker = BatchingRanker(rerank_scheduler, top_k=10)
+    else:
+        ranker = models.reranker(top_k=result_top_k)
+        similiar_ranker = models.reranker(top_k=10)
+    search_service = SearchService(
         text_embedder=text_embedder,
         document_store=document_store,
         ranker=ranker,
         top_k=result_top_k // 2,  # 각각의 retriever에서 가져올 결과의 개수
+        executor=executor,
+        retrieval_mode=retrieval_mode,
+        retrieval_workers=inference_executor_workers,
+        response_cache=response_cache,
+        rerank_mode=rerank_mode,
+        cascade_ranker=CascadeRanker(
+            ranker, top_k=cascade_top_k, step=cascade_step, margin=cascade_margin
+        ),
+        document_joiner=FusionJoiner(
+            mode=fusion_mode, rrf_k=fusion_rrf_k, top_k=fusion_top_k
+        ),
+        result_sets=SearchResultSets(
+            max_bytes=search_result_set_bytes, ttl=search_result_set_ttl
+        ),
+        pagination_depth=search_pagination_depth,
     )
-    similiar_ranker = BgeReRankderService(top_k=10, device=device)
-    app.state.correlation_service = CorrelationService(
+    correlation_service = CorrelationService(
         document_store=document_store,
         ranker=similiar_ranker,
         top_k=10,
         vector_store=vector_store,
+        executor=executor,
+        response_cache=response_cache,
+        ann_index=ann_index,
+        related_papers=(
+            RelatedPapersTable(
+                related_papers_path, check_interval=related_papers_check_interval
+            )
+            if inference
+            else None
+        ),
+        pair_score_cache=(
+            LRUCache(name="rerank_pair_score", max_bytes=rerank_pair_cache_bytes)
+            if rerank_pair_cache_bytes
+            else None
+        ),
+    )
+    if inference:
+        search_service.warm_up()
+        correlation_service.warm_up()
+    return {
+        SearchService.executor_target: search_service,
+        CorrelationService.executor_target: correlation_service,
+        ModelRegistry.executor_target: models,
+    }
+
+
+def create_worker_services() -> dict:
+    """
+    process 모드 executor의 worker process마다 실행되는 service factory
+    worker는 API process가 보낸 요청을 service 메서드로 바로 실행하므로 executor는 service
+    등록에만 사용 (작업을 submit 하지 않아 thread가 생기지 않고, worker process와 함께 종료)
+    """
+    executor = InferenceExecutor(mode="thread", max_workers=1)
+    return create_services(os.getenv("ENVIRONMENT", "dev"), executor=executor)
+
+
+async def start_services(app: FastAPI, environment: str, executor: InferenceExecutor):
+    """
+    HTTP listener가 뜬 뒤 background에서 (연관 논문 table download ->) 모델 load -> service 생성
+    -> warm-up 추론 순서로 실행하고, 끝나면 service를 app.state에 등록해서 ready 상태로 전환
+    (process 모드에서는 worker process가 모델을 load 하고 API process는 service만 생성)
+    """
+    startup: StartupState = app.state.startup
+    related_papers_sync = RelatedPapersSync(
+        related_papers_path,
+        bucket=related_papers_s3_bucket,
+        key=related_papers_s3_key,
+        region=DEFAULT_REGION,
+        check_interval=related_papers_sync_interval,
+        # 모든 process의 table이 새 파일을 확인한 뒤 응답 cache를 비움
+        notify_delay=related_papers_check_interval,
     )
+    try:
+        if related_papers_s3_bucket:
+            # table을 여는 service 생성 전에 최신 table을 먼저 내려받음
+            with startup.track("download_related_papers"):
+                await executor.run(related_papers_sync.refresh)
+        if executor.mode == "process":
+            # 모델은 worker process에서만 load 하고, API process는 요청을 worker로 넘기는
+            # service만 생성 (API process에 모델 / ANN index가 중복으로 올라가지 않도록)
+            with startup.track("create_services"):
+                services = await executor.run(
+                    create_services, environment, executor=executor, inference=False
+                )
+            with startup.track("start_workers"):
+                # worker process가 뜨면서 service를 만들고, 각 worker에서 warm-up 추론
+                await executor.warm_up(
+                    ModelRegistry.executor_target, "warm_up_inference"
+                )
+        else:
+            models = create_model_registry(environment)
+            with startup.track("load_models"):
+                await executor.run(models.load)
+            with startup.track("create_services"):
+                services = await executor.run(
+                    create_services, environment, executor=executor, models=models
+                )
+            with startup.track("warm_up_inference"):
+                await executor.run(models.warm_up_inference)
+    except Exception:
+        logger.exception(f"Startup failed: {startup.error}")
+        return
+
+    app.state.search_service = services[SearchService.executor_target]
+    app.state.correlation_service = services[CorrelationService.executor_target]
+    if executor.mode == "process":
+        # table은 worker에만 있으므로 API process의 응답 cache는 파일 교체를 보고 무효화
+        related_papers_sync.add_listener(
+            app.state.correlation_service.related_papers_updated
+        )
+    related_papers_sync.start()
+    startup.mark_ready()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    fast api life cycle동안 singleton으로 사용할 search service 생성
+    (모델 loading은 background에서 진행하고, 준비 상태는 /readyz로 확인)
+    """
+    environment = os.getenv("ENVIRONMENT", "dev")
+    logger.info(f"environment: {environment}")
+    app.state.startup = StartupState()
+    app.state.admission = {
+        "search": AdmissionController(
+            "search",
+            max_concurrency=search_max_concurrency,
+            max_queue=search_max_queue,
+            queue_timeout=admission_queue_timeout,
+            retry_after=admission_retry_after,
+        ),
+        "correlations": AdmissionController(
+            "correlations",
+            max_concurrency=correlations_max_concurrency,
+            max_queue=correlations_max_queue,
+            queue_timeout=admission_queue_timeout,
+            retry_after=admission_retry_after,
+        ),
+    }
+
+    # pipeline / component 단계별 latency, 후보 문서 수를 /metrics 에 기록
+    # (process 모드 worker는 executor의 worker initializer에서 활성화)
+    enable_metrics_tracing()
+    if inference_executor_mode == "process" and not multiprocess_enabled():
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set: "
+            "metrics recorded in inference worker processes are not exported"
+        )
+
+    executor = InferenceExecutor(
+        mode=inference_executor_mode,
+        max_workers=inference_executor_workers,
+        max_queue_size=inference_executor_queue_size,
+        target_factory=create_worker_services,
+    )
+    app.state.executor = executor
+    startup_task = asyncio.create_task(start_services(app, environment, executor))
 
     yield
+
+    startup_task.cancel()
+    search_service = getattr(app.state, "search_service", None)
+    if search_service is not None:
+        await search_service.close_async()
+    executor.shutdown()
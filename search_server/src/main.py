@@ -1,12 +1,25 @@
 import os
+import time
 
 import sentry_sdk
 from config import lifespan
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from prometheus_client import Gauge, Histogram
 from routes.api_endpoints import router as main_router
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.starlette import StarletteIntegration
 
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Number of HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+http_request_seconds = Histogram(
+    "http_request_seconds",
+    "Latency of HTTP requests until the response headers are sent",
+    labelnames=("method", "path", "status"),
+)
+
 
 def traces_sampler(sampling_context):
     # Extract the ASGI scope and then the path from it
@@ -40,5 +53,25 @@ if os.getenv("ENVIRONMENT", "dev") == "prod":
     )
 app = FastAPI(lifespan=lifespan)
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    http_requests_in_flight.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        # label 수가 늘어나지 않도록 실제 path 대신 route의 path template 사용
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        http_request_seconds.labels(
+            method=request.method, path=path, status=status
+        ).observe(time.perf_counter() - started)
+
+
 # 라우트 추가
 app.include_router(main_router)
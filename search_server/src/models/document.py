@@ -15,6 +15,10 @@ class DocumentMeta(BaseModel):
     submitter: Optional[str]
 
 
+# 검색 결과(rerank + DocumentResponse)에 필요한 OpenSearch _source field (meta는 flatten 되어 저장됨)
+RESPONSE_SOURCE_FIELDS = ["id", "content", *DocumentMeta.model_fields]
+
+
 class DocumentResponse(BaseModel):
     id: str
     weight: float
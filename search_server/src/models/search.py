@@ -0,0 +1,25 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+MAX_BATCH_QUERIES = 100  # POST /search/batch 한 번에 받을 최대 query 수
+MAX_BATCH_DOC_IDS = 100  # POST /correlations/batch 한 번에 받을 최대 문서 수
+
+
+class SearchQuery(BaseModel):
+    query: str
+    filter_categories: Optional[List[str]] = None
+    filter_start_date: Optional[str] = None
+    filter_end_date: Optional[str] = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchQuery] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class BatchCorrelationRequest(BaseModel):
+    doc_ids: List[str] = Field(min_length=1, max_length=MAX_BATCH_DOC_IDS)
+    limit: int = 10
+    filter_categories: Optional[List[str]] = None
+    filter_start_date: Optional[str] = None
+    filter_end_date: Optional[str] = None
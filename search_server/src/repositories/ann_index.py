@@ -0,0 +1,453 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Histogram
+from utils.logger import log_on_init, logger
+from utils.metrics import CallbackGauge
+
+ann_index_documents = CallbackGauge(
+    "ann_index_documents",
+    "Number of live documents in the local ANN index",
+)
+ann_index_build_seconds = Histogram(
+    "ann_index_build_seconds",
+    "Time spent building (full) or refreshing (incremental) the local ANN index",
+    labelnames=("kind",),
+    buckets=(0.1, 1, 5, 15, 30, 60, 120, 300, 600, 1200),
+)
+
+# local index를 만들 때 OpenSearch에서 가져오는 _source field
+ANN_SOURCE_FIELDS = ["embedding", "datestamp", "categories"]
+
+
+class UnsupportedFilterError(ValueError):
+    """local index에서 처리할 수 없는 filter (호출한 쪽에서 OpenSearch kNN으로 fallback)"""
+
+
+def _parse_filters(filters: Optional[dict]) -> List[Tuple[str, str, object]]:
+    """
+    utils.filter.get_filters 형식의 filter를 (field, operator, value) 목록으로 변환
+    """
+    if not filters:
+        return []
+    if filters.get("operator") != "AND" or "conditions" not in filters:
+        raise UnsupportedFilterError(f"Unsupported filter: {filters}")
+
+    conditions = []
+    for condition in filters["conditions"]:
+        field = condition.get("field")
+        operator = condition.get("operator")
+        value = condition.get("value")
+        if field == "meta.datestamp" and operator in (">=", "<="):
+            conditions.append((field, operator, str(value)))
+        elif field == "meta.categories" and operator == "in":
+            conditions.append((field, operator, [str(v).casefold() for v in value]))
+        else:
+            raise UnsupportedFilterError(f"Unsupported filter condition: {condition}")
+    return conditions
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Segment:
+    """
+    한 번 만들어지면 바뀌지 않는 문서 묶음
+    centroids가 있으면 row가 IVF list 순서로 정렬되어 있고, 없으면 전체를 exact 검색
+    """
+
+    __slots__ = (
+        "ids",
+        "vectors",
+        "datestamps",
+        "category_rows",
+        "centroids",
+        "list_offsets",
+    )
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        datestamps: np.ndarray,
+        categories: List[str],
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.vectors = vectors
+        self.datestamps = datestamps
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+
+        # category -> row 목록 (arXiv categories는 "cs.AI cs.LG" 처럼 공백으로 구분)
+        category_rows: Dict[str, List[int]] = {}
+        for row, value in enumerate(categories):
+            for category in set((value or "").casefold().split()):
+                category_rows.setdefault(category, []).append(row)
+        self.category_rows = {
+            category: np.asarray(rows, dtype=np.int64)
+            for category, rows in category_rows.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def filter_mask(self, conditions: List[Tuple[str, str, object]]) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        for field, operator, value in conditions:
+            if field == "meta.datestamp":
+                # 날짜가 없는 문서는 range filter에서 제외
+                mask &= self.datestamps != ""
+                if operator == ">=":
+                    mask &= self.datestamps >= value
+                else:
+                    mask &= self.datestamps <= value
+            else:
+                category_mask = np.zeros(len(self), dtype=bool)
+                for category in value:
+                    rows = self.category_rows.get(category)
+                    if rows is not None:
+                        category_mask[rows] = True
+                mask &= category_mask
+        return mask
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        alive: np.ndarray,
+        conditions: List[Tuple[str, str, object]],
+        n_probe: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        mask = alive & self.filter_mask(conditions) if conditions else alive
+
+        if self.centroids is not None:
+            n_probe = min(n_probe, len(self.centroids))
+            centroid_scores = self.centroids @ query
+            probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+            rows = np.concatenate(
+                [
+                    np.arange(self.list_offsets[i], self.list_offsets[i + 1])
+                    for i in probe
+                ]
+            )
+            rows = rows[mask[rows]]
+            if len(rows) < top_k:
+                # filter 조건이 좁아서 probe한 list에 후보가 부족하면 조건에 맞는 전체 문서를 exact 검색
+                rows = np.flatnonzero(mask)
+        else:
+            rows = np.flatnonzero(mask)
+
+        if len(rows) == 0:
+            return self.ids[rows], np.empty(0, dtype=np.float32)
+        scores = self.vectors[rows].astype(np.float32, copy=False) @ query
+        if len(rows) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[top], scores[top]
+        return self.ids[rows], scores
+
+
+class _IndexState:
+    """검색에서 사용하는 snapshot. refresh 할 때마다 새로 만들어서 교체"""
+
+    __slots__ = ("main", "main_alive", "delta", "delta_alive")
+
+    def __init__(self, main, main_alive, delta=None, delta_alive=None):
+        self.main: _Segment = main
+        self.main_alive: np.ndarray = main_alive
+        self.delta: Optional[_Segment] = delta
+        self.delta_alive: Optional[np.ndarray] = delta_alive
+
+    @property
+    def size(self) -> int:
+        size = int(self.main_alive.sum())
+        if self.delta is not None:
+            size += int(self.delta_alive.sum())
+        return size
+
+
+@log_on_init()
+class LocalAnnIndex:
+    """
+    OpenSearch index의 embedding을 scroll로 가져와 process 메모리에 만드는 IVF(NumPy) 근사 kNN index
+
+    - build: 전체 문서를 가져와 spherical k-means로 n_lists개 list를 학습하고 list 순서로 정렬
+    - refresh: 마지막으로 본 datestamp 이후 문서만 가져와 delta segment(exact 검색)에 추가
+      delta가 main의 rebuild_ratio를 넘거나 rebuild_interval이 지나면 전체 rebuild
+    - 검색은 lock 없이 현재 snapshot을 사용하고, build / refresh는 새 snapshot을 만들어 교체
+    - get_filters의 meta.datestamp range, meta.categories in 조건을 지원
+    """
+
+    def __init__(
+        self,
+        document_store,
+        embedding_dim: int = 1024,
+        n_lists: Optional[int] = None,
+        n_probe: int = 16,
+        dtype=np.float32,
+        refresh_interval: float = 300,
+        rebuild_interval: float = 24 * 60 * 60,
+        rebuild_ratio: float = 0.2,
+        train_sample_size: int = 65536,
+        kmeans_iterations: int = 10,
+        scan_batch_size: int = 1000,
+    ):
+        """
+        :param n_lists: IVF list 수 (None이면 sqrt(문서 수))
+        :param n_probe: 검색할 때 살펴볼 list 수
+        :param dtype: embedding 저장 dtype (float32 | float16)
+        """
+        self._document_store = document_store
+        self.embedding_dim = embedding_dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.dtype = np.dtype(dtype)
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.rebuild_ratio = rebuild_ratio
+        self.train_sample_size = train_sample_size
+        self.kmeans_iterations = kmeans_iterations
+        self.scan_batch_size = scan_batch_size
+
+        self._state: Optional[_IndexState] = None
+        # doc_id -> (segment 번호 0: main / 1: delta, row). refresh thread에서만 사용
+        self._positions: Dict[str, Tuple[int, int]] = {}
+        self._delta_categories: List[str] = []
+        self._max_datestamp = ""
+        self._built_at = 0.0
+        self._lock = threading.Lock()  # build / refresh 직렬화
+        self._thread = None
+        ann_index_documents.set_function(lambda: len(self))
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def __len__(self) -> int:
+        state = self._state
+        return state.size if state is not None else 0
+
+    def start(self):
+        """background thread에서 build 후 refresh_interval마다 refresh"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_loop, name="ann-index-refresh", daemon=True
+                )
+                self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh local ANN index")
+            time.sleep(self.refresh_interval)
+
+    def search(
+        self,
+        query_embedding,
+        top_k: int = 10,
+        filters: Optional[dict] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        query embedding과 cosine similarity가 높은 문서 (doc_id, score)를 점수 순으로 반환
+        :raises UnsupportedFilterError: local index에서 처리할 수 없는 filter
+        :raises RuntimeError: index가 아직 build 되지 않음
+        """
+        state = self._state
+        if state is None:
+            raise RuntimeError("Local ANN index is not built yet")
+        conditions = _parse_filters(filters)
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        ids, scores = state.main.search(
+            query, top_k, state.main_alive, conditions, self.n_probe
+        )
+        if state.delta is not None:
+            delta_ids, delta_scores = state.delta.search(
+                query, top_k, state.delta_alive, conditions, self.n_probe
+            )
+            ids = np.concatenate([ids, delta_ids])
+            scores = np.concatenate([scores, delta_scores])
+
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [(str(ids[i]), float(scores[i])) for i in order]
+
+    def refresh(self):
+        """index가 없거나 rebuild 조건이면 전체 build, 아니면 새로 들어온 문서만 반영"""
+        with self._lock:
+            state = self._state
+            if (
+                state is None
+                or time.monotonic() - self._built_at >= self.rebuild_interval
+            ):
+                self._build()
+                return
+
+            started = time.monotonic()
+            query = None
+            if self._max_datestamp:
+                query = {"range": {"datestamp": {"gte": self._max_datestamp}}}
+            ids, vectors, datestamps, categories = self._scan(query)
+            updated = self._apply_updates(state, ids, vectors, datestamps, categories)
+            ann_index_build_seconds.labels(kind="incremental").observe(
+                time.monotonic() - started
+            )
+            if updated:
+                logger.info(f"Local ANN index refreshed with {updated} documents")
+
+            state = self._state
+            if state.delta is not None and len(state.delta) > self.rebuild_ratio * len(
+                state.main
+            ):
+                self._build()
+
+    def _build(self):
+        started = time.monotonic()
+        ids, vectors, datestamps, categories = self._scan(None)
+        if len(ids) == 0:
+            logger.warning("Local ANN index build skipped: no documents with embedding")
+            return
+
+        n_lists = self.n_lists or int(np.sqrt(len(ids)))
+        n_lists = max(1, min(n_lists, len(ids)))
+        centroids = self._train_centroids(vectors, n_lists)
+        assignment = self._assign(vectors, centroids)
+
+        # 같은 list의 문서가 연속된 row가 되도록 정렬
+        order = np.argsort(assignment, kind="stable")
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=list_offsets[1:])
+        main = _Segment(
+            ids[order],
+            vectors[order],
+            datestamps[order],
+            [categories[i] for i in order],
+            centroids=centroids,
+            list_offsets=list_offsets,
+        )
+
+        self._positions = {doc_id: (0, row) for row, doc_id in enumerate(main.ids)}
+        self._delta_categories = []
+        self._max_datestamp = max(datestamps.tolist())
+        self._built_at = time.monotonic()
+        self._state = _IndexState(main, np.ones(len(main), dtype=bool))
+
+        elapsed = time.monotonic() - started
+        ann_index_build_seconds.labels(kind="full").observe(elapsed)
+        logger.info(
+            f"Local ANN index built: {len(main)} documents, {n_lists} lists, {elapsed:.1f}s"
+        )
+
+    def _apply_updates(
+        self,
+        state: _IndexState,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        datestamps: np.ndarray,
+        categories: List[str],
+    ) -> int:
+        """새 / 변경된 문서를 delta segment에 넣고 이전 row는 삭제 처리한 snapshot으로 교체"""
+        segments = [state.main, state.delta]
+        alive = [state.main_alive.copy(), None]
+        if state.delta is not None:
+            alive[1] = state.delta_alive.copy()
+
+        keep = []
+        for i, doc_id in enumerate(ids):
+            position = self._positions.get(doc_id)
+            if position is not None:
+                segment_index, row = position
+                if segments[segment_index].datestamps[row] == datestamps[i]:
+                    continue  # 이미 반영된 문서
+                alive[segment_index][row] = False
+            keep.append(i)
+        if not keep:
+            return 0
+
+        # 기존 delta의 살아있는 row + 새 문서로 delta segment 재구성
+        new_ids, new_vectors, new_datestamps, new_categories = [], [], [], []
+        if state.delta is not None:
+            rows = np.flatnonzero(alive[1])
+            new_ids.append(state.delta.ids[rows])
+            new_vectors.append(state.delta.vectors[rows])
+            new_datestamps.append(state.delta.datestamps[rows])
+            new_categories.extend(self._delta_categories[row] for row in rows)
+        new_ids.append(ids[keep])
+        new_vectors.append(vectors[keep])
+        new_datestamps.append(datestamps[keep])
+        new_categories.extend(categories[i] for i in keep)
+
+        delta_datestamps = np.concatenate(new_datestamps).astype(str)
+        delta = _Segment(
+            np.concatenate(new_ids),
+            np.concatenate(new_vectors),
+            delta_datestamps,
+            new_categories,
+        )
+        self._delta_categories = new_categories
+        for row, doc_id in enumerate(delta.ids):
+            self._positions[doc_id] = (1, row)
+        self._max_datestamp = max(self._max_datestamp, *delta_datestamps.tolist())
+        self._state = _IndexState(
+            state.main, alive[0], delta, np.ones(len(delta), dtype=bool)
+        )
+        return len(keep)
+
+    def _scan(self, query: Optional[dict]):
+        """OpenSearch에서 embedding이 있는 문서를 가져와 (ids, 정규화된 vectors, datestamps, categories) 반환"""
+        capacity = max(1, self._document_store.count_documents()) if not query else 1024
+        vectors = np.empty((capacity, self.embedding_dim), dtype=self.dtype)
+        ids, datestamps, categories = [], [], []
+        for doc_id, source in self._document_store.scan_documents(
+            query=query, fields=ANN_SOURCE_FIELDS, batch_size=self.scan_batch_size
+        ):
+            embedding = source.get("embedding")
+            if not embedding or len(embedding) != self.embedding_dim:
+                continue
+            if len(ids) == len(vectors):
+                vectors = np.resize(vectors, (len(vectors) * 2, self.embedding_dim))
+            vectors[len(ids)] = _normalize(np.asarray(embedding, dtype=np.float32))
+            ids.append(doc_id)
+            datestamps.append(source.get("datestamp") or "")
+            categories.append(source.get("categories") or "")
+
+        return (
+            np.asarray(ids, dtype=object),
+            vectors[: len(ids)],
+            np.asarray(datestamps, dtype=str),
+            categories,
+        )
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """각 vector를 가장 가까운 centroid 번호로 할당 (메모리 사용을 줄이기 위해 chunk 단위)"""
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        chunk = 8192
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start : start + chunk].astype(np.float32, copy=False)
+            assignment[start : start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    def _train_centroids(self, vectors: np.ndarray, n_lists: int) -> np.ndarray:
+        """sample에 대해 spherical k-means로 IVF centroid 학습"""
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), max(self.train_sample_size, n_lists))
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        sample = sample.astype(np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            non_empty = counts > 0  # 빈 list는 이전 centroid 유지
+            centroids[non_empty] = _normalize(sums[non_empty])
+        return centroids
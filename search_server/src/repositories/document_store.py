@@ -1,19 +1,264 @@
+import asyncio
 import os
+import threading
+from contextlib import contextmanager
+from typing import Any, List, Union
 
+import aiohttp
 import boto3
+from haystack import Document
 from haystack_integrations.document_stores.opensearch import OpenSearchDocumentStore
-from opensearchpy import RequestsHttpConnection
+from opensearchpy import (
+    AsyncHttpConnection,
+    AsyncOpenSearch,
+    AWSV4SignerAsyncAuth,
+    OpenSearch,
+    RequestsHttpConnection,
+)
+from opensearchpy.connection.http_async import OpenSearchClientResponse
 from opensearchpy.exceptions import AuthorizationException
+from opensearchpy.helpers import scan
 from requests_aws4auth import AWS4Auth
 from utils.logger import log_on_init, logger
 
 
+class KeepAliveAsyncHttpConnection(AsyncHttpConnection):
+    """
+    pool 크기(maxsize)와 idle keep-alive 시간을 지정할 수 있는 aiohttp connection
+    (기본 AsyncHttpConnection은 keep-alive 시간을 설정할 수 없음)
+    """
+
+    def __init__(self, *args, keep_alive_timeout: float = 30.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keep_alive_timeout = keep_alive_timeout
+
+    async def _create_aiohttp_session(self) -> Any:
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding"),
+            auto_decompress=True,
+            loop=self.loop,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            response_class=OpenSearchClientResponse,
+            connector=aiohttp.TCPConnector(
+                limit=self._limit,
+                keepalive_timeout=self.keep_alive_timeout,
+                use_dns_cache=True,
+                ssl=self._ssl_context,
+            ),
+        )
+
+
 class OpenSearchDocumentStore(OpenSearchDocumentStore):
-    pass
+    # source_fields()로 지정한 _source projection (요청을 실행하는 thread 단위)
+    _projection = threading.local()
+    # collect_searches()로 모으는 중인 검색 body 목록 (요청을 실행하는 thread 단위)
+    _collector = threading.local()
+    # async client의 connection pool 크기 / idle connection 유지 시간(초)
+    pool_maxsize = 10
+    keep_alive_timeout = 30.0
+    _async_client = None
+
+    @property
+    def client(self) -> OpenSearch:
+        # 상위 class는 client에 접근할 때마다 index 존재 여부를 요청하므로 생성할 때만 확인
+        if self._client is None:
+            return super().client
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenSearch:
+        """
+        event loop에서 검색 요청을 보내는 client (pool_maxsize개의 keep-alive connection 공유)
+        처음 사용하는 event loop에 묶이므로 요청을 처리하는 loop 안에서만 사용
+        """
+        if self._async_client is None:
+            self._async_client = self._create_async_client(self._async_http_auth())
+        return self._async_client
+
+    def _create_async_client(self, http_auth) -> AsyncOpenSearch:
+        return AsyncOpenSearch(
+            hosts=self._hosts,
+            http_auth=http_auth,
+            use_ssl=self._use_ssl,
+            verify_certs=self._verify_certs,
+            timeout=self._timeout,
+            connection_class=KeepAliveAsyncHttpConnection,
+            maxsize=self.pool_maxsize,
+            keep_alive_timeout=self.keep_alive_timeout,
+        )
+
+    def _async_http_auth(self):
+        return self._http_auth
+
+    async def close_async(self) -> None:
+        """async client의 connection pool 종료"""
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            await client.close()
+
+    @contextmanager
+    def source_fields(self, source: Union[List[str], dict, None]):
+        """
+        with 블록 안에서 현재 thread가 보내는 검색 요청의 _source를 source로 제한
+        :param source: 가져올 field 목록 또는 {"includes": [...], "excludes": [...]} (None이면 기본값)
+        """
+        previous = getattr(self._projection, "source", None)
+        self._projection.source = source
+        try:
+            yield
+        finally:
+            self._projection.source = previous
+
+    @contextmanager
+    def collect_searches(self):
+        """
+        with 블록 안에서 현재 thread의 검색 요청을 보내지 않고 body만 모음
+        (retriever.run은 빈 결과를 반환하고, 모은 body는 multi_search로 한 번에 실행)
+        """
+        previous = getattr(self._collector, "bodies", None)
+        bodies = []
+        self._collector.bodies = bodies
+        try:
+            yield bodies
+        finally:
+            self._collector.bodies = previous
+
+    def _search_documents(self, **kwargs):
+        source = getattr(self._projection, "source", None)
+        if source is not None:
+            kwargs["_source"] = source
+        bodies = getattr(self._collector, "bodies", None)
+        if bodies is not None:
+            bodies.append(kwargs)
+            return []
+        return super()._search_documents(**kwargs)
+
+    def multi_search(self, bodies: List[dict]) -> List[List[Document]]:
+        """
+        여러 검색 body를 _msearch 한 번으로 실행하고 body 순서대로 결과 반환
+        """
+        if not bodies:
+            return []
+        lines = []
+        for body in bodies:
+            lines.append({"index": self._index})
+            lines.append(body)
+        return self._parse_msearch(self._msearch(lines))
+
+    async def search_async(self, body: dict) -> List[Document]:
+        """
+        collect_searches()로 모은 검색 body 하나를 async client로 실행
+        (thread를 점유하지 않고 pool의 connection을 다른 요청과 공유)
+        """
+        response = await self._search_async(body)
+        return [self._deserialize_document(hit) for hit in response["hits"]["hits"]]
+
+    async def multi_search_async(self, bodies: List[dict]) -> List[List[Document]]:
+        """multi_search의 async 버전"""
+        if not bodies:
+            return []
+        lines = []
+        for body in bodies:
+            lines.append({"index": self._index})
+            lines.append(body)
+        return self._parse_msearch(await self._msearch_async(lines))
+
+    async def _search_async(self, body: dict) -> dict:
+        return await self.async_client.search(index=self._index, body=body)
+
+    async def _msearch_async(self, lines: List[dict]) -> dict:
+        return await self.async_client.msearch(body=lines, index=self._index)
+
+    def _parse_msearch(self, response: dict) -> List[List[Document]]:
+        results = []
+        for position, item in enumerate(response["responses"]):
+            if "error" in item:
+                raise RuntimeError(f"msearch query {position} failed: {item['error']}")
+            results.append(
+                [self._deserialize_document(hit) for hit in item["hits"]["hits"]]
+            )
+        return results
+
+    def _msearch(self, lines: List[dict]) -> dict:
+        return self.client.msearch(body=lines, index=self._index)
+
+    def get_index_generation(self) -> tuple:
+        """
+        index 변경 여부 판단용 값 (문서 수, ETL이 mapping _meta에 기록한 version)
+        """
+        count = self.client.count(index=self._index)["count"]
+        mapping = self.client.indices.get_mapping(index=self._index)
+        meta = mapping.get(self._index, {}).get("mappings", {}).get("_meta", {})
+        return count, meta.get("version")
+
+    def get_documents_by_ids(
+        self,
+        ids: List[str],
+        fields: List[str] = None,
+        exclude_fields: List[str] = None,
+        batch_size: int = 500,
+    ) -> List[Document]:
+        """
+        검색 query 없이 mget으로 id에 해당하는 문서를 가져옴 (ids 순서 유지, 없는 id는 제외)
+        :param fields: 가져올 _source field 목록 (None이면 전체)
+        :param exclude_fields: 제외할 _source field 목록 (예: embedding)
+        :param batch_size: 한 번의 mget 요청에 담을 id 수
+        """
+        params = {}
+        if fields is not None:
+            params["_source_includes"] = fields
+        if exclude_fields:
+            params["_source_excludes"] = exclude_fields
+
+        documents = []
+        for start in range(0, len(ids), batch_size):
+            response = self._mget(ids[start : start + batch_size], params)
+            for hit in response["docs"]:
+                if not hit.get("found"):
+                    continue
+                data = hit["_source"]
+                data["id"] = hit["_id"]
+                documents.append(
+                    self._deserialize_document({"_source": data, "_score": None})
+                )
+        return documents
+
+    def _mget(self, ids: List[str], params: dict) -> dict:
+        return self.client.mget(index=self._index, body={"ids": ids}, **params)
+
+    def scan_documents(
+        self,
+        query: dict = None,
+        fields: list = None,
+        batch_size: int = 1000,
+    ):
+        """
+        scroll API로 index 전체(또는 query에 맞는 문서)의 _source를 순회
+        :param fields: 가져올 _source field 목록 (None이면 전체)
+        """
+        body = {"query": query or {"match_all": {}}}
+        if fields is not None:
+            body["_source"] = fields
+        for hit in scan(
+            self.client,
+            index=self._index,
+            query=body,
+            size=batch_size,
+            preserve_order=False,
+        ):
+            yield hit["_id"], hit["_source"]
 
 
 @log_on_init()
 class AwsOpenSearch(OpenSearchDocumentStore):
+    # async client를 교체한 횟수 / 교체를 한 번씩만 실행하기 위한 lock (처음 교체할 때 생성)
+    _async_generation = 0
+    _async_refresh_lock = None
+    # 교체된 뒤 request timeout이 지나면 종료할 이전 client의 종료 task
+    _retiring_clients = frozenset()
 
     def __init__(
         self,
@@ -23,8 +268,16 @@ class AwsOpenSearch(OpenSearchDocumentStore):
         verify_certs=True,
         embedding_dim=1024,
         DEFAULT_REGION="ap-northeast-2",
+        pool_maxsize=10,
+        keep_alive_timeout=30.0,
     ):
+        """
+        :param pool_maxsize: sync / async client가 유지하는 connection 수
+        :param keep_alive_timeout: async client가 idle connection을 유지하는 시간(초)
+        """
         self.DEFAULT_REGION = DEFAULT_REGION
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive_timeout = keep_alive_timeout
         self.index = index
         self.timeout = timeout
         self.use_ssl = use_ssl
@@ -49,7 +302,8 @@ class AwsOpenSearch(OpenSearchDocumentStore):
             embedding_dim=self.embedding_dim,
             verify_certs=self.verify_certs,
             connection_class=RequestsHttpConnection,
-            return_embedding=True,
+            pool_maxsize=pool_maxsize,
+            return_embedding=False,
         )
         self.update_auth_credentials()
 
@@ -68,25 +322,95 @@ class AwsOpenSearch(OpenSearchDocumentStore):
         # 기존 연결에 새로운 자격 증명 갱신
         self._http_auth = self.aws_auth
 
-    def _search_documents(self, *args, **kwargs):
+    def _async_http_auth(self):
+        """async client는 AWS4Auth(requests 전용) 대신 SigV4 async signer 사용"""
+        return AWSV4SignerAsyncAuth(
+            boto3.Session().get_credentials(), self.DEFAULT_REGION, "es"
+        )
+
+    def _refresh_client(self):
+        logger.warning("403 AuthorizationException: Refreshing AWS credentials.")
+        self._client = None  # auth 재설정을 위한 클라이언트 초기화
+        self.update_auth_credentials()
+
+    async def _refresh_async_client(self, generation: int):
         """
-        OpenSearchDocumentStore의 _search_documents 실행중 403 AuthorizationException catch
+        403을 받은 async client를 새 자격 증명의 client로 교체
+            - 동시에 403을 받은 요청들은 generation이 같으므로 처음 한 번만 교체
+            - 이전 client는 다른 요청이 아직 사용 중일 수 있으므로 request timeout 뒤에 종료
         """
+        if self._async_refresh_lock is None:
+            self._async_refresh_lock = asyncio.Lock()
+            self._retiring_clients = set()
+        async with self._async_refresh_lock:
+            if generation != self._async_generation:
+                return  # 다른 요청이 이미 교체함
+            logger.warning("403 AuthorizationException: Refreshing AWS credentials.")
+            # 자격 증명 조회(instance metadata 요청 등)는 event loop 밖에서 실행
+            http_auth = await asyncio.get_running_loop().run_in_executor(
+                None, self._async_http_auth
+            )
+            retired = self._async_client
+            self._async_client = self._create_async_client(http_auth)
+            self._async_generation += 1
+        if retired is not None:
+            task = asyncio.ensure_future(self._close_retired_client(retired))
+            self._retiring_clients.add(task)
+            task.add_done_callback(self._retiring_clients.discard)
+
+    async def _close_retired_client(self, client: AsyncOpenSearch):
         try:
-            # 상속받은 메서드 로직을 그대로 실행
-            return super()._search_documents(*args, **kwargs)
+            # timeout이 없으면 opensearch-py 기본 request timeout(10초)
+            await asyncio.sleep(self._timeout or 10)
+        finally:
+            await client.close()
+
+    async def close_async(self) -> None:
+        """교체되어 종료를 기다리는 이전 client까지 모두 종료"""
+        for task in list(self._retiring_clients):
+            task.cancel()  # 기다리지 않고 바로 종료
+        if self._retiring_clients:
+            await asyncio.gather(*self._retiring_clients, return_exceptions=True)
+        await super().close_async()
+
+    def _retry_on_expired_auth(self, request, *args, **kwargs):
+        """
+        request 실행중 403 AuthorizationException이면 자격 증명 갱신 후 한 번 더 실행
+        (다른 예외는 그대로 raise)
+        """
+        try:
+            return request(*args, **kwargs)
         except AuthorizationException as e:
-            if e.status_code == 403:
-                logger.warning(
-                    "403 AuthorizationException: Refreshing AWS credentials."
-                )
-                self._client = None  # auth 재설정을 위한 클라이언트 초기화
-                self.update_auth_credentials()
-                # 자격 증명 갱신 후 메서드 다시 실행
-                return super()._search_documents(*args, **kwargs)
-            else:
-                # 다른 예외는 다시 raise
+            if e.status_code != 403:
+                raise e
+            self._refresh_client()
+            return request(*args, **kwargs)
+
+    async def _retry_on_expired_auth_async(self, request, *args, **kwargs):
+        """_retry_on_expired_auth의 async client 버전"""
+        generation = self._async_generation  # 요청에 사용한 client
+        try:
+            return await request(*args, **kwargs)
+        except AuthorizationException as e:
+            if e.status_code != 403:
                 raise e
+            await self._refresh_async_client(generation)
+            return await request(*args, **kwargs)
+
+    async def _search_async(self, body):
+        return await self._retry_on_expired_auth_async(super()._search_async, body)
+
+    async def _msearch_async(self, lines):
+        return await self._retry_on_expired_auth_async(super()._msearch_async, lines)
+
+    def _search_documents(self, *args, **kwargs):
+        return self._retry_on_expired_auth(super()._search_documents, *args, **kwargs)
+
+    def _mget(self, ids, params):
+        return self._retry_on_expired_auth(super()._mget, ids, params)
+
+    def _msearch(self, lines):
+        return self._retry_on_expired_auth(super()._msearch, lines)
 
 
 @log_on_init()
@@ -96,7 +420,11 @@ class LocalOpenSearch(OpenSearchDocumentStore):
         index="new_index9",
         use_ssl=True,
         embedding_dim=1024,
+        pool_maxsize=10,
+        keep_alive_timeout=30.0,
     ):
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive_timeout = keep_alive_timeout
         OPENSEARCH_ID = os.environ.get("OPENSEARCH_ID", "admin")
         OPENSEARCH_PW = os.environ.get("OPENSEARCH_PW", "password")
 
@@ -106,5 +434,6 @@ class LocalOpenSearch(OpenSearchDocumentStore):
             embedding_dim=embedding_dim,
             use_ssl=use_ssl,
             http_auth=(OPENSEARCH_ID, OPENSEARCH_PW),
-            return_embedding=True,
+            maxsize=pool_maxsize,
+            return_embedding=False,
         )
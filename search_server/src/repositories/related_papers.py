@@ -0,0 +1,250 @@
+import os
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import boto3
+import numpy as np
+from utils.logger import log_on_init, logger
+
+# ETL/batch_ecs/source/related_papers.py 가 쓰는 파일 구조 (little endian, section은 8 byte 정렬)
+#   header          : magic(8s), 문서 수, neighbor 총 개수, id blob byte 수, 생성 시각(unix time)
+#   id_offsets      : uint64[문서 수 + 1]  (id는 utf-8 byte 기준 정렬)
+#   id_blob         : utf-8 id를 이어 붙인 byte
+#   neighbor_offsets: uint64[문서 수 + 1]
+#   neighbors       : uint32[neighbor 총 개수]
+#   scores          : float32[neighbor 총 개수]
+MAGIC = b"RELPAPR1"
+HEADER = struct.Struct("<8sQQQQ")
+
+
+def _align(offset: int) -> int:
+    return offset + (-offset % 8)
+
+
+class _Table:
+    """memory-mapped 된 related papers 파일 하나 (읽기 전용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        magic, n_docs, n_edges, id_bytes, created_at = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a related papers table")
+        self.n_docs = n_docs
+        self.created_at = created_at
+
+        offset = HEADER.size
+        self.id_offsets = np.frombuffer(data, np.uint64, n_docs + 1, offset)
+        offset += self.id_offsets.nbytes
+        self.id_blob = np.frombuffer(data, np.uint8, id_bytes, offset)
+        offset = _align(offset + id_bytes)
+        self.neighbor_offsets = np.frombuffer(data, np.uint64, n_docs + 1, offset)
+        offset += self.neighbor_offsets.nbytes
+        self.neighbors = np.frombuffer(data, np.uint32, n_edges, offset)
+        offset = _align(offset + self.neighbors.nbytes)
+        self.scores = np.frombuffer(data, np.float32, n_edges, offset)
+
+    def id_at(self, position: int) -> bytes:
+        start, end = self.id_offsets[position], self.id_offsets[position + 1]
+        return self.id_blob[start:end].tobytes()
+
+    def find(self, doc_id: str) -> Optional[int]:
+        """정렬된 id에서 binary search"""
+        target = doc_id.encode("utf-8")
+        low, high = 0, self.n_docs
+        while low < high:
+            middle = (low + high) // 2
+            if self.id_at(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.n_docs and self.id_at(low) == target:
+            return low
+        return None
+
+
+@log_on_init()
+class RelatedPapersTable:
+    """
+    ETL batch job이 미리 계산한 문서별 연관 논문 (id, score) 목록 조회
+
+    파일은 mmap으로 열어서 필요한 page만 읽고, check_interval마다 파일이 교체되었는지 확인해서
+    새 파일로 바꿔 끼움 (교체 중인 요청은 이전 파일을 계속 사용)
+    """
+
+    def __init__(self, path: str, check_interval: float = 60):
+        self.path = path
+        self.check_interval = check_interval
+        self._table: Optional[_Table] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._reload()
+
+    def add_listener(self, callback) -> None:
+        """새 파일로 table이 교체되었을 때 호출할 callback 등록"""
+        self._listeners.append(callback)
+
+    @property
+    def ready(self) -> bool:
+        return self._table is not None
+
+    def __len__(self) -> int:
+        table = self._table
+        return table.n_docs if table is not None else 0
+
+    def _reload(self):
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        if self._table is not None and self._table.mtime == mtime:
+            return
+        try:
+            self._table = _Table(self.path)
+        except Exception:
+            logger.exception(f"Failed to load related papers table {self.path}")
+            return
+        logger.info(
+            f"Loaded related papers table {self.path} ({self._table.n_docs} documents)"
+        )
+        for callback in self._listeners:
+            callback()
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        # 다른 thread가 확인 중이면 기존 table 사용
+        if self._lock.acquire(blocking=False):
+            try:
+                self._reload()
+            finally:
+                self._lock.release()
+
+    def lookup(self, doc_id: str, top_k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        doc_id의 연관 논문 상위 top_k개 (id, score) 목록
+        table에 없거나 저장된 neighbor 수가 top_k보다 적으면 None
+        """
+        self._maybe_reload()
+        table = self._table
+        if table is None:
+            return None
+        position = table.find(doc_id)
+        if position is None:
+            return None
+
+        start = int(table.neighbor_offsets[position])
+        end = int(table.neighbor_offsets[position + 1])
+        if end - start < top_k:
+            return None
+        end = start + top_k
+        return [
+            (table.id_at(int(neighbor)).decode("utf-8"), float(score))
+            for neighbor, score in zip(
+                table.neighbors[start:end], table.scores[start:end]
+            )
+        ]
+
+
+@log_on_init()
+class RelatedPapersSync:
+    """
+    ETL batch job(ETL/batch_ecs/related_papers.py)이 S3에 올린 table을 path로 내려받고,
+    path의 파일이 바뀌면 listener에 알림
+
+    - S3 객체가 local 파일보다 새로우면 임시 파일로 받은 뒤 os.replace로 교체
+      (RelatedPapersTable은 mtime이 바뀐 것을 보고 새 파일을 다시 mmap 함)
+    - bucket이 없으면 다른 방법(volume 등)으로 교체되는 path의 변경만 확인
+    - listener는 파일이 바뀌고 notify_delay 뒤에 호출
+      (모든 process의 RelatedPapersTable이 새 파일로 바뀐 다음 응답 cache를 비우기 위함)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        bucket: Optional[str] = None,
+        key: str = "related_papers.bin",
+        region: Optional[str] = None,
+        check_interval: float = 300,
+        notify_delay: float = 60,
+    ):
+        self.path = path
+        self.bucket = bucket
+        self.key = key
+        self.region = region
+        self.check_interval = check_interval
+        self.notify_delay = notify_delay
+        self._mtime = self._local_mtime()
+        self._listeners = []
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback) -> None:
+        """path의 파일이 교체되었을 때 호출할 callback 등록"""
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._poll_loop, name="related-papers-sync", daemon=True
+                )
+                self._worker.start()
+
+    def _local_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def download(self) -> bool:
+        """S3 객체가 local 파일보다 새로우면 내려받고 True 반환"""
+        client = boto3.client("s3", region_name=self.region)
+        head = client.head_object(Bucket=self.bucket, Key=self.key)
+        modified_at = head["LastModified"].timestamp()
+        local_mtime = self._local_mtime()
+        if local_mtime is not None and local_mtime >= modified_at:
+            return False
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            client.download_file(self.bucket, self.key, temp_path)
+            # 같은 객체를 다시 받지 않도록 mtime을 S3 수정 시각으로 맞춤
+            os.utime(temp_path, (modified_at, modified_at))
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        logger.info(
+            f"Downloaded related papers table s3://{self.bucket}/{self.key} "
+            f"to {self.path}"
+        )
+        return True
+
+    def refresh(self) -> bool:
+        """S3에서 내려받고 path의 파일이 바뀌었는지 확인 (바뀌었으면 True)"""
+        if self.bucket:
+            try:
+                self.download()
+            except Exception as e:
+                logger.warning(f"Failed to download related papers table: {e}")
+        mtime = self._local_mtime()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        return True
+
+    def _poll_loop(self):
+        while True:
+            if self.refresh():
+                time.sleep(self.notify_delay)
+                for callback in self._listeners:
+                    callback()
+            time.sleep(self.check_interval)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from haystack import Document, component
+from haystack_integrations.components.retrievers.opensearch import (
+    OpenSearchBM25Retriever,
+    OpenSearchEmbeddingRetriever,
+)
+from haystack_integrations.document_stores.opensearch.document_store import (
+    BM25_SCALING_FACTOR,
+)
+
+
+class _AsyncSearchMixin:
+    """
+    query body 구성은 sync retriever(run)를 그대로 사용하고, 검색 요청만 document store의
+    async client로 보내는 run_async 지원 (document store가 collect_searches / search_async를 지원해야 함)
+    """
+
+    async def _run_async(self, **inputs) -> Dict[str, List[Document]]:
+        # collect_searches 안에서는 요청을 보내지 않고 body만 만들어지므로 event loop를 막지 않음
+        with self._document_store.collect_searches() as bodies:
+            self.run(**inputs)
+        documents = []
+        for body in bodies:
+            documents.extend(await self._document_store.search_async(body))
+        return {"documents": documents}
+
+
+class ProjectedBM25Retriever(_AsyncSearchMixin, OpenSearchBM25Retriever):
+    """
+    검색 결과의 _source를 source_fields로 제한하는 BM25 retriever
+    (document store가 OpenSearchDocumentStore.source_fields를 지원해야 함)
+    """
+
+    def __init__(self, *, source_fields: Union[List[str], dict, None] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.source_fields = source_fields
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        all_terms_must_match: Optional[bool] = None,
+        top_k: Optional[int] = None,
+        fuzziness: Optional[str] = None,
+        scale_score: Optional[bool] = None,
+        custom_query: Optional[Dict[str, Any]] = None,
+    ):
+        with self._document_store.source_fields(self.source_fields):
+            return super().run(
+                query=query,
+                filters=filters,
+                all_terms_must_match=all_terms_must_match,
+                top_k=top_k,
+                fuzziness=fuzziness,
+                scale_score=scale_score,
+                custom_query=custom_query,
+            )
+
+    @component.output_types(documents=List[Document])
+    async def run_async(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        all_terms_must_match: Optional[bool] = None,
+        top_k: Optional[int] = None,
+        fuzziness: Optional[str] = None,
+        scale_score: Optional[bool] = None,
+        custom_query: Optional[Dict[str, Any]] = None,
+    ):
+        result = await self._run_async(
+            query=query,
+            filters=filters,
+            all_terms_must_match=all_terms_must_match,
+            top_k=top_k,
+            fuzziness=fuzziness,
+            custom_query=custom_query,
+        )
+        self.scale_documents(result["documents"], scale_score)
+        return result
+
+    def scale_documents(
+        self, documents: List[Document], scale_score: Optional[bool] = None
+    ) -> List[Document]:
+        """
+        collect_searches로 모은 body를 따로 실행한 검색 결과에 run()과 같은 BM25 점수 scaling 적용
+        (점수 scaling은 document store가 검색 후에 하므로 body만 모은 경우에는 적용되지 않음)
+        """
+        if self._scale_score if scale_score is None else scale_score:
+            for doc in documents:
+                doc.score = float(1 / (1 + np.exp(-doc.score / BM25_SCALING_FACTOR)))
+        return documents
+
+
+class ProjectedEmbeddingRetriever(_AsyncSearchMixin, OpenSearchEmbeddingRetriever):
+    """
+    검색 결과의 _source를 source_fields로 제한하는 kNN retriever
+    (document store가 OpenSearchDocumentStore.source_fields를 지원해야 함)
+    """
+
+    def __init__(self, *, source_fields: Union[List[str], dict, None] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.source_fields = source_fields
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        custom_query: Optional[Dict[str, Any]] = None,
+    ):
+        with self._document_store.source_fields(self.source_fields):
+            return super().run(
+                query_embedding=query_embedding,
+                filters=filters,
+                top_k=top_k,
+                custom_query=custom_query,
+            )
+
+    @component.output_types(documents=List[Document])
+    async def run_async(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        custom_query: Optional[Dict[str, Any]] = None,
+    ):
+        return await self._run_async(
+            query_embedding=query_embedding,
+            filters=filters,
+            top_k=top_k,
+            custom_query=custom_query,
+        )
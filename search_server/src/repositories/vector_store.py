@@ -1,10 +1,14 @@
+import sys
+import threading
 from abc import ABC, abstractmethod
-from typing import OrderedDict
+from typing import List, OrderedDict
 
 import numpy as np
 
 
 class TempDocument:
+    __slots__ = ("id", "embedding", "content")
+
     def __init__(self, id: str, embedding: np.ndarray, content: str):
         self.id = id
         self.embedding = embedding
@@ -61,3 +65,130 @@ class InMemoryVectorStore(VectorStore):
             return entity
         else:
             raise ValueError(f"Document ID {doc_id} not found in store")
+
+
+class _Stripe:
+    """ArrayVectorStore의 lock 단위. 자기 행렬 / id index / LRU 순서를 따로 가진다."""
+
+    __slots__ = ("lock", "rows", "matrix", "contents", "free_rows", "used_bytes")
+
+    def __init__(self, embedding_dim: int, dtype: np.dtype, initial_rows: int):
+        self.lock = threading.Lock()
+        self.rows: OrderedDict[str, int] = OrderedDict()  # doc_id -> row (LRU 순서)
+        self.matrix = np.empty((initial_rows, embedding_dim), dtype=dtype)
+        self.contents: List[str] = [None] * initial_rows
+        self.free_rows: List[int] = list(range(initial_rows - 1, -1, -1))
+        self.used_bytes = 0
+
+
+class ArrayVectorStore(VectorStore):
+    """
+    embedding을 연속된 NumPy 행렬(float32/float16)에 저장하는 byte 용량 기반 LRU 벡터 스토어
+
+    - doc_id -> row index만 dict로 관리해서 문서당 python 객체 overhead를 줄임
+    - doc_id hash로 나눈 stripe마다 lock을 따로 두어 여러 thread에서 동시에 접근 가능
+    - capacity_bytes는 stripe별로 나눠서 적용 (행렬 + content 문자열 크기 기준)
+    """
+
+    def __init__(
+        self,
+        embedding_dim: int = 1024,
+        capacity_bytes: int = 512 * 1024 * 1024,
+        dtype=np.float32,
+        stripes: int = 16,
+    ):
+        self.embedding_dim = embedding_dim
+        self.dtype = np.dtype(dtype)
+        self.capacity_bytes = capacity_bytes
+        self._row_bytes = embedding_dim * self.dtype.itemsize
+        self._stripe_capacity = capacity_bytes // stripes
+        self._max_rows = max(1, self._stripe_capacity // self._row_bytes)
+        initial_rows = min(64, self._max_rows)
+        self._stripes = [
+            _Stripe(embedding_dim, self.dtype, initial_rows) for _ in range(stripes)
+        ]
+
+    def _stripe(self, doc_id: str) -> _Stripe:
+        return self._stripes[hash(doc_id) % len(self._stripes)]
+
+    def _entry_bytes(self, doc_id: str, content: str) -> int:
+        return self._row_bytes + sys.getsizeof(doc_id) + sys.getsizeof(content)
+
+    def set(self, doc_id: str, entity: TempDocument):
+        """벡터를 ID와 함께 스토어에 추가 또는 업데이트"""
+        embedding = np.asarray(entity.embedding, dtype=self.dtype)
+        if embedding.shape != (self.embedding_dim,):
+            raise ValueError(
+                f"Expected embedding of shape ({self.embedding_dim},), got {embedding.shape}"
+            )
+
+        stripe = self._stripe(doc_id)
+        with stripe.lock:
+            row = stripe.rows.get(doc_id)
+            if row is not None:
+                stripe.rows.move_to_end(doc_id)
+                stripe.used_bytes -= self._entry_bytes(doc_id, stripe.contents[row])
+            else:
+                row = self._allocate_row(stripe)
+                stripe.rows[doc_id] = row
+
+            stripe.matrix[row] = embedding
+            stripe.contents[row] = entity.content
+            stripe.used_bytes += self._entry_bytes(doc_id, entity.content)
+
+            # 용량을 넘으면 가장 오래된 항목부터 삭제 (방금 넣은 항목은 제외)
+            while stripe.used_bytes > self._stripe_capacity and len(stripe.rows) > 1:
+                self._evict_oldest(stripe)
+
+    def _allocate_row(self, stripe: _Stripe) -> int:
+        if not stripe.free_rows:
+            rows = len(stripe.contents)
+            if rows < self._max_rows:
+                self._grow(stripe, min(rows * 2, self._max_rows))
+            else:
+                self._evict_oldest(stripe)
+        return stripe.free_rows.pop()
+
+    def _grow(self, stripe: _Stripe, new_rows: int) -> None:
+        old_rows = len(stripe.contents)
+        matrix = np.empty((new_rows, self.embedding_dim), dtype=self.dtype)
+        matrix[:old_rows] = stripe.matrix
+        stripe.matrix = matrix
+        stripe.contents.extend([None] * (new_rows - old_rows))
+        stripe.free_rows.extend(range(new_rows - 1, old_rows - 1, -1))
+
+    def _evict_oldest(self, stripe: _Stripe) -> None:
+        doc_id, row = stripe.rows.popitem(last=False)
+        stripe.used_bytes -= self._entry_bytes(doc_id, stripe.contents[row])
+        stripe.contents[row] = None
+        stripe.free_rows.append(row)
+
+    def get_vector(self, doc_id: str) -> np.ndarray:
+        """주어진 문서 ID에 해당하는 벡터 반환 (행렬 row의 복사본)"""
+        stripe = self._stripe(doc_id)
+        with stripe.lock:
+            row = stripe.rows.get(doc_id)
+            if row is None:
+                raise ValueError(f"Document ID {doc_id} not found in store")
+            stripe.rows.move_to_end(doc_id)
+            return stripe.matrix[row].copy()
+
+    def get_entity(self, doc_id: str) -> TempDocument:
+        """주어진 문서 ID에 해당하는 엔티티 반환"""
+        stripe = self._stripe(doc_id)
+        with stripe.lock:
+            row = stripe.rows.get(doc_id)
+            if row is None:
+                raise ValueError(f"Document ID {doc_id} not found in store")
+            stripe.rows.move_to_end(doc_id)
+            return TempDocument(doc_id, stripe.matrix[row].copy(), stripe.contents[row])
+
+    def __len__(self) -> int:
+        return sum(len(stripe.rows) for stripe in self._stripes)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "used_bytes": sum(stripe.used_bytes for stripe in self._stripes),
+            "capacity_bytes": self.capacity_bytes,
+        }
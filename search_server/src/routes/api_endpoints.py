@@ -1,35 +1,225 @@
-from typing import Annotated, List, Union
+import json
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
 
-from fastapi import APIRouter, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from haystack import Document
 from models.document import DocumentMeta, DocumentResponse
+from models.search import BatchCorrelationRequest, BatchSearchRequest
+from prometheus_client import CONTENT_TYPE_LATEST
+from services.response_cache import CursorError
+from utils.admission import AdmissionController, ClientDisconnected, Overloaded
+from utils.logger import logger
+from utils.metrics import render_metrics
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 10
+STARTUP_RETRY_AFTER = 5  # startup 중 503 응답의 Retry-After (초)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _format_event(stream: str, stage: str, payload) -> str:
+    """
+    - ndjson: {"stage": ..., "results": [...]} 한 줄
+    - sse: event: stage / data: [...]
+    """
+    if stream == "sse":
+        return f"event: {stage}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"stage": stage, "results": payload}) + "\n"
+
+
+async def _stream_events(
+    stream: str, events: AsyncIterator[Tuple[str, List[DocumentResponse]]]
+):
+    try:
+        async for stage, documents in events:
+            yield _format_event(
+                stream, stage, [document.model_dump() for document in documents]
+            )
+    except Exception as e:
+        # header가 이미 전송되었으므로 error event로 실패를 알림
+        logger.exception("Search stream failed")
+        yield _format_event(stream, "error", {"detail": str(e)})
+
 
 @router.get("/")
 async def read_root():
     return {"message": "Healthy"}
 
 
+@router.get("/livez")
+async def livez(request: Request, response: Response):
+    """process가 살아 있는지 확인 (startup이 실패했으면 재시작되도록 503)"""
+    startup = request.app.state.startup
+    if startup.failed:
+        response.status_code = 503
+    return {"status": "failed" if startup.failed else "alive"}
+
+
+@router.get("/readyz")
+async def readyz(request: Request, response: Response):
+    """모델 load / warm-up이 끝나서 요청을 받을 수 있는지와 startup 단계별 소요 시간"""
+    startup = request.app.state.startup
+    if not startup.ready:
+        response.status_code = 503
+    return startup.to_dict()
+
+
+async def _admit(request: Request, endpoint: str) -> AdmissionController:
+    """
+    endpoint의 admission slot을 얻어서 controller 반환 (사용 후 controller.release())
+    한도를 넘으면 503 + Retry-After, 대기 중 client가 연결을 끊으면 499
+    """
+    controller: AdmissionController = request.app.state.admission[endpoint]
+    try:
+        await controller.acquire(request)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    return controller
+
+
+@asynccontextmanager
+async def _admitted(request: Request, endpoint: str) -> AsyncIterator[None]:
+    controller = await _admit(request, endpoint)
+    try:
+        yield
+    finally:
+        controller.release()
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """
+    전송이 끝나거나 중단될 때 admission slot을 반환하는 StreamingResponse
+    (첫 chunk 전에 client가 끊거나 응답이 취소되어 body generator가 시작되지 않아도 반환)
+    """
+
+    def __init__(self, content, controller: AdmissionController, **kwargs):
+        super().__init__(content, **kwargs)
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+def _service(request: Request, name: str):
+    """준비된 service 반환 (startup이 끝나기 전이면 503)"""
+    service = getattr(request.app.state, name, None)
+    if service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is not ready",
+            headers={"Retry-After": str(STARTUP_RETRY_AFTER)},
+        )
+    return service
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text format metric
+    (PROMETHEUS_MULTIPROC_DIR이 설정되어 있으면 process 모드 executor의 worker 값까지 합침)
+    """
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @router.get("/search", response_model=List[DocumentResponse])
 async def search(
     request: Request,
-    query: str,
+    response: Response,
+    query: Optional[str] = None,
     filter_categories: Annotated[Union[list[str], None], Query()] = None,
     filter_start_date: str = None,
     filter_end_date: str = None,
+    stream: Optional[Literal["ndjson", "sse"]] = None,
+    cursor: Optional[str] = None,
+    page_size: Annotated[Optional[int], Query(ge=1, le=100)] = None,
 ):
-    results: List[DocumentResponse] = await request.app.state.search_service.query(
-        query,
-        filter_categories=filter_categories,
-        filter_start_date=filter_start_date,
-        filter_end_date=filter_end_date,
-    )
+    """
+    - stream을 지정하면 rerank 전 후보(retrieved)를 먼저 보내고 최종 결과(reranked)를 이어서 전송
+    - page_size를 지정하면 첫 page만 반환하고, 다음 page가 있으면 X-Next-Cursor header로
+      cursor를 전달. 다음 page는 query 없이 cursor로 요청
+    """
+    search_service = _service(request, "search_service")
+    if cursor is not None:
+        try:
+            results, next_cursor = search_service.next_page(
+                cursor, page_size or DEFAULT_PAGE_SIZE
+            )
+        except CursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return results
+
+    if not query:
+        raise HTTPException(status_code=422, detail="query is required")
+
+    if stream is not None:
+        # stream은 응답을 보내는 동안 추론하므로 stream이 끝날 때 slot 반환
+        controller = await _admit(request, "search")
+        events = search_service.stream(
+            query,
+            filter_categories=filter_categories,
+            filter_start_date=filter_start_date,
+            filter_end_date=filter_end_date,
+        )
+        return _AdmittedStreamingResponse(
+            _stream_events(stream, events),
+            controller,
+            media_type=STREAM_MEDIA_TYPES[stream],
+        )
+
+    async with _admitted(request, "search"):
+        if page_size is not None:
+            results, next_cursor = await search_service.query_page(
+                query,
+                page_size,
+                filter_categories=filter_categories,
+                filter_start_date=filter_start_date,
+                filter_end_date=filter_end_date,
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return results
+
+        results: List[DocumentResponse] = await search_service.query(
+            query,
+            filter_categories=filter_categories,
+            filter_start_date=filter_start_date,
+            filter_end_date=filter_end_date,
+        )
 
     return results
 
 
+@router.post("/search/batch", response_model=List[List[DocumentResponse]])
+async def search_batch(request: Request, body: BatchSearchRequest):
+    """
+    여러 query를 한 번에 검색해서 입력 순서대로 결과 목록 반환
+    (embedding, OpenSearch 검색(_msearch), rerank를 query 전체에 대해 한 번씩 실행)
+    """
+    search_service = _service(request, "search_service")
+    async with _admitted(request, "search"):
+        return await search_service.query_batch(
+            [query.model_dump() for query in body.queries]
+        )
+
+
 @router.get("/correlations", response_model=List[DocumentResponse])
 async def correlations(
     request: Request,
@@ -39,14 +229,30 @@ async def correlations(
     filter_start_date: str = None,
     filter_end_date: str = None,
 ):
-    results: List[DocumentResponse] = (
-        await request.app.state.correlation_service.similar_docs(
+    correlation_service = _service(request, "correlation_service")
+    async with _admitted(request, "correlations"):
+        results: List[DocumentResponse] = await correlation_service.similar_docs(
             doc_id,
             top_k=limit,
             filter_categories=filter_categories,
             filter_start_date=filter_start_date,
             filter_end_date=filter_end_date,
         )
-    )
 
     return results
+
+
+@router.post("/correlations/batch", response_model=Dict[str, List[DocumentResponse]])
+async def correlations_batch(request: Request, body: BatchCorrelationRequest):
+    """
+    여러 문서의 연관 문서를 한 번에 조회해서 {doc_id: 결과 목록} 으로 반환 (index에 없는 문서는 빈 목록)
+    """
+    correlation_service = _service(request, "correlation_service")
+    async with _admitted(request, "correlations"):
+        return await correlation_service.similar_docs_batch(
+            body.doc_ids,
+            top_k=body.limit,
+            filter_categories=body.filter_categories,
+            filter_start_date=body.filter_start_date,
+            filter_end_date=body.filter_end_date,
+        )
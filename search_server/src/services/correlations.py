@@ -1,44 +1,67 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 from haystack import Document, Pipeline
 from haystack.components.joiners import DocumentJoiner
-from haystack_integrations.components.retrievers.opensearch import (
-    OpenSearchBM25Retriever,
-    OpenSearchEmbeddingRetriever,
-)
-from models.document import DocumentResponse
+from models.document import RESPONSE_SOURCE_FIELDS, DocumentMeta, DocumentResponse
+from repositories.ann_index import LocalAnnIndex, UnsupportedFilterError
 from repositories.document_store import OpenSearchDocumentStore
-from repositories.vector_store import InMemoryVectorStore, TempDocument
-from services.ranker import RankerService
+from repositories.related_papers import RelatedPapersTable
+from repositories.retrievers import ProjectedEmbeddingRetriever
+from repositories.vector_store import TempDocument, VectorStore
+from services.ranker import BatchingRanker, CachedPairRanker, RankerService
+from services.response_cache import ResponseCache
+from utils.cache import LRUCache
+from utils.executor import InferenceExecutor
 from utils.filter import get_filters
 from utils.logger import log_on_init
+from utils.singleflight import SingleFlight
+from utils.tracing import run_component, trace_pipeline, trace_stage
+
+# rerank 후보: 응답 field + vector store에 cache 할 embedding
+CANDIDATE_SOURCE_FIELDS = RESPONSE_SOURCE_FIELDS + ["embedding"]
+# 미리 계산된 연관 논문 응답: meta만 필요
+META_SOURCE_FIELDS = ["id", *DocumentMeta.model_fields]
 
 
 @log_on_init()
 class CorrelationService:
+    executor_target = "correlation_service"  # InferenceExecutor에 등록되는 이름
+
     def __init__(
         self,
         document_store: OpenSearchDocumentStore,
-        ranker: RankerService,
+        ranker: Union[RankerService, BatchingRanker],
+        executor: InferenceExecutor,
         top_k=10,
-        vector_store: InMemoryVectorStore = None,
+        vector_store: VectorStore = None,
+        response_cache: Optional[ResponseCache] = None,
+        ann_index: Optional[LocalAnnIndex] = None,
+        related_papers: Optional[RelatedPapersTable] = None,
+        pair_score_cache: Optional[LRUCache] = None,
     ):
-        self.bm25_retriever = OpenSearchBM25Retriever(
-            document_store=document_store,
-            top_k=top_k,
-        )
+        """
+        :param executor: blocking 추론을 실행하는 executor (생성한 쪽에서 shutdown)
+        :param ann_index: 준비되어 있으면 OpenSearch kNN 대신 후보 문서 검색에 사용하는 local index
+        :param related_papers: filter 없는 요청에 바로 응답하는 미리 계산된 연관 논문 table
+        :param pair_score_cache: (source 문서, 후보 문서) pair의 reranker 점수 cache
+        """
+        if pair_score_cache is not None:
+            ranker = CachedPairRanker(ranker, pair_score_cache)
 
         # bm25_retriever = OpenSearchBM25Retriever(
         #     document_store=document_store,
         #     top_k=top_k,
         # )
 
-        embedding_retriever = OpenSearchEmbeddingRetriever(
+        # 결과 문서의 embedding은 vector store에 cache 해서 다음 요청의 source로 사용
+        embedding_retriever = ProjectedEmbeddingRetriever(
             document_store=document_store,
+            source_fields=CANDIDATE_SOURCE_FIELDS,
         )
         # document_joiner = DocumentJoiner()
 
-        self.correlation_pipleline = Pipeline()
+        self.correlation_pipleline = Pipeline(metadata={"name": "correlations"})
         self.correlation_pipleline.add_component(
             "embedding_retriever", embedding_retriever
         )
@@ -51,42 +74,164 @@ class CorrelationService:
         # self.correlation_pipleline.connect("document_joiner", "ranker")
         self.correlation_pipleline.connect("embedding_retriever", "ranker")
 
-        self.correlation_pipleline.warm_up()  # lazy loading 방지 (model download, db connection ...)
-
         self._vector_store = (
             vector_store  # openSearch로 가져온 document를 캐시할 vector store
         )
 
+        # blocking pipeline 실행을 event loop 밖으로 보내기 위한 executor
+        self._executor = executor
+        self._executor.register(self.executor_target, self)
+        self._response_cache = response_cache
+        self._document_store = document_store
+        self._ann_index = ann_index
+        self._related_papers = related_papers
+        if related_papers is not None:
+            # 이전 table로 계산한 응답이 cache에 남지 않도록 교체될 때 cache 무효화
+            related_papers.add_listener(self.related_papers_updated)
+        self.embedding_retriever = embedding_retriever
+        self.ranker = ranker
+        self._cache_pair_scores = pair_score_cache is not None
+        self._in_flight = SingleFlight("correlations")
+
+    def warm_up(self) -> None:
+        """
+        lazy loading 방지 (model download, db connection ...)
+        추론을 실행하는 process(thread 모드 API process, process 모드 worker)에서만 호출
+        """
+        self.correlation_pipleline.warm_up()
+
+    def related_papers_updated(self) -> None:
+        """
+        연관 논문 table이 새 파일로 교체되었을 때 호출
+        (process 모드에서는 table을 가진 worker 대신 API process의 RelatedPapersSync가 호출)
+        """
+        if self._response_cache is not None:
+            self._response_cache.invalidate()
+
+    @staticmethod
+    def _request_key(doc_id: str, top_k: int, **kwargs) -> tuple:
+        """문서 id / top_k / 필터로 만든 요청 key (response cache, single-flight 공용)"""
+        return ResponseCache.make_key(
+            "correlations",
+            doc_id=doc_id,
+            top_k=top_k,
+            filter_categories=kwargs.get("filter_categories") or (),
+            filter_start_date=kwargs.get("filter_start_date"),
+            filter_end_date=kwargs.get("filter_end_date"),
+        )
+
+    def _cache_key(self, doc_id: str, top_k: int, **kwargs) -> Optional[tuple]:
+        if self._response_cache is None:
+            return None
+        return self._response_cache.bind(self._request_key(doc_id, top_k, **kwargs))
+
     async def similar_docs(
         self, doc_id: str, top_k: int = 10, **kwargs
     ) -> List[DocumentResponse]:
-        source_doc = None
-        try:
-            source_doc = self._vector_store.get_entity(doc_id)
-
-        except ValueError as e:
-            # vector store에 없는 경우 document store에서 가져와서 저장
-            query_result = self.bm25_retriever.run(
-                query=doc_id,
-                top_k=1,
-                filters={
-                    "operator": "AND",
-                    "conditions": [
-                        {"field": "id", "operator": "==", "value": doc_id},
-                    ],
-                },
-            )
-            results: List[Document] = query_result["documents"]
-            source_doc = TempDocument(
-                results[0].id, results[0].embedding, results[0].content
+        cache_key = self._cache_key(doc_id, top_k, **kwargs)
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # 같은 문서의 조회가 이미 실행 중이면 새로 실행하지 않고 그 결과를 함께 사용
+        return await self._in_flight.run(
+            self._request_key(doc_id, top_k, **kwargs),
+            lambda: self._run_similar_docs(doc_id, top_k, cache_key, **kwargs),
+        )
+
+    async def _run_similar_docs(
+        self, doc_id: str, top_k: int, cache_key: Optional[tuple], **kwargs
+    ) -> List[DocumentResponse]:
+        documents = await self._executor.call(
+            self.executor_target, "_similar_docs", doc_id, top_k, **kwargs
+        )
+        if cache_key is not None:
+            self._response_cache.set(cache_key, documents)
+        return documents
+
+    async def similar_docs_batch(
+        self, doc_ids: List[str], top_k: int = 10, **kwargs
+    ) -> Dict[str, List[DocumentResponse]]:
+        """
+        여러 문서의 연관 문서를 한 번에 조회 (doc_ids 순서의 dict, 없는 문서는 빈 목록)
+        """
+        doc_ids = list(dict.fromkeys(doc_ids))
+        results: Dict[str, List[DocumentResponse]] = {}
+        cache_keys = {
+            doc_id: self._cache_key(doc_id, top_k, **kwargs) for doc_id in doc_ids
+        }
+        pending = []
+        for doc_id in doc_ids:
+            cached = None
+            if cache_keys[doc_id] is not None:
+                cached = self._response_cache.get(cache_keys[doc_id])
+            if cached is not None:
+                results[doc_id] = cached
+            else:
+                pending.append(doc_id)
+
+        if pending:
+            computed = await self._executor.call(
+                self.executor_target, "_similar_docs_batch", pending, top_k, **kwargs
             )
+            for doc_id in pending:
+                results[doc_id] = computed.get(doc_id, [])
+                if cache_keys[doc_id] is not None and doc_id in computed:
+                    self._response_cache.set(cache_keys[doc_id], results[doc_id])
+        return {doc_id: results[doc_id] for doc_id in doc_ids}
+
+    def _similar_docs(
+        self, doc_id: str, top_k: int = 10, **kwargs
+    ) -> List[DocumentResponse]:
+        """
+        inference executor의 worker에서 실행되는 blocking 연관 문서 조회
+        """
+        filter_categoreis = kwargs.get("filter_categories")
+        filter_start_date = kwargs.get("filter_start_date")
+        filter_end_date = kwargs.get("filter_end_date")
+        filters = get_filters(filter_categoreis, filter_start_date, filter_end_date)
+
+        if filters is None and self._related_papers is not None:
+            # filter가 없으면 미리 계산된 결과 사용 (table에 없는 문서만 pipeline 실행)
+            hits = self._related_papers.lookup(doc_id, top_k)
+            if hits is not None:
+                # 응답에는 meta만 필요하므로 content, embedding은 가져오지 않음
+                documents = self._fetch_documents(hits, fields=META_SOURCE_FIELDS)
+                return [
+                    DocumentResponse(id=doc.id, meta=doc.meta, weight=doc.score)
+                    for doc in documents
+                ]
 
-        if source_doc:
-            doc_vector = source_doc.embedding
-            filter_categoreis = kwargs.get("filter_categories")
-            filter_start_date = kwargs.get("filter_start_date")
-            filter_end_date = kwargs.get("filter_end_date")
-            filters = get_filters(filter_categoreis, filter_start_date, filter_end_date)
+        source_doc = self._source_documents([doc_id]).get(doc_id)
+        if source_doc is None:
+            # index에 없는 문서는 batch 조회와 같이 빈 목록
+            return []
+
+        doc_vector = np.asarray(source_doc.embedding, dtype=float).tolist()
+        ranker_inputs = {"query": source_doc.content, "top_k": top_k}
+        if self._cache_pair_scores:
+            ranker_inputs["source_id"] = source_doc.id
+
+        # local index 경로는 pipeline 객체 없이 실행하므로 별도 이름으로 기록
+        query_result: Optional[dict] = None
+        with trace_pipeline("correlations_local"):
+            with trace_stage("correlations_local", "ann_index") as span:
+                candidates = self._local_candidates(doc_vector, top_k * 2, filters)
+                span.set_content_tag(
+                    "haystack.component.output", {"documents": candidates}
+                )
+            if candidates is not None:
+                query_result = {
+                    "ranker": run_component(
+                        "correlations_local",
+                        "ranker",
+                        self.ranker,
+                        documents=candidates,
+                        **ranker_inputs,
+                    )
+                }
+        if query_result is None:
             query_result = self.correlation_pipleline.run(
                 {
                     "embedding_retriever": {
@@ -94,19 +239,168 @@ class CorrelationService:
                         "filters": filters,
                         "top_k": top_k * 2,
                     },
-                    "ranker": {
-                        "query": source_doc.content,
-                        "top_k": top_k,
-                    },
+                    "ranker": ranker_inputs,
                 }
             )
-            similar_docs: List[Document] = query_result["ranker"]["documents"]
-            documents = []
-            for doc in similar_docs:
-                entity = TempDocument(doc.id, doc.embedding, doc.content)
-                self._vector_store.set(doc.id, entity)
-                if source_doc.id == doc.id:
-                    doc.score = 1.0  # 자기 자신은 1.0으로 설정
-                document = DocumentResponse(id=doc.id, meta=doc.meta, weight=doc.score)
-                documents.append(document)
-            return documents
+        similar_docs: List[Document] = query_result["ranker"]["documents"]
+        return self._to_responses(source_doc, similar_docs)
+
+    def _similar_docs_batch(
+        self, doc_ids: List[str], top_k: int = 10, **kwargs
+    ) -> Dict[str, List[DocumentResponse]]:
+        """
+        inference executor의 worker에서 실행되는 blocking batch 연관 문서 조회
+            - source 문서 / 미리 계산된 결과의 meta를 mget 한 번으로 가져옴
+            - local index로 처리하지 못한 kNN 검색을 _msearch 한 번으로 실행
+            - 모든 (source, 후보) pair를 한 번에 rerank
+        """
+        filters = get_filters(
+            kwargs.get("filter_categories"),
+            kwargs.get("filter_start_date"),
+            kwargs.get("filter_end_date"),
+        )
+        results: Dict[str, List[DocumentResponse]] = {}
+
+        remaining = doc_ids
+        if filters is None and self._related_papers is not None:
+            precomputed = {}
+            for doc_id in doc_ids:
+                hits = self._related_papers.lookup(doc_id, top_k)
+                if hits is not None:
+                    precomputed[doc_id] = hits
+            if precomputed:
+                neighbor_ids = list(
+                    dict.fromkeys(
+                        neighbor_id
+                        for hits in precomputed.values()
+                        for neighbor_id, _ in hits
+                    )
+                )
+                documents = self._document_store.get_documents_by_ids(
+                    neighbor_ids, fields=META_SOURCE_FIELDS
+                )
+                metas = {doc.id: doc.meta for doc in documents}
+                for doc_id, hits in precomputed.items():
+                    results[doc_id] = [
+                        DocumentResponse(
+                            id=neighbor_id, meta=metas[neighbor_id], weight=score
+                        )
+                        for neighbor_id, score in hits
+                        if neighbor_id in metas
+                    ]
+            remaining = [doc_id for doc_id in doc_ids if doc_id not in precomputed]
+
+        sources = self._source_documents(remaining)
+        source_docs = [sources[doc_id] for doc_id in remaining if doc_id in sources]
+        if not source_docs:
+            return results
+
+        doc_vectors = [
+            np.asarray(source_doc.embedding, dtype=float).tolist()
+            for source_doc in source_docs
+        ]
+        with trace_pipeline("correlations_batch"):
+            with trace_stage("correlations_batch", "ann_index"):
+                candidates = [
+                    self._local_candidates(doc_vector, top_k * 2, filters)
+                    for doc_vector in doc_vectors
+                ]
+            knn_positions = [i for i, docs in enumerate(candidates) if docs is None]
+            if knn_positions:
+                with trace_stage("correlations_batch", "multi_search"):
+                    with self._document_store.collect_searches() as bodies:
+                        for i in knn_positions:
+                            self.embedding_retriever.run(
+                                query_embedding=doc_vectors[i],
+                                filters=filters,
+                                top_k=top_k * 2,
+                            )
+                    for i, documents in zip(
+                        knn_positions, self._document_store.multi_search(bodies)
+                    ):
+                        candidates[i] = documents
+
+            queries = [source_doc.content for source_doc in source_docs]
+            with trace_stage("correlations_batch", "ranker"):
+                if self._cache_pair_scores:
+                    scores = self.ranker.score_documents_batch(
+                        queries,
+                        candidates,
+                        source_ids=[source_doc.id for source_doc in source_docs],
+                    )
+                else:
+                    scores = self.ranker.score_documents_batch(queries, candidates)
+
+        for source_doc, documents, doc_scores in zip(source_docs, candidates, scores):
+            ranked = self.ranker.rank_documents(documents, doc_scores, top_k=top_k)
+            results[source_doc.id] = self._to_responses(source_doc, ranked)
+        return results
+
+    def _source_documents(self, doc_ids: List[str]) -> Dict[str, TempDocument]:
+        """
+        vector store에 cache된 source 문서를 사용하고, 없는 문서만 document store에서
+        mget 한 번으로 가져옴 (index에 없는 문서는 제외)
+        """
+        sources = {}
+        missing = []
+        for doc_id in doc_ids:
+            try:
+                sources[doc_id] = self._vector_store.get_entity(doc_id)
+            except ValueError:
+                missing.append(doc_id)
+
+        if missing:
+            documents = self._document_store.get_documents_by_ids(
+                missing, fields=["content", "embedding"]
+            )
+            for doc in documents:
+                sources[doc.id] = TempDocument(doc.id, doc.embedding, doc.content)
+        return sources
+
+    def _to_responses(
+        self, source_doc: TempDocument, similar_docs: List[Document]
+    ) -> List[DocumentResponse]:
+        """
+        rerank 결과 문서를 vector store에 cache 하고 응답으로 변환
+        """
+        documents = []
+        for doc in similar_docs:
+            entity = TempDocument(doc.id, doc.embedding, doc.content)
+            self._vector_store.set(doc.id, entity)
+            if source_doc.id == doc.id:
+                doc.score = 1.0  # 자기 자신은 1.0으로 설정
+            document = DocumentResponse(id=doc.id, meta=doc.meta, weight=doc.score)
+            documents.append(document)
+        return documents
+
+    def _local_candidates(
+        self, doc_vector: List[float], top_k: int, filters
+    ) -> Optional[List[Document]]:
+        """
+        local ANN index로 후보 문서를 찾고 OpenSearch에서는 해당 id의 문서만 가져옴
+        index가 아직 준비되지 않았거나 처리할 수 없는 filter면 None (OpenSearch kNN 사용)
+        """
+        if self._ann_index is None or not self._ann_index.ready:
+            return None
+        try:
+            hits = self._ann_index.search(doc_vector, top_k=top_k, filters=filters)
+        except UnsupportedFilterError:
+            return None
+        if not hits:
+            return []
+        return self._fetch_documents(hits, fields=CANDIDATE_SOURCE_FIELDS)
+
+    def _fetch_documents(
+        self, hits: List[Tuple[str, float]], fields: List[str]
+    ) -> List[Document]:
+        """
+        (doc_id, score) 순서대로 document store에서 문서를 가져와 score를 기록
+        (index에서 삭제된 문서는 제외)
+        """
+        scores = dict(hits)
+        documents = self._document_store.get_documents_by_ids(
+            [doc_id for doc_id, _ in hits], fields=fields
+        )
+        for doc in documents:
+            doc.score = scores[doc.id]
+        return documents
@@ -1,22 +1,262 @@
+import asyncio
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import List, Optional
 
+import numpy as np
+from haystack import component
 from haystack.components.embedders import SentenceTransformersTextEmbedder
-from utils.logger import log_on_init
+from prometheus_client import Histogram
+from services.onnx_backend import OnnxEmbeddingBackend, export_embedder, model_dir
+from utils.cache import LRUCache, normalize_query
+from utils.logger import log_on_init, logger
+from utils.metrics import CallbackGauge
+
+embedder_queue_depth = CallbackGauge(
+    "embedder_queue_depth",
+    "Number of queries waiting for the batching embedder",
+)
+embedder_batch_size = Histogram(
+    "embedder_batch_size",
+    "Number of queries embedded in one forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
 
 
 class EmbeddingService(SentenceTransformersTextEmbedder):
-    pass
+    # 추론 backend (torch: SentenceTransformers, onnx: ONNX Runtime CPU)
+    backend = "torch"
+    onnx_quantization = None  # None | int8 | fp16
+    onnx_threads = None
+    onnx_dir = "/app/models/onnx"
+
+    def warm_up(self):
+        if self.backend != "onnx" or self.embedding_backend is not None:
+            return super().warm_up()
+
+        output_dir = model_dir(self.onnx_dir, self.model, self.onnx_quantization)
+        if not os.path.exists(os.path.join(output_dir, "model.onnx")):
+            export_embedder(self.model, output_dir, self.onnx_quantization)
+        self.embedding_backend = OnnxEmbeddingBackend(
+            output_dir, threads=self.onnx_threads
+        )
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 문장을 한 번의 forward pass로 embedding (run()과 같은 prefix/suffix, 옵션 사용)
+        """
+        if self.embedding_backend is None:
+            raise RuntimeError(
+                "The embedding model has not been loaded. Please call warm_up() before running."
+            )
+        return self.embedding_backend.embed(
+            [self.prefix + text + self.suffix for text in texts],
+            batch_size=self.batch_size,
+            show_progress_bar=self.progress_bar,
+            normalize_embeddings=self.normalize_embeddings,
+            precision=self.precision,
+        )
 
 
 @log_on_init()
 class BgeM3SetenceEmbedder(EmbeddingService):
-    def __init__(self, device=None):
+    def __init__(
+        self,
+        device=None,
+        backend: str = "torch",
+        quantization: str = None,
+        threads: int = None,
+        onnx_dir: str = None,
+    ):
         super().__init__(
             model="BAAI/bge-m3",
             device=device,
+            # 임의 초기화 없이 safetensors weight를 memory-map 해서 바로 load
+            model_kwargs={"low_cpu_mem_usage": True},
         )
+        self.backend = backend
+        self.onnx_quantization = quantization
+        self.onnx_threads = threads
+        self.onnx_dir = onnx_dir or self.onnx_dir
 
 
 @log_on_init()
 class GPTEmbeddingService(EmbeddingService):
     pass
+
+
+def _resolve(future: Future, result=None, exception: Optional[Exception] = None):
+    """결과를 넘기지 못하는 future가 있어도 batch worker는 계속 실행되도록 오류만 기록"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        logger.warning("Dropped embedding result of an already resolved request")
+
+
+@log_on_init()
+@component
+class BatchingTextEmbedder:
+    """
+    여러 요청에서 동시에 들어온 query를 짧은 시간(max_wait_ms) 동안 모아서
+    한 번의 forward pass로 embedding 하고, 각 요청에 자기 vector를 돌려주는 front-end
+
+    text_embedder 자리에 그대로 넣을 수 있도록 SentenceTransformersTextEmbedder와
+    같은 run(text) -> {"embedding": ...} 인터페이스를 제공한다.
+    run / embed는 결과가 나올 때까지 호출한 thread를 점유하므로, 추론 executor의 worker
+    수보다 큰 batch를 만들려면 event loop에서 embed_async로 요청해야 한다.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        embedder_queue_depth.set_function(self._queue.qsize)
+
+    def warm_up(self):
+        self.embedder.warm_up()
+        self._start_worker()
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str):
+        return {"embedding": self.embed(text)}
+
+    def embed(self, text: str) -> List[float]:
+        """batch worker에 query를 넣고 자기 결과가 나올 때까지 대기"""
+        self._start_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    async def embed_async(self, text: str) -> List[float]:
+        """
+        event loop에서 query를 queue에 넣고 결과를 await
+        (기다리는 동안 thread를 점유하지 않으므로 동시 요청 수만큼 batch가 커질 수 있음)
+        """
+        self._start_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return await asyncio.wrap_future(future)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """여러 query를 한꺼번에 queue에 넣어서 같은 batch로 embedding"""
+        self._start_worker()
+        futures = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._batch_loop, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # 대기 시간이 끝나도 이미 쌓여 있는 query는 같은 batch에 포함
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[tuple]):
+        # 기다리는 동안 취소된 요청(client 연결 종료, timeout 등)은 제외
+        batch = [
+            (text, future)
+            for text, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        embedder_batch_size.observe(len(texts))
+        try:
+            embeddings = self.embedder.embed_batch(texts)
+        except Exception as e:
+            logger.exception(f"Batched embedding failed for {len(texts)} queries")
+            for _, future in batch:
+                _resolve(future, exception=e)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            _resolve(future, result=embedding)
+
+
+@log_on_init()
+@component
+class CachedTextEmbedder:
+    """
+    정규화된 query 문자열을 key로 embedding 결과를 cache 하는 text embedder front-end
+    (cache hit이면 모델을 거치지 않음)
+
+    embedding은 float32 ndarray로 저장해서 python float list 대비 메모리를 줄인다.
+    """
+
+    def __init__(self, embedder, cache: LRUCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def warm_up(self):
+        self.embedder.warm_up()
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str):
+        key = normalize_query(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {"embedding": cached.tolist()}
+
+        embedding = self.embedder.run(text=text)["embedding"]
+        self.cache.set(key, np.asarray(embedding, dtype=np.float32))
+        return {"embedding": embedding}
+
+    async def embed_async(self, text: str) -> List[float]:
+        """cache에 없는 query만 embedder.embed_async로 계산 (event loop에서 호출)"""
+        key = normalize_query(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.tolist()
+
+        embedding = await self.embedder.embed_async(text)
+        self.cache.set(key, np.asarray(embedding, dtype=np.float32))
+        return embedding
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """cache에 없는 query만 모아서 embedder.embed_batch로 계산"""
+        keys = [normalize_query(text) for text in texts]
+        cached = [self.cache.get(key) for key in keys]
+        embeddings = [None if value is None else value.tolist() for value in cached]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = self.embedder.embed_batch([texts[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = list(embedding)
+                self.cache.set(keys[i], np.asarray(embedding, dtype=np.float32))
+        return embeddings
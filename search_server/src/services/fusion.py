@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional
+
+from haystack import Document, component
+from haystack.core.component.types import Variadic
+from utils.logger import log_on_init
+
+FUSION_MODES = ("rrf", "weighted")
+
+
+def reciprocal_rank_scores(
+    document_lists: List[List[Document]], weights: List[float], k: int
+) -> Dict[str, float]:
+    """
+    retriever별 순위로 weight / (k + rank) 를 더한 점수
+    (모든 retriever에서 1위인 문서가 1.0이 되도록 정규화)
+    """
+    scores: Dict[str, float] = {}
+    for documents, weight in zip(document_lists, weights):
+        for rank, doc in enumerate(documents, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + weight / (k + rank)
+    best = sum(weights) / (k + 1)
+    return {doc_id: score / best for doc_id, score in scores.items()}
+
+
+def weighted_scores(
+    document_lists: List[List[Document]], weights: List[float]
+) -> Dict[str, float]:
+    """
+    retriever별 점수를 min-max 정규화해서 weight로 가중 평균한 점수 (0 ~ 1)
+    한 retriever에만 있는 문서는 나머지 retriever에서 0점
+    """
+    scores: Dict[str, float] = {}
+    for documents, weight in zip(document_lists, weights):
+        raw = [doc.score or 0.0 for doc in documents]
+        if not raw:
+            continue
+        low, high = min(raw), max(raw)
+        for doc, score in zip(documents, raw):
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            scores[doc.id] = scores.get(doc.id, 0.0) + weight * normalized
+    total = sum(weights)
+    return {doc_id: score / total for doc_id, score in scores.items()}
+
+
+@log_on_init()
+@component
+class FusionJoiner:
+    """
+    여러 retriever 결과를 하나의 순위로 합치는 joiner
+
+    - rrf: 순위 기반 reciprocal rank fusion (BM25 / kNN 점수 scale 차이에 영향을 받지 않음)
+    - weighted: retriever별 min-max 정규화 점수의 가중 평균
+    - 같은 id는 하나로 합치고, 같은 논문(meta.identifier)에서 나온 chunk는 점수가 가장 높은
+      chunk만 남김
+    - fused score(0 ~ 1) 내림차순으로 상위 top_k개만 반환해서 reranker 입력 크기를 제한
+    """
+
+    def __init__(
+        self,
+        mode: str = "rrf",
+        weights: Optional[List[float]] = None,
+        rrf_k: int = 60,
+        top_k: Optional[int] = None,
+        dedupe_field: Optional[str] = "identifier",
+    ):
+        """
+        :param weights: retriever 입력 순서별 가중치 (없으면 모두 같은 가중치)
+        :param top_k: 반환할 최대 후보 수 (없으면 전부)
+        :param dedupe_field: 같은 값이면 하나만 남길 meta field (None이면 id로만 중복 제거)
+        """
+        if mode not in FUSION_MODES:
+            raise ValueError(f"Unknown fusion mode: {mode} (expected {FUSION_MODES})")
+        self.mode = mode
+        self.weights = weights
+        self.rrf_k = rrf_k
+        self.top_k = top_k
+        self.dedupe_field = dedupe_field
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: Variadic[List[Document]], top_k: Optional[int] = None):
+        document_lists = list(documents)
+        if not document_lists:
+            return {"documents": []}
+        weights = self.weights or [1.0] * len(document_lists)
+        if len(weights) != len(document_lists):
+            raise ValueError(
+                f"Expected {len(weights)} document lists, got {len(document_lists)}"
+            )
+
+        if self.mode == "rrf":
+            scores = reciprocal_rank_scores(document_lists, weights, self.rrf_k)
+        else:
+            scores = weighted_scores(document_lists, weights)
+
+        # 같은 id는 먼저 들어온 retriever의 문서를 사용
+        unique: Dict[str, Document] = {}
+        for doc in (doc for documents in document_lists for doc in documents):
+            if doc.id not in unique:
+                doc.score = scores[doc.id]
+                unique[doc.id] = doc
+        fused = sorted(unique.values(), key=lambda doc: doc.score, reverse=True)
+
+        if self.dedupe_field:
+            seen = set()
+            deduped = []
+            for doc in fused:
+                key = (doc.meta or {}).get(self.dedupe_field)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                deduped.append(doc)
+            fused = deduped
+
+        top_k = top_k or self.top_k
+        return {"documents": fused[:top_k] if top_k else fused}
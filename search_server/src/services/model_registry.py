@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from services.embedding import BgeM3SetenceEmbedder, EmbeddingService
+from services.ranker import BgeReRankderService, RankerService, RankerView
+from utils.logger import log_on_init, logger
+
+
+@log_on_init()
+class ModelRegistry:
+    """
+    process 안에서 모델(BGE-M3 embedder, bge reranker)을 종류별로 한 번만 생성해서 공유하는 registry
+
+    service에는 모델 자체 대신 top_k 등 service별 설정만 가진 view(RankerView)를 넘겨서
+    같은 모델 weight를 여러 service가 함께 사용한다. 모델은 처음 요청될 때 생성되고,
+    warm_up()을 여러 view에서 호출해도 모델 loading은 한 번만 일어난다.
+    """
+
+    executor_target = "model_registry"  # InferenceExecutor에 등록되는 이름
+
+    def __init__(self, device=None, **backend_options):
+        """
+        :param backend_options: 모델 생성자에 넘길 backend 설정 (backend, quantization, threads, onnx_dir)
+        """
+        self.device = device
+        self.backend_options = backend_options
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, factory: Callable[[], Any]):
+        key = (kind, name)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                logger.info(f"Loading shared {kind} model {name}")
+                model = factory()
+                self._models[key] = model
+            return model
+
+    def embedder(self) -> EmbeddingService:
+        """공유 BGE-M3 embedder"""
+        return self._get(
+            "embedder",
+            "BAAI/bge-m3",
+            lambda: BgeM3SetenceEmbedder(device=self.device, **self.backend_options),
+        )
+
+    def reranker_model(self) -> RankerService:
+        """공유 bge reranker 모델 (RerankScheduler 등 모델 자체가 필요한 곳에 사용)"""
+        return self._get(
+            "reranker",
+            "BAAI/bge-reranker-v2-m3",
+            lambda: BgeReRankderService(device=self.device, **self.backend_options),
+        )
+
+    def reranker(self, top_k: int = 10) -> RankerView:
+        """공유 reranker 모델을 top_k개 반환하도록 사용하는 view"""
+        return RankerView(self.reranker_model(), top_k=top_k)
+
+    @property
+    def models(self) -> Dict[Tuple[str, str], Any]:
+        """생성된 모델 목록 ((종류, 모델 이름) -> 모델)"""
+        return dict(self._models)
+
+    def warm_up(self) -> None:
+        """생성된 모든 모델을 load"""
+        for model in self.models.values():
+            model.warm_up()
+
+    def load(self) -> None:
+        """service 생성 전에 embedder / reranker 모델을 모두 생성해서 load"""
+        self.embedder()
+        self.reranker_model()
+        self.warm_up()
+
+    def warm_up_inference(self, text: str = "warm up") -> None:
+        """
+        첫 요청의 지연(CUDA kernel / ONNX Runtime graph 초기화 등)을 줄이기 위해
+        load 된 모델로 한 번씩 추론
+        """
+        for (kind, _), model in self.models.items():
+            if kind == "embedder":
+                model.embed_batch([text])
+            elif kind == "reranker":
+                model.score_pairs([[text, text]])
@@ -0,0 +1,354 @@
+"""
+CPU 추론용 ONNX Runtime backend
+
+- export_embedder / export_cross_encoder: HuggingFace 모델을 ONNX로 변환 (선택적으로 int8 / fp16 변환)
+- OnnxEmbeddingBackend: SentenceTransformers embedding backend와 같은 embed() 인터페이스
+- OnnxCrossEncoder: RankerService.score_pairs와 같은 raw logit 점수 계산
+- check_embedding_parity / check_ranker_parity: PyTorch backend와 결과 비교
+
+    python -m services.onnx_backend export --quantization int8
+    python -m services.onnx_backend check --quantization int8
+"""
+
+import argparse
+import inspect
+import json
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+import torch
+from utils.logger import logger
+
+QUANTIZATIONS = (None, "int8", "fp16")
+BACKEND_CONFIG = "backend_config.json"
+
+
+def model_dir(root: str, model_name_or_path: str, quantization: Optional[str]) -> str:
+    """모델 이름 + quantization 별 ONNX 저장 경로"""
+    name = re.sub(r"[^0-9A-Za-z_.-]+", "--", str(model_name_or_path).strip("/"))
+    return os.path.join(root, f"{name}-{quantization or 'fp32'}")
+
+
+def create_session(path: str, threads: Optional[int] = None):
+    """
+    CPU InferenceSession 생성
+    :param threads: intra-op thread 수 (None이면 onnxruntime 기본값 = 물리 core 수)
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    return ort.InferenceSession(
+        path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+
+def _export(model, output_dir: str, output_name: str, quantization: Optional[str]):
+    """(input_ids, attention_mask) -> output_name 인 ONNX graph export 후 quantization 적용"""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization} ({QUANTIZATIONS})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model_fp32.onnx")
+    model = model.to("cpu").eval()
+    dummy = {
+        "input_ids": torch.ones((1, 8), dtype=torch.long),
+        "attention_mask": torch.ones((1, 8), dtype=torch.long),
+    }
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "sequence"},
+        output_name: {0: "batch"},
+    }
+    export_options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # dynamo 옵션은 torch 2.5부터 있고, 최신 torch는 dynamo exporter(onnxscript 필요)가 기본값
+        export_options["dynamo"] = False
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            **export_options,
+        )
+
+    path = os.path.join(output_dir, "model.onnx")
+    if quantization == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    elif quantization == "fp16":
+        import onnx
+        from onnxruntime.transformers.float16 import convert_float_to_float16
+
+        converted = convert_float_to_float16(onnx.load(fp32_path), keep_io_types=True)
+        onnx.save(converted, path)
+        os.remove(fp32_path)
+    else:
+        os.replace(fp32_path, path)
+    return path
+
+
+class _LastHiddenState(torch.nn.Module):
+    """ONNX export용 wrapper: transformer의 last_hidden_state만 반환"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        output = self.model(input_ids=input_ids, attention_mask=attention_mask)
+        return output.last_hidden_state
+
+
+class _Logits(torch.nn.Module):
+    """ONNX export용 wrapper: sequence classification logits만 반환"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def export_embedder(
+    model_name_or_path: str, output_dir: str, quantization: Optional[str] = None
+) -> str:
+    """
+    SentenceTransformer 모델의 transformer를 ONNX로 export 하고
+    pooling / normalize / max_seq_length 설정을 backend_config.json에 함께 저장
+    """
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name_or_path, device="cpu")
+    transformer = model[0]
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    path = _export(
+        _LastHiddenState(transformer.auto_model),
+        output_dir,
+        "last_hidden_state",
+        quantization,
+    )
+    transformer.tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, BACKEND_CONFIG), "w") as f:
+        json.dump(
+            {
+                "pooling": "cls" if pooling.pooling_mode_cls_token else "mean",
+                "normalize": any(isinstance(module, Normalize) for module in model),
+                "max_seq_length": model.max_seq_length,
+                "quantization": quantization,
+            },
+            f,
+        )
+    logger.info(f"Exported {model_name_or_path} embedder to {path}")
+    return path
+
+
+def export_cross_encoder(
+    model_name_or_path: str, output_dir: str, quantization: Optional[str] = None
+) -> str:
+    """sequence classification(cross-encoder) 모델을 ONNX로 export"""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name_or_path)
+    path = _export(_Logits(model), output_dir, "logits", quantization)
+    AutoTokenizer.from_pretrained(model_name_or_path).save_pretrained(output_dir)
+    logger.info(f"Exported {model_name_or_path} cross-encoder to {path}")
+    return path
+
+
+class OnnxEmbeddingBackend:
+    """
+    SentenceTransformersTextEmbedder의 embedding_backend 자리에 넣어 쓰는 ONNX backend
+    """
+
+    def __init__(self, output_dir: str, threads: Optional[int] = None):
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(output_dir, BACKEND_CONFIG)) as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(output_dir)
+        self.session = create_session(os.path.join(output_dir, "model.onnx"), threads)
+
+    def embed(
+        self,
+        data: List[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        precision: str = "float32",
+        **kwargs,
+    ) -> List[List[float]]:
+        if precision != "float32":
+            raise ValueError(
+                f"ONNX backend supports float32 precision only: {precision}"
+            )
+
+        # 길이가 비슷한 문장끼리 batch를 만들어 padding을 줄이고 원래 순서로 되돌림
+        order = sorted(range(len(data)), key=lambda i: len(data[i]))
+        embeddings = [None] * len(data)
+        for start in range(0, len(order), batch_size):
+            indices = order[start : start + batch_size]
+            features = self.tokenizer(
+                [data[i] for i in indices],
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np",
+            )
+            attention_mask = features["attention_mask"].astype(np.int64)
+            (hidden,) = self.session.run(
+                None,
+                {
+                    "input_ids": features["input_ids"].astype(np.int64),
+                    "attention_mask": attention_mask,
+                },
+            )
+            if self.config["pooling"] == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = attention_mask[..., None].astype(hidden.dtype)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(
+                    mask.sum(axis=1), 1e-9, None
+                )
+            if self.config["normalize"] or normalize_embeddings:
+                pooled = pooled / np.clip(
+                    np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None
+                )
+            for i, embedding in zip(indices, pooled.astype(np.float32)):
+                embeddings[i] = embedding.tolist()
+        return embeddings
+
+
+class OnnxCrossEncoder:
+    """cross-encoder ONNX 모델로 (query, document) pair의 raw logit 점수 계산"""
+
+    def __init__(self, output_dir: str, threads: Optional[int] = None):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(output_dir)
+        self.session = create_session(os.path.join(output_dir, "model.onnx"), threads)
+
+    def score(self, pairs: List[List[str]], batch_size: int = 16) -> List[float]:
+        scores: List[float] = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [document for _, document in batch],
+                padding=True,
+                truncation=True,
+                return_tensors="np",
+            )
+            (logits,) = self.session.run(
+                None,
+                {
+                    "input_ids": features["input_ids"].astype(np.int64),
+                    "attention_mask": features["attention_mask"].astype(np.int64),
+                },
+            )
+            scores.extend(logits[:, 0].astype(np.float32).tolist())
+        return scores
+
+
+def check_embedding_parity(
+    reference: List[List[float]], candidate: List[List[float]], min_cosine=0.99
+) -> dict:
+    """PyTorch / ONNX embedding의 cosine similarity 비교"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    result = {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+    result["passed"] = result["min_cosine"] >= min_cosine
+    return result
+
+
+def check_ranker_parity(
+    reference: List[float], candidate: List[float], max_abs_diff=0.5, top_k=10
+) -> dict:
+    """PyTorch / ONNX reranker 점수 차이와 상위 top_k 순위 일치 여부 비교"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    top_k = min(top_k, len(reference))
+    reference_top = set(np.argsort(-reference)[:top_k].tolist())
+    candidate_top = set(np.argsort(-candidate)[:top_k].tolist())
+    result = {
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+        "top_k_overlap": len(reference_top & candidate_top) / max(top_k, 1),
+    }
+    result["passed"] = result["max_abs_diff"] <= max_abs_diff
+    return result
+
+
+PARITY_QUERIES = [
+    "graph neural networks for molecule property prediction",
+    "retrieval augmented generation with large language models",
+    "contrastive self-supervised learning of visual representations",
+    "diffusion models for image synthesis",
+    "reinforcement learning from human feedback",
+    "efficient attention for long sequences",
+    "federated learning under non-iid data",
+    "bayesian optimization of hyperparameters",
+]
+
+
+def main():
+    from services.embedding import BgeM3SetenceEmbedder
+    from services.ranker import BgeReRankderService
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--quantization", choices=["int8", "fp16"], default=None)
+    parser.add_argument(
+        "--onnx-dir", default=os.getenv("ONNX_MODEL_DIR", "/app/models/onnx")
+    )
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    backend = {
+        "backend": "onnx",
+        "quantization": args.quantization,
+        "onnx_dir": args.onnx_dir,
+        "threads": args.threads,
+    }
+    onnx_embedder = BgeM3SetenceEmbedder(device=None, **backend)
+    onnx_ranker = BgeReRankderService(device=None, **backend)
+    onnx_embedder.warm_up()  # ONNX 모델이 없으면 export
+    onnx_ranker.warm_up()
+    if args.command == "export":
+        return
+
+    embedder = BgeM3SetenceEmbedder(device=None)
+    ranker = BgeReRankderService(device=None)
+    embedder.warm_up()
+    ranker.warm_up()
+
+    embedding_result = check_embedding_parity(
+        embedder.embed_batch(PARITY_QUERIES), onnx_embedder.embed_batch(PARITY_QUERIES)
+    )
+    pairs = [
+        [query, document] for query in PARITY_QUERIES for document in PARITY_QUERIES
+    ]
+    ranker_result = check_ranker_parity(
+        ranker.score_pairs(pairs), onnx_ranker.score_pairs(pairs)
+    )
+    print(json.dumps({"embedder": embedding_result, "ranker": ranker_result}, indent=2))
+    if not (embedding_result["passed"] and ranker_result["passed"]):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,656 @@
+import asyncio
+import concurrent.futures
+import math
 import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Union
 
+import torch
+from haystack import Document, component
 from haystack.components.rankers import TransformersSimilarityRanker
-from utils.logger import log_on_init
+from prometheus_client import Counter, Histogram
+from services.onnx_backend import OnnxCrossEncoder, export_cross_encoder, model_dir
+from utils.cache import LRUCache
+from utils.logger import log_on_init, logger
+from utils.metrics import CallbackGauge
 
 bge_reranker_model_path = os.getenv(
     "BGE_RERANKER_MODEL_PATH", "/app/models/bge-reranker-v2-m3"
 )
 
+reranker_pending_pairs = CallbackGauge(
+    "reranker_pending_pairs",
+    "Number of (query, document) pairs waiting for the rerank scheduler",
+)
+reranker_batch_pairs = Histogram(
+    "reranker_batch_pairs",
+    "Number of (query, document) pairs scored in one scheduler flush",
+    buckets=(1, 8, 16, 32, 64, 128, 256, 512),
+)
+reranker_requests_per_flush = Histogram(
+    "reranker_requests_per_flush",
+    "Number of requests merged into one scheduler flush",
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+rerank_depth = Histogram(
+    "rerank_depth",
+    "Number of candidates scored by the cross-encoder per request in cascade mode",
+    buckets=(8, 16, 24, 32, 40, 48, 64, 100),
+)
+rerank_skipped_pairs = Counter(
+    "rerank_skipped_pairs_total",
+    "Number of candidates left unscored by cascade early stopping",
+)
+reranker_queue_wait_seconds = Histogram(
+    "reranker_queue_wait_seconds",
+    "Time a rerank request waited before its flush started",
+)
+
+
+def _flatten(pairs: List[List[List[str]]]) -> List[List[str]]:
+    return [pair for query_pairs in pairs for pair in query_pairs]
+
+
+def _split_scores(
+    scores: List[float], pairs: List[List[List[str]]]
+) -> List[List[float]]:
+    """flatten 해서 계산한 점수를 query별 pair 개수대로 다시 나눔"""
+    results = []
+    start = 0
+    for query_pairs in pairs:
+        results.append(scores[start : start + len(query_pairs)])
+        start += len(query_pairs)
+    return results
+
 
 class RankerService(TransformersSimilarityRanker):
-    pass
+    """
+    TransformersSimilarityRanker.run을 pair 구성 / 점수 계산 / 정렬 단계로 나눠서
+    점수 계산(score_pairs)만 따로 batch 처리할 수 있게 한 ranker
+    """
+
+    # 추론 backend (torch: transformers, onnx: ONNX Runtime CPU)
+    backend = "torch"
+    onnx_quantization = None  # None | int8 | fp16
+    onnx_threads = None
+    onnx_dir = "/app/models/onnx"
+    onnx_model = None
+
+    def warm_up(self):
+        if self.backend != "onnx":
+            return super().warm_up()
+        if self.onnx_model is None:
+            output_dir = model_dir(
+                self.onnx_dir, self.model_name_or_path, self.onnx_quantization
+            )
+            if not os.path.exists(os.path.join(output_dir, "model.onnx")):
+                export_cross_encoder(
+                    self.model_name_or_path, output_dir, self.onnx_quantization
+                )
+            self.onnx_model = OnnxCrossEncoder(output_dir, threads=self.onnx_threads)
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query: str,
+        documents: List[Document],
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        calibration_factor: Optional[float] = None,
+        score_threshold: Optional[float] = None,
+    ):
+        if self.model is None and self.onnx_model is None:
+            raise RuntimeError(
+                "The component TransformersSimilarityRanker wasn't warmed up. Run 'warm_up()' before calling 'run()'."
+            )
+        if not documents:
+            return {"documents": []}
+
+        scores = self.score_documents(query, documents)
+        ranked_docs = self.rank_documents(
+            documents,
+            scores,
+            top_k=top_k,
+            scale_score=scale_score,
+            calibration_factor=calibration_factor,
+            score_threshold=score_threshold,
+        )
+        return {"documents": ranked_docs}
+
+    @property
+    def model_version(self) -> str:
+        # backend / quantization에 따라 점수가 조금씩 다르므로 version에 포함
+        if self.backend == "onnx":
+            return f"{self.model_name_or_path}:onnx-{self.onnx_quantization or 'fp32'}"
+        return str(self.model_name_or_path)
+
+    def score_documents(self, query: str, documents: List[Document]) -> List[float]:
+        """query와 각 document pair의 raw logit 점수"""
+        return self.score_pairs(self.build_pairs(query, documents))
+
+    def score_documents_batch(
+        self, queries: List[str], document_lists: List[List[Document]]
+    ) -> List[List[float]]:
+        """여러 query의 pair를 한 번에 점수 계산해서 query별로 나눠서 반환"""
+        pairs = [
+            self.build_pairs(query, documents)
+            for query, documents in zip(queries, document_lists)
+        ]
+        return _split_scores(self.score_pairs(_flatten(pairs)), pairs)
+
+    def build_pairs(self, query: str, documents: List[Document]) -> List[List[str]]:
+        """cross-encoder 입력으로 들어갈 (query, document) 문자열 pair 목록"""
+        query_doc_pairs = []
+        for doc in documents:
+            meta_values_to_embed = [
+                str(doc.meta[key])
+                for key in self.meta_fields_to_embed
+                if key in doc.meta and doc.meta[key]
+            ]
+            text_to_embed = self.embedding_separator.join(
+                meta_values_to_embed + [doc.content or ""]
+            )
+            query_doc_pairs.append(
+                [self.query_prefix + query, self.document_prefix + text_to_embed]
+            )
+        return query_doc_pairs
+
+    def score_pairs(self, pairs: List[List[str]]) -> List[float]:
+        """
+        pair 목록의 raw logit 점수. batch_size 단위로 tokenize 해서 batch 내 최대 길이까지만 padding
+        """
+        if self.onnx_model is not None:
+            return self.onnx_model.score(pairs, batch_size=self.batch_size)
+
+        device = self.device.first_device.to_torch()
+        scores: List[float] = []
+        with torch.inference_mode():
+            for start in range(0, len(pairs), self.batch_size):
+                features = self.tokenizer(
+                    pairs[start : start + self.batch_size],
+                    padding=True,
+                    truncation=True,
+                    return_tensors="pt",
+                ).to(device)
+                logits = self.model(**features).logits.squeeze(dim=1)
+                scores.extend(logits.float().cpu().tolist())
+        return scores
+
+    def rank_documents(
+        self,
+        documents: List[Document],
+        scores: List[float],
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        calibration_factor: Optional[float] = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[Document]:
+        """raw 점수를 document에 기록하고 점수 순으로 top_k개 반환"""
+        top_k = top_k or self.top_k
+        scale_score = scale_score or self.scale_score
+        calibration_factor = calibration_factor or self.calibration_factor
+        score_threshold = score_threshold or self.score_threshold
+
+        if top_k <= 0:
+            raise ValueError(f"top_k must be > 0, but got {top_k}")
+        if scale_score and calibration_factor is None:
+            raise ValueError(
+                f"scale_score is True so calibration_factor must be provided, but got {calibration_factor}"
+            )
+
+        for doc, score in zip(documents, scores):
+            if scale_score:
+                score = 1 / (1 + math.exp(-score * calibration_factor))
+            doc.score = score
+
+        ranked_docs = sorted(documents, key=lambda doc: doc.score, reverse=True)
+        if score_threshold is not None:
+            ranked_docs = [doc for doc in ranked_docs if doc.score >= score_threshold]
+        return ranked_docs[:top_k]
 
 
 @log_on_init()
 class BgeReRankderService(RankerService):
-    def __init__(self, top_k: int = 100, device=None):
+    def __init__(
+        self,
+        top_k: int = 100,
+        device=None,
+        backend: str = "torch",
+        quantization: str = None,
+        threads: int = None,
+        onnx_dir: str = None,
+    ):
         super().__init__(
             model="BAAI/bge-reranker-v2-m3",
             top_k=top_k,
             device=device,
+            # 임의 초기화 없이 safetensors weight를 memory-map 해서 바로 load
+            model_kwargs={"low_cpu_mem_usage": True},
+        )
+        self.backend = backend
+        self.onnx_quantization = quantization
+        self.onnx_threads = threads
+        self.onnx_dir = onnx_dir or self.onnx_dir
+
+
+class _RerankRequest:
+    __slots__ = ("pairs", "future", "enqueued_at", "deadline")
+
+    def __init__(self, pairs: List[List[str]], max_wait: float):
+        self.pairs = pairs
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + max_wait
+
+
+@log_on_init()
+class RerankScheduler:
+    """
+    여러 요청의 (query, document) pair를 모아 길이별로 정렬한 batch로 점수를 계산하고
+    요청별로 다시 나눠주는 scheduler
+
+    - 대기 중인 pair가 max_batch_pairs 이상이거나 가장 오래 기다린 요청이 max_wait_ms를
+      넘기면 flush
+    - flush 할 때 pair를 길이순으로 정렬해서 ranker.batch_size 단위로 나누므로
+      batch 내 padding이 최소화됨
+    - event loop에서는 score_async로 thread를 점유하지 않고 기다릴 수 있고,
+      timeout 안에 점수가 나오지 않으면 요청을 queue에서 빼고 TimeoutError
+    """
+
+    def __init__(
+        self,
+        ranker: RankerService,
+        max_batch_pairs: int = 128,
+        max_wait_ms: float = 5.0,
+        timeout: Optional[float] = 30.0,
+    ):
+        """
+        :param timeout: 요청 하나가 점수를 기다리는 최대 시간(초) (None이면 제한 없음)
+        """
+        self.ranker = ranker
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._pending: List[_RerankRequest] = []
+        self._pending_pairs = 0
+        self._condition = threading.Condition()
+        self._worker = None
+        reranker_pending_pairs.set_function(lambda: self._pending_pairs)
+
+    def warm_up(self):
+        """모델 load 후 flush thread 시작 (startup에서 한 번 호출)"""
+        self.ranker.warm_up()
+        self._start_worker()
+
+    def _start_worker(self):
+        with self._condition:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._flush_loop, name="rerank-scheduler", daemon=True
+                )
+                self._worker.start()
+
+    def score(self, pairs: List[List[str]]) -> List[float]:
+        """pair 목록을 scheduler에 넣고 raw 점수가 나올 때까지 대기 (blocking)"""
+        if not pairs:
+            return []
+        request = self._enqueue(pairs)
+        try:
+            return request.future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            raise self._timed_out(request)
+
+    async def score_async(self, pairs: List[List[str]]) -> List[float]:
+        """pair 목록을 scheduler에 넣고 event loop에서 점수를 await"""
+        if not pairs:
+            return []
+        request = self._enqueue(pairs)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(request.future), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise self._timed_out(request)
+
+    def _enqueue(self, pairs: List[List[str]]) -> _RerankRequest:
+        if self._worker is None:
+            self._start_worker()
+        request = _RerankRequest(pairs, self.max_wait)
+        with self._condition:
+            self._pending.append(request)
+            self._pending_pairs += len(pairs)
+            self._condition.notify()
+        return request
+
+    def _timed_out(self, request: _RerankRequest) -> TimeoutError:
+        """아직 flush 되지 않은 요청은 queue에서 제거 (기다리는 요청이 없는 pair는 계산하지 않음)"""
+        with self._condition:
+            if request in self._pending:
+                self._pending.remove(request)
+                self._pending_pairs -= len(request.pairs)
+        request.future.cancel()
+        return TimeoutError(f"Rerank did not finish within {self.timeout}s")
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # pair가 충분히 모이거나 가장 오래된 요청의 대기 한도가 될 때까지 대기
+                # (기다리는 동안 timeout으로 모든 요청이 빠지면 다시 대기)
+                while self._pending and self._pending_pairs < self.max_batch_pairs:
+                    remaining = self._pending[0].deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(timeout=remaining)
+                requests = self._take_requests()
+            self._run_flush(requests)
+
+    def _take_requests(self) -> List[_RerankRequest]:
+        """max_batch_pairs 안에서 도착 순서대로 요청을 꺼냄 (최소 1개)"""
+        requests = []
+        taken_pairs = 0
+        while self._pending:
+            size = len(self._pending[0].pairs)
+            if requests and taken_pairs + size > self.max_batch_pairs:
+                break
+            requests.append(self._pending.pop(0))
+            taken_pairs += size
+        self._pending_pairs -= taken_pairs
+        return requests
+
+    def _run_flush(self, requests: List[_RerankRequest]):
+        # 꺼내는 사이 timeout으로 취소된 요청은 제외
+        requests = [
+            request
+            for request in requests
+            if request.future.set_running_or_notify_cancel()
+        ]
+        if not requests:
+            return
+        started = time.monotonic()
+        for request in requests:
+            reranker_queue_wait_seconds.observe(started - request.enqueued_at)
+
+        # (요청 번호, pair 번호, pair) 를 길이순으로 정렬해서 batch 구성
+        flat = [
+            (request_index, pair_index, pair)
+            for request_index, request in enumerate(requests)
+            for pair_index, pair in enumerate(request.pairs)
+        ]
+        flat.sort(key=lambda item: len(item[2][0]) + len(item[2][1]))
+        reranker_batch_pairs.observe(len(flat))
+        reranker_requests_per_flush.observe(len(requests))
+
+        try:
+            flat_scores = self.ranker.score_pairs([pair for _, _, pair in flat])
+        except Exception as e:
+            logger.exception(f"Rerank flush failed for {len(requests)} requests")
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        results = [[0.0] * len(request.pairs) for request in requests]
+        for (request_index, pair_index, _), score in zip(flat, flat_scores):
+            results[request_index][pair_index] = score
+        for request, scores in zip(requests, results):
+            request.future.set_result(scores)
+
+
+@log_on_init()
+@component
+class RankerView:
+    """
+    공유된 reranker 모델 하나를 service마다 자기 top_k로 사용하는 가벼운 ranker component
+    (모델 weight는 view끼리 공유하고 warm_up도 모델당 한 번만 실행됨)
+    """
+
+    def __init__(self, ranker: RankerService, top_k: int = 10):
+        self.ranker = ranker
+        self.top_k = top_k
+
+    def warm_up(self):
+        self.ranker.warm_up()
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query: str,
+        documents: List[Document],
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        calibration_factor: Optional[float] = None,
+        score_threshold: Optional[float] = None,
+    ):
+        if not documents:
+            return {"documents": []}
+
+        scores = self.score_documents(query, documents)
+        ranked_docs = self.rank_documents(
+            documents,
+            scores,
+            top_k=top_k,
+            scale_score=scale_score,
+            calibration_factor=calibration_factor,
+            score_threshold=score_threshold,
+        )
+        return {"documents": ranked_docs}
+
+    @property
+    def model_version(self) -> str:
+        return self.ranker.model_version
+
+    def score_documents(self, query: str, documents: List[Document]) -> List[float]:
+        """query와 각 document pair의 raw logit 점수"""
+        return self.score_pairs(self.ranker.build_pairs(query, documents))
+
+    def score_documents_batch(
+        self, queries: List[str], document_lists: List[List[Document]]
+    ) -> List[List[float]]:
+        """여러 query의 pair를 한 번에 점수 계산해서 query별로 나눠서 반환"""
+        pairs = [
+            self.ranker.build_pairs(query, documents)
+            for query, documents in zip(queries, document_lists)
+        ]
+        return _split_scores(self.score_pairs(_flatten(pairs)), pairs)
+
+    def score_pairs(self, pairs: List[List[str]]) -> List[float]:
+        return self.ranker.score_pairs(pairs)
+
+    def rank_documents(
+        self, documents: List[Document], scores: List[float], top_k=None, **kwargs
+    ) -> List[Document]:
+        return self.ranker.rank_documents(
+            documents, scores, top_k=top_k or self.top_k, **kwargs
+        )
+
+
+@log_on_init()
+@component
+class BatchingRanker(RankerView):
+    """
+    RerankScheduler를 공유하면서 service마다 자기 top_k를 가지는 ranker component
+    """
+
+    def __init__(self, scheduler: RerankScheduler, top_k: int = 10):
+        # @component가 class를 다시 만들기 때문에 super() 대신 명시적으로 호출
+        RankerView.__init__(self, scheduler.ranker, top_k=top_k)
+        self.scheduler = scheduler
+
+    def warm_up(self):
+        self.scheduler.warm_up()
+
+    def score_pairs(self, pairs: List[List[str]]) -> List[float]:
+        """scheduler를 거쳐 다른 요청의 pair와 같은 batch로 점수 계산"""
+        return self.scheduler.score(pairs)
+
+    async def score_documents_async(
+        self, query: str, documents: List[Document]
+    ) -> List[float]:
+        """score_documents와 같지만 event loop에서 thread를 점유하지 않고 대기"""
+        return await self.scheduler.score_async(
+            self.ranker.build_pairs(query, documents)
         )
+
+
+@log_on_init()
+@component
+class CachedPairRanker:
+    """
+    (source 문서 id, 후보 문서 id, 모델 version) 단위로 cross-encoder raw 점수를 cache 하는 ranker
+
+    /correlations 처럼 query가 source 문서의 content로 고정되는 경우, 같은 pair는 다시 계산하지
+    않고 처음 보는 pair만 ranker로 점수를 계산한다. source_id 없이 호출하면 cache를 사용하지 않음
+    """
+
+    def __init__(
+        self,
+        ranker: Union[RankerService, BatchingRanker],
+        cache: LRUCache,
+        model_version: Optional[str] = None,
+    ):
+        self.ranker = ranker
+        self.cache = cache
+        self.model_version = model_version or ranker.model_version
+
+    def warm_up(self):
+        self.ranker.warm_up()
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query: str,
+        documents: List[Document],
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        calibration_factor: Optional[float] = None,
+        score_threshold: Optional[float] = None,
+        source_id: Optional[str] = None,
+    ):
+        if source_id is None:
+            return self.ranker.run(
+                query=query,
+                documents=documents,
+                top_k=top_k,
+                scale_score=scale_score,
+                calibration_factor=calibration_factor,
+                score_threshold=score_threshold,
+            )
+        if not documents:
+            return {"documents": []}
+
+        scores = self.score_documents_batch([query], [documents], [source_id])[0]
+        ranked_docs = self.rank_documents(
+            documents,
+            scores,
+            top_k=top_k,
+            scale_score=scale_score,
+            calibration_factor=calibration_factor,
+            score_threshold=score_threshold,
+        )
+        return {"documents": ranked_docs}
+
+    def score_documents_batch(
+        self,
+        queries: List[str],
+        document_lists: List[List[Document]],
+        source_ids: List[str],
+    ) -> List[List[float]]:
+        """
+        source별 cache에 없는 pair만 모아서 ranker.score_documents_batch 한 번으로 계산
+        """
+        keys = [
+            [(source_id, doc.id, self.model_version) for doc in documents]
+            for source_id, documents in zip(source_ids, document_lists)
+        ]
+        scores = [[self.cache.get(key) for key in query_keys] for query_keys in keys]
+
+        missing = [
+            [i for i, score in enumerate(query_scores) if score is None]
+            for query_scores in scores
+        ]
+        positions = [q for q, query_missing in enumerate(missing) if query_missing]
+        if positions:
+            new_scores = self.ranker.score_documents_batch(
+                [queries[q] for q in positions],
+                [[document_lists[q][i] for i in missing[q]] for q in positions],
+            )
+            for q, query_scores in zip(positions, new_scores):
+                for i, score in zip(missing[q], query_scores):
+                    scores[q][i] = score
+                    self.cache.set(keys[q][i], score)
+        return scores
+
+    def rank_documents(
+        self, documents: List[Document], scores: List[float], top_k=None, **kwargs
+    ) -> List[Document]:
+        return self.ranker.rank_documents(
+            documents, scores, top_k=top_k or self.ranker.top_k, **kwargs
+        )
+
+
+@log_on_init()
+@component
+class CascadeRanker:
+    """
+    1단계(retrieval) fused score 순으로 정렬된 후보를 앞에서부터 step개씩 rerank 하다가
+    남은 후보가 최종 top_k에 들어올 가능성이 없으면 중단하는 ranker
+
+    - 현재 rerank 상위 top_k 문서 중 가장 낮은 fused score에서 margin을 뺀 값보다
+      다음 후보의 fused score가 낮으면 (후보는 fused score 순이므로 남은 후보 전체가) 중단
+    - reranker가 fused score가 낮은 문서를 top_k로 끌어올리면 기준도 낮아져서 더 깊이 rerank
+    - rerank 되지 않은 후보는 rerank 결과 뒤에 fused score 순서대로 붙여서 반환
+    """
+
+    def __init__(
+        self,
+        ranker: Union[RankerService, BatchingRanker],
+        top_k: int = 10,
+        step: int = 8,
+        margin: float = 0.1,
+    ):
+        """
+        :param top_k: rerank 순서를 보장할 상위 결과 수 (반환 개수는 ranker.top_k)
+        :param step: 한 번에 rerank 할 후보 수
+        :param margin: 중단 기준 fused score margin (fused score는 0 ~ 1)
+        """
+        self.ranker = ranker
+        self.top_k = top_k
+        self.step = step
+        self.margin = margin
+
+    def warm_up(self):
+        self.ranker.warm_up()
+
+    @component.output_types(documents=List[Document])
+    def run(self, query: str, documents: List[Document], top_k: Optional[int] = None):
+        """
+        :param documents: fused score(doc.score) 내림차순으로 정렬된 후보
+        """
+        if not documents:
+            return {"documents": []}
+        top_k = top_k or self.top_k
+        fused = [doc.score or 0.0 for doc in documents]
+
+        depth = min(len(documents), max(top_k, self.step))
+        scores = self.ranker.score_documents(query, documents[:depth])
+        while depth < len(documents):
+            head = sorted(range(depth), key=lambda i: scores[i], reverse=True)[:top_k]
+            if fused[depth] < min(fused[i] for i in head) - self.margin:
+                break
+            batch = documents[depth : depth + self.step]
+            scores.extend(self.ranker.score_documents(query, batch))
+            depth += len(batch)
+
+        rerank_depth.observe(depth)
+        rerank_skipped_pairs.inc(len(documents) - depth)
+
+        ranked_docs = self.ranker.rank_documents(documents[:depth], scores, top_k=depth)
+        # rerank 되지 않은 후보는 rerank 최저 점수 아래로 fused 순서를 유지
+        lowest = ranked_docs[-1].score if ranked_docs else min(scores)
+        tail = documents[depth:]
+        for position, doc in enumerate(tail, start=1):
+            doc.score = lowest - position * 1e-3
+        return {"documents": (ranked_docs + tail)[: self.ranker.top_k]}
@@ -0,0 +1,190 @@
+import secrets
+import threading
+import time
+from typing import Hashable, List, Optional, Tuple
+
+from models.document import DocumentResponse
+from repositories.document_store import OpenSearchDocumentStore
+from utils.cache import LRUCache, estimate_size
+from utils.logger import logger
+
+
+class IndexGenerationTracker:
+    """
+    background thread에서 주기적으로 index generation(문서 수, ETL version)을 확인
+    요청 경로에서는 마지막으로 확인한 값만 읽으므로 OpenSearch 호출이 없다.
+    """
+
+    def __init__(
+        self, document_store: OpenSearchDocumentStore, check_interval: float = 30.0
+    ):
+        self._document_store = document_store
+        self.check_interval = check_interval
+        self.generation: Optional[tuple] = None
+        self._listeners = []
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback) -> None:
+        """generation이 바뀌었을 때 호출할 callback 등록"""
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._poll_loop, name="index-generation", daemon=True
+                )
+                self._worker.start()
+
+    def refresh(self) -> None:
+        try:
+            generation = self._document_store.get_index_generation()
+        except Exception as e:
+            logger.warning(f"Failed to read index generation: {e}")
+            return
+
+        if generation != self.generation:
+            if self.generation is not None:
+                logger.info(
+                    f"Index generation changed: {self.generation} -> {generation}"
+                )
+            self.generation = generation
+            for callback in self._listeners:
+                callback(generation)
+
+    def _poll_loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.check_interval)
+
+
+def _estimate_response_size(value) -> int:
+    if isinstance(value, list) and value and isinstance(value[0], DocumentResponse):
+        return estimate_size([doc.model_dump() for doc in value])
+    return estimate_size(value)
+
+
+class ResponseCache:
+    """
+    /search, /correlations 의 최종 응답(DocumentResponse list) cache
+
+    key에 index generation을 포함하고, generation이 바뀌면 전체를 비워서
+    ETL로 index가 갱신된 뒤 예전 결과가 나가지 않도록 한다.
+    """
+
+    def __init__(
+        self,
+        tracker: IndexGenerationTracker,
+        max_bytes: int = 128 * 1024 * 1024,
+        ttl: Optional[float] = None,
+    ):
+        self._cache = LRUCache(
+            name="response",
+            max_bytes=max_bytes,
+            ttl=ttl,
+            sizeof=_estimate_response_size,
+        )
+        self._tracker = tracker
+        self._tracker.add_listener(lambda generation: self._cache.clear())
+        # index 밖의 응답 source(연관 논문 table 등)가 바뀔 때마다 증가
+        self._epoch = 0
+
+    @staticmethod
+    def make_key(endpoint: str, **params) -> tuple:
+        """
+        요청 파라미터로 만든 cache key (리스트 파라미터는 순서 무관하도록 정렬)
+        """
+        normalized = []
+        for name in sorted(params):
+            value = params[name]
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(sorted(value))
+            normalized.append((name, value))
+        return (endpoint, tuple(normalized))
+
+    def bind(self, key: Hashable) -> Optional[tuple]:
+        """
+        요청 key에 현재 index generation을 붙인 cache key
+        결과를 계산하기 전에 만들어서 get / set에 같은 key를 넘긴다
+        (index 상태를 모르는 동안에는 None을 반환해서 cache를 사용하지 않음)
+        """
+        self._tracker.start()
+        generation = self._tracker.generation
+        if generation is None:
+            return None
+        return ((generation, self._epoch), key)
+
+    def get(self, key: tuple) -> Optional[List[DocumentResponse]]:
+        """:param key: bind()로 만든 cache key"""
+        return self._cache.get(key)
+
+    def set(self, key: tuple, documents: List[DocumentResponse]) -> None:
+        """
+        :param key: 결과를 계산하기 전에 bind()로 만든 cache key
+        계산하는 동안 generation이 바뀌었거나 invalidate 되었으면 예전 상태로 계산한 결과이므로
+        저장하지 않음
+        """
+        generation, _ = key
+        if generation == (self._tracker.generation, self._epoch):
+            self._cache.set(key, documents)
+
+    def invalidate(self) -> None:
+        """
+        index generation과 별개로 응답이 바뀌었을 때 (예: 연관 논문 table 교체) 전체를 비움
+        이미 계산 중인 요청의 결과도 저장되지 않도록 epoch을 함께 올림
+        """
+        self._epoch += 1
+        self._cache.clear()
+        logger.info("Response cache invalidated")
+
+
+class CursorError(ValueError):
+    """형식이 잘못되었거나 만료된 pagination cursor"""
+
+
+class SearchResultSets:
+    """
+    pagination용 검색 결과 목록을 짧은 시간 동안 보관하는 cache
+
+    첫 page 요청에서 rerank 된 전체 결과를 저장하고 cursor(결과 id + offset)를 발급해서
+    다음 page는 embedding / rerank 없이 메모리에서 바로 반환한다.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 600):
+        self._cache = LRUCache(
+            name="search_result_set",
+            max_bytes=max_bytes,
+            ttl=ttl,
+            sizeof=_estimate_response_size,
+        )
+
+    @staticmethod
+    def _cursor(result_id: str, offset: int) -> str:
+        return f"{result_id}.{offset}"
+
+    def first_page(
+        self, documents: List[DocumentResponse], page_size: int
+    ) -> Tuple[List[DocumentResponse], Optional[str]]:
+        """첫 page와 다음 page cursor (다음 page가 없으면 None)"""
+        if len(documents) <= page_size:
+            return documents, None
+        result_id = secrets.token_urlsafe(12)
+        self._cache.set(result_id, documents)
+        return documents[:page_size], self._cursor(result_id, page_size)
+
+    def page(
+        self, cursor: str, page_size: int
+    ) -> Tuple[List[DocumentResponse], Optional[str]]:
+        """cursor 위치부터 page_size개와 다음 page cursor"""
+        result_id, _, offset = cursor.rpartition(".")
+        if not result_id or not offset.isdigit():
+            raise CursorError(f"Invalid cursor: {cursor}")
+        documents = self._cache.get(result_id)
+        if documents is None:
+            raise CursorError("Cursor expired")
+
+        start = int(offset)
+        end = start + page_size
+        next_cursor = self._cursor(result_id, end) if end < len(documents) else None
+        return documents[start:end], next_cursor
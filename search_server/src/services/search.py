@@ -1,52 +1,142 @@
 import asyncio
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
 from haystack import Document, Pipeline
-from haystack.components.joiners import DocumentJoiner
-from haystack_integrations.components.retrievers.opensearch import (
-    OpenSearchBM25Retriever,
-    OpenSearchEmbeddingRetriever,
-)
-from models.document import DocumentResponse
+from models.document import RESPONSE_SOURCE_FIELDS, DocumentResponse
 from repositories.document_store import OpenSearchDocumentStore
-from services.embedding import EmbeddingService
-from services.ranker import RankerService
+from repositories.retrievers import ProjectedBM25Retriever, ProjectedEmbeddingRetriever
+from services.embedding import (
+    BatchingTextEmbedder,
+    CachedTextEmbedder,
+    EmbeddingService,
+)
+from services.fusion import FusionJoiner
+from services.ranker import BatchingRanker, CascadeRanker, RankerService
+from services.response_cache import ResponseCache, SearchResultSets
+from utils.cache import normalize_query
+from utils.executor import InferenceExecutor
 from utils.filter import get_filters
 from utils.logger import log_on_init
+from utils.singleflight import SingleFlight
+from utils.tracing import run_component, trace_pipeline, trace_stage
+
+RETRIEVAL_MODES = ("pipeline", "parallel", "async")
+RERANK_MODES = ("full", "cascade")
 
 
 @log_on_init()
 class SearchService:
+    executor_target = "search_service"  # InferenceExecutor에 등록되는 이름
+
     def __init__(
         self,
         document_store: OpenSearchDocumentStore,
-        ranker: RankerService,
-        text_embedder: EmbeddingService,
+        ranker: Union[RankerService, BatchingRanker],
+        text_embedder: Union[
+            EmbeddingService, BatchingTextEmbedder, CachedTextEmbedder
+        ],
+        executor: InferenceExecutor,
         top_k=10,
+        retrieval_mode: str = "parallel",
+        retrieval_workers: int = 4,
+        response_cache: Optional[ResponseCache] = None,
+        rerank_mode: str = "full",
+        cascade_ranker: Optional[CascadeRanker] = None,
+        document_joiner: Optional[FusionJoiner] = None,
+        result_sets: Optional[SearchResultSets] = None,
+        pagination_depth: Optional[int] = None,
     ):
-        embedding_retriever = OpenSearchEmbeddingRetriever(
+        """
+        :param executor: blocking 추론을 실행하는 executor (생성한 쪽에서 shutdown)
+        :param retrieval_mode:
+            - pipeline: haystack Pipeline으로 embed -> kNN -> BM25 -> join -> rerank를 순차 실행
+              (embedding을 worker thread에서 기다리므로 embedding batch는 worker 수보다 커지지 않음)
+            - parallel: query embedding 계산과 BM25 요청을 동시에 실행한 뒤 kNN 결과와 join
+              (thread 모드에서는 query embedding을 event loop에서 먼저 계산해서 batch로 모음)
+            - async: parallel과 같은 순서로 실행하되 BM25 / kNN 요청은 document store의
+              async client로 event loop에서 보냄 (검색 대기 중 thread를 점유하지 않음)
+        :param retrieval_workers: parallel 모드에서 BM25 요청을 보내는 thread 수
+        :param response_cache: 같은 검색어/필터의 최종 결과를 재사용하기 위한 cache
+        :param rerank_mode:
+            - full: join 된 후보 전체를 rerank
+            - cascade: joiner가 합친 순서대로 필요한 만큼만 rerank
+        :param cascade_ranker: cascade 모드에서 사용할 ranker (없으면 ranker로 기본값 생성)
+        :param document_joiner: BM25 / kNN 결과를 합치고 rerank 후보 수를 제한하는 joiner
+            (없으면 중복 제거만 하는 RRF joiner)
+        :param result_sets: cursor pagination에서 다음 page를 위해 결과를 보관하는 cache
+        :param pagination_depth: cursor로 넘겨볼 수 있는 최대 결과 수. page 요청은 retriever /
+            joiner / reranker를 이 깊이까지 늘려서 검색 (없으면 일반 검색 결과만 page로 나눔)
+        """
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode: {retrieval_mode} (expected {RETRIEVAL_MODES})"
+            )
+        if rerank_mode not in RERANK_MODES:
+            raise ValueError(
+                f"Unknown rerank mode: {rerank_mode} (expected {RERANK_MODES})"
+            )
+
+        # 검색 결과에는 embedding이 필요 없으므로 rerank와 응답에 쓰는 field만 가져옴
+        embedding_retriever = ProjectedEmbeddingRetriever(
             document_store=document_store,
             top_k=top_k,
+            source_fields=RESPONSE_SOURCE_FIELDS,
         )
-        bm25_retriever = OpenSearchBM25Retriever(
+        bm25_retriever = ProjectedBM25Retriever(
             document_store=document_store,
             top_k=top_k,
+            source_fields=RESPONSE_SOURCE_FIELDS,
         )
-        document_joiner = DocumentJoiner()
+        document_joiner = document_joiner or FusionJoiner()
+        cascade_ranker = cascade_ranker or CascadeRanker(ranker)
 
-        self.hybrid_retrieval = Pipeline()
+        self.hybrid_retrieval = Pipeline(metadata={"name": "search"})
         self.hybrid_retrieval.add_component("text_embedder", text_embedder)
         self.hybrid_retrieval.add_component("embedding_retriever", embedding_retriever)
         self.hybrid_retrieval.add_component("bm25_retriever", bm25_retriever)
         self.hybrid_retrieval.add_component("document_joiner", document_joiner)
-        self.hybrid_retrieval.add_component("ranker", ranker)
+        self.hybrid_retrieval.add_component(
+            "ranker", cascade_ranker if rerank_mode == "cascade" else ranker
+        )
 
         self.hybrid_retrieval.connect("text_embedder", "embedding_retriever")
         self.hybrid_retrieval.connect("bm25_retriever", "document_joiner")
         self.hybrid_retrieval.connect("embedding_retriever", "document_joiner")
         self.hybrid_retrieval.connect("document_joiner", "ranker")
 
-        self.hybrid_retrieval.warm_up()  # lazy loading 방지 (model download, db connection ...)
+        # parallel 모드에서 pipeline을 거치지 않고 직접 실행할 component
+        self.text_embedder = text_embedder
+        self.embedding_retriever = embedding_retriever
+        self.bm25_retriever = bm25_retriever
+        self.document_joiner = document_joiner
+        self.ranker = ranker
+        self.retrieval_mode = retrieval_mode
+        self.rerank_mode = rerank_mode
+        self.cascade_ranker = cascade_ranker
+        self._retrieval_pool = ThreadPoolExecutor(
+            max_workers=retrieval_workers, thread_name_prefix="bm25"
+        )
+        self._response_cache = response_cache
+        self._document_store = document_store
+        self._result_sets = result_sets or SearchResultSets()
+        self.pagination_depth = pagination_depth
+        self._in_flight = SingleFlight("search")
+
+        # blocking pipeline 실행을 event loop 밖으로 보내기 위한 executor
+        self._executor = executor
+        self._executor.register(self.executor_target, self)
+
+    def warm_up(self) -> None:
+        """
+        lazy loading 방지 (model download, db connection ...)
+        추론을 실행하는 process(thread 모드 API process, process 모드 worker)에서만 호출
+        """
+        self.hybrid_retrieval.warm_up()
+
+    async def close_async(self) -> None:
+        """document store의 async connection pool 종료"""
+        await self._document_store.close_async()
 
     def _truncate_query(self, query: str, max_length: int = 60) -> str:
         if len(query) <= max_length:
@@ -55,11 +145,42 @@ class SearchService:
         truncated_query = query[:max_length].rsplit(" ", 1)[0]
         return truncated_query
 
+    @staticmethod
+    def _request_key(
+        query_sentence: str, depth: Optional[int] = None, **kwargs
+    ) -> tuple:
+        """정규화된 검색어 / 필터 / 검색 깊이로 만든 요청 key (response cache, single-flight 공용)"""
+        return ResponseCache.make_key(
+            "search",
+            query=normalize_query(query_sentence),
+            filter_categories=kwargs.get("filter_categories") or (),
+            filter_start_date=kwargs.get("filter_start_date"),
+            filter_end_date=kwargs.get("filter_end_date"),
+            depth=depth,
+        )
+
+    def _cache_key(
+        self, query_sentence: str, depth: Optional[int] = None, **kwargs
+    ) -> Optional[tuple]:
+        if self._response_cache is None:
+            return None
+        return self._response_cache.bind(
+            self._request_key(query_sentence, depth, **kwargs)
+        )
+
     async def query(
         self,
         query_sentence: str,
         **kwargs,
     ) -> List[DocumentResponse]:
+        return await self._search(query_sentence, None, **kwargs)
+
+    async def _search(
+        self, query_sentence: str, depth: Optional[int], **kwargs
+    ) -> List[DocumentResponse]:
+        """
+        :param depth: retriever / joiner / reranker가 반환할 결과 수 (없으면 service 기본값)
+        """
         filter_categoreis = kwargs.get("filter_categories")
         filter_start_date = kwargs.get("filter_start_date")
         filter_end_date = kwargs.get("filter_end_date")
@@ -68,8 +189,416 @@ class SearchService:
 
         # query_sentence = self._truncate_query(query_sentence)
 
-        # loop = asyncio.get_event_loop()
-        result = self.hybrid_retrieval.run(
+        cache_key = self._cache_key(query_sentence, depth, **kwargs)
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # 같은 검색이 이미 실행 중이면 새로 실행하지 않고 그 결과를 함께 사용
+        return await self._in_flight.run(
+            self._request_key(query_sentence, depth, **kwargs),
+            lambda: self._run_query(query_sentence, filters, cache_key, depth),
+        )
+
+    async def _run_query(
+        self,
+        query_sentence: str,
+        filters,
+        cache_key: Optional[tuple],
+        depth: Optional[int] = None,
+    ) -> List[DocumentResponse]:
+        if self.retrieval_mode == "pipeline" and depth is None:
+            documents = await self._executor.call(
+                self.executor_target, "_query", query_sentence, filters
+            )
+        else:
+            with trace_pipeline("search"):
+                candidates = await self._retrieve(query_sentence, filters, depth)
+                documents = await self._rerank_async(query_sentence, candidates, depth)
+        if cache_key is not None:
+            self._response_cache.set(cache_key, documents)
+        return documents
+
+    async def query_batch(self, requests: List[dict]) -> List[List[DocumentResponse]]:
+        """
+        여러 검색 요청을 한 번에 처리해서 입력 순서대로 결과 반환
+        :param requests: query, filter_categories, filter_start_date, filter_end_date dict 목록
+        """
+        results: List[Optional[List[DocumentResponse]]] = [None] * len(requests)
+        cache_keys = [
+            self._cache_key(request["query"], **request) for request in requests
+        ]
+        pending = []
+        for position, (request, cache_key) in enumerate(zip(requests, cache_keys)):
+            if cache_key is not None:
+                results[position] = self._response_cache.get(cache_key)
+            if results[position] is None:
+                pending.append(position)
+
+        if pending:
+            queries = [requests[position]["query"] for position in pending]
+            filters = [
+                get_filters(
+                    requests[position].get("filter_categories"),
+                    requests[position].get("filter_start_date"),
+                    requests[position].get("filter_end_date"),
+                )
+                for position in pending
+            ]
+            documents = await self._executor.call(
+                self.executor_target, "_query_batch", queries, filters
+            )
+            for position, query_documents in zip(pending, documents):
+                results[position] = query_documents
+                if cache_keys[position] is not None:
+                    self._response_cache.set(cache_keys[position], query_documents)
+        return results
+
+    async def query_page(
+        self, query_sentence: str, page_size: int, **kwargs
+    ) -> Tuple[List[DocumentResponse], Optional[str]]:
+        """
+        검색 결과의 첫 page와 다음 page cursor (다음 page가 없으면 None)
+        pagination_depth까지 rerank 한 결과를 보관해서 다음 page는 일반 검색 결과 뒤의 문서도 반환
+        """
+        documents = await self._search(query_sentence, self.pagination_depth, **kwargs)
+        return self._result_sets.first_page(documents, page_size)
+
+    def next_page(
+        self, cursor: str, page_size: int
+    ) -> Tuple[List[DocumentResponse], Optional[str]]:
+        """
+        query_page에서 발급한 cursor의 다음 page (재계산 없이 저장된 결과에서 반환)
+        만료되었거나 잘못된 cursor면 CursorError
+        """
+        return self._result_sets.page(cursor, page_size)
+
+    async def stream(
+        self,
+        query_sentence: str,
+        **kwargs,
+    ) -> AsyncIterator[Tuple[str, List[DocumentResponse]]]:
+        """
+        검색 결과를 단계별로 (stage, 결과) 반환
+            - retrieved: BM25 / kNN 결과를 joiner로 합친 rerank 전 후보 (weight는 fused score)
+            - reranked: query()와 같은 최종 결과
+        cache된 결과가 있으면 reranked만 반환. pipeline 모드에서는 parallel 방식으로 검색
+        """
+        filters = get_filters(
+            kwargs.get("filter_categories"),
+            kwargs.get("filter_start_date"),
+            kwargs.get("filter_end_date"),
+        )
+        cache_key = self._cache_key(query_sentence, **kwargs)
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                yield "reranked", cached
+                return
+
+        candidates = await self._retrieve(query_sentence, filters)
+        yield "retrieved", self._to_responses(candidates)
+
+        documents = await self._rerank_async(query_sentence, candidates)
+        if cache_key is not None:
+            self._response_cache.set(cache_key, documents)
+        yield "reranked", documents
+
+    @property
+    def _embeds_on_loop(self) -> bool:
+        """
+        thread 모드에서는 query embedding을 event loop에서 batching embedder에 직접 요청
+        (추론 worker thread를 점유한 채 기다리지 않으므로 동시 요청이 한 batch로 모임)
+        """
+        return self._executor.mode == "thread" and hasattr(
+            self.text_embedder, "embed_async"
+        )
+
+    async def _embed_query(self, query_sentence: str) -> List[float]:
+        if not self._embeds_on_loop:
+            return await self._executor.call(
+                self.executor_target, "_embed", query_sentence
+            )
+        with trace_stage("search", "text_embedder"):
+            return await self.text_embedder.embed_async(query_sentence)
+
+    async def _retrieve(
+        self, query_sentence: str, filters, depth: Optional[int] = None
+    ) -> List[Document]:
+        """rerank 전 후보 검색 (async 모드가 아니면 parallel 방식)"""
+        if self.retrieval_mode == "async":
+            return await self._async_retrieve(query_sentence, filters, depth)
+
+        if not self._embeds_on_loop:
+            # embedding을 event loop에서 계산할 수 없으면 worker에서 BM25 요청과 겹쳐서 계산
+            return await self._executor.call(
+                self.executor_target,
+                "_parallel_retrieve",
+                query_sentence,
+                filters,
+                None,
+                depth,
+            )
+
+        # BM25 요청을 먼저 보내두고 event loop에서 batching embedder의 결과를 기다림
+        bm25_future = self._submit_bm25(query_sentence, filters, depth)
+        try:
+            embedding = await self._embed_query(query_sentence)
+        except BaseException:
+            bm25_future.cancel()  # 아직 시작 전이라면 BM25 요청 취소
+            raise
+        return await self._executor.call(
+            self.executor_target,
+            "_parallel_retrieve",
+            query_sentence,
+            filters,
+            embedding,
+            depth,
+            bm25_future,
+        )
+
+    @property
+    def _ranks_on_loop(self) -> bool:
+        """thread 모드에서는 full rerank를 event loop에서 rerank scheduler의 결과를 await"""
+        return self._executor.mode == "thread" and hasattr(
+            self.ranker, "score_documents_async"
+        )
+
+    async def _rerank_async(
+        self,
+        query_sentence: str,
+        candidates: List[Document],
+        top_k: Optional[int] = None,
+    ) -> List[DocumentResponse]:
+        # cascade 모드는 점수를 보고 다음 후보를 정하므로 worker에서 실행
+        cascade = self.rerank_mode == "cascade" and top_k is None
+        if cascade or not self._ranks_on_loop:
+            return await self._executor.call(
+                self.executor_target, "_rerank", query_sentence, candidates, top_k
+            )
+        if not candidates:
+            return []
+        with trace_stage("search", "ranker") as span:
+            scores = await self.ranker.score_documents_async(query_sentence, candidates)
+            ranked = self.ranker.rank_documents(candidates, scores, top_k=top_k)
+            span.set_content_tag("haystack.component.output", {"documents": ranked})
+        return self._to_responses(ranked)
+
+    async def _async_retrieve(
+        self, query_sentence: str, filters, depth: Optional[int] = None
+    ) -> List[Document]:
+        """
+        BM25 요청을 먼저 보내고, 그동안 executor에서 query embedding을 계산해서 kNN 요청
+        검색 요청은 모두 async client로 보내고 두 결과를 joiner로 합친 rerank 후보 반환
+        """
+        bm25_task = asyncio.ensure_future(
+            self._traced_retrieve(
+                "bm25_retriever",
+                self.bm25_retriever,
+                query=query_sentence,
+                filters=filters,
+                top_k=depth,
+            )
+        )
+        try:
+            embedding = await self._embed_query(query_sentence)
+            embedding_documents = await self._traced_retrieve(
+                "embedding_retriever",
+                self.embedding_retriever,
+                query_embedding=embedding,
+                filters=filters,
+                top_k=depth,
+            )
+        except Exception:
+            bm25_task.cancel()
+            raise
+        bm25_documents = await bm25_task
+
+        joined = run_component(
+            "search",
+            "document_joiner",
+            self.document_joiner,
+            documents=[bm25_documents, embedding_documents],
+            top_k=depth,
+        )
+        return joined["documents"]
+
+    @staticmethod
+    async def _traced_retrieve(name: str, retriever, **inputs) -> List[Document]:
+        with trace_stage("search", name) as span:
+            result = await retriever.run_async(**inputs)
+            span.set_content_tag("haystack.component.output", result)
+        return result["documents"]
+
+    def _embed(self, query_sentence: str) -> List[float]:
+        """inference executor의 worker에서 실행되는 query embedding"""
+        return run_component(
+            "search", "text_embedder", self.text_embedder, text=query_sentence
+        )["embedding"]
+
+    def _query(self, query_sentence: str, filters) -> List[DocumentResponse]:
+        """
+        inference executor의 worker에서 실행되는 blocking 검색 pipeline (pipeline 모드)
+        """
+        result = self._pipeline_retrieve(query_sentence, filters)
+        return self._to_responses(result["ranker"]["documents"])
+
+    def _query_batch(
+        self, queries: List[str], filters: list
+    ) -> List[List[DocumentResponse]]:
+        """
+        inference executor의 worker에서 실행되는 batch 검색
+            - query embedding을 한 번에 계산
+            - 모든 query의 BM25 / kNN 검색을 _msearch 한 번으로 실행
+            - 모든 query의 rerank pair를 한 번에 점수 계산 (cascade 모드는 query별로 rerank)
+        결과는 query()로 하나씩 검색한 결과와 같음
+        """
+        with trace_pipeline("search_batch"):
+            with trace_stage("search_batch", "text_embedder"):
+                embeddings = self.text_embedder.embed_batch(queries)
+            with trace_stage("search_batch", "multi_search"):
+                with self._document_store.collect_searches() as bodies:
+                    for query, embedding, query_filters in zip(
+                        queries, embeddings, filters
+                    ):
+                        self.bm25_retriever.run(query=query, filters=query_filters)
+                        self.embedding_retriever.run(
+                            query_embedding=embedding, filters=query_filters
+                        )
+                retrieved = self._document_store.multi_search(bodies)
+
+            candidates = []
+            for i in range(len(queries)):
+                bm25_documents, embedding_documents = retrieved[2 * i : 2 * i + 2]
+                joined = run_component(
+                    "search_batch",
+                    "document_joiner",
+                    self.document_joiner,
+                    documents=[
+                        self.bm25_retriever.scale_documents(bm25_documents),
+                        embedding_documents,
+                    ],
+                )
+                candidates.append(joined["documents"])
+            if self.rerank_mode == "cascade":
+                # cascade는 점수를 보고 다음 후보를 정하므로 한 번에 점수 계산할 수 없음
+                return [
+                    self._to_responses(
+                        run_component(
+                            "search_batch",
+                            "ranker",
+                            self.cascade_ranker,
+                            query=query,
+                            documents=documents,
+                        )["documents"]
+                    )
+                    for query, documents in zip(queries, candidates)
+                ]
+            with trace_stage("search_batch", "ranker"):
+                scores = self.ranker.score_documents_batch(queries, candidates)
+                return [
+                    self._to_responses(
+                        self.ranker.rank_documents(documents, query_scores)
+                    )
+                    for documents, query_scores in zip(candidates, scores)
+                ]
+
+    def _rerank(
+        self,
+        query_sentence: str,
+        candidates: List[Document],
+        top_k: Optional[int] = None,
+    ) -> List[DocumentResponse]:
+        """
+        :param top_k: 반환할 결과 수 (지정하면 cascade 모드에서도 후보 전체를 rerank)
+        """
+        if self.rerank_mode == "cascade" and top_k is None:
+            ranker = self.cascade_ranker
+            inputs = {}
+        else:
+            ranker = self.ranker
+            inputs = {"top_k": top_k}
+        results = run_component(
+            "search",
+            "ranker",
+            ranker,
+            query=query_sentence,
+            documents=candidates,
+            **inputs,
+        )["documents"]
+        return self._to_responses(results)
+
+    @staticmethod
+    def _to_responses(results: List[Document]) -> List[DocumentResponse]:
+        documents = []
+        for doc in results:
+            document = DocumentResponse(id=doc.id, meta=doc.meta, weight=doc.score)
+            documents.append(document)
+        return documents
+
+    def _submit_bm25(
+        self, query_sentence: str, filters, depth: Optional[int] = None
+    ) -> Future:
+        """BM25 요청을 retrieval pool에 보내고 결과 future 반환"""
+        return self._retrieval_pool.submit(
+            run_component,
+            "search",
+            "bm25_retriever",
+            self.bm25_retriever,
+            query=query_sentence,
+            filters=filters,
+            top_k=depth,
+        )
+
+    def _parallel_retrieve(
+        self,
+        query_sentence: str,
+        filters,
+        query_embedding: Optional[List[float]] = None,
+        depth: Optional[int] = None,
+        bm25_future: Optional[Future] = None,
+    ) -> List[Document]:
+        """
+        BM25 요청을 먼저 보내두고 그 사이 query embedding과 kNN 검색을 수행
+        (max(BM25, embed + kNN) 만큼만 기다리도록 OpenSearch 왕복 하나를 critical path에서 제거)
+        :param query_embedding: event loop에서 미리 계산한 query embedding (없으면 여기서 계산)
+        :param depth: retriever / joiner가 반환할 문서 수 (없으면 component 기본값)
+        :param bm25_future: embedding을 기다리기 전에 _submit_bm25로 보낸 BM25 요청
+            (thread 모드에서만 전달, 없으면 여기서 요청)
+        """
+        if bm25_future is None:
+            bm25_future = self._submit_bm25(query_sentence, filters, depth)
+        try:
+            embedding = query_embedding
+            if embedding is None:
+                embedding = run_component(
+                    "search", "text_embedder", self.text_embedder, text=query_sentence
+                )["embedding"]
+            embedding_documents = run_component(
+                "search",
+                "embedding_retriever",
+                self.embedding_retriever,
+                query_embedding=embedding,
+                filters=filters,
+                top_k=depth,
+            )["documents"]
+        except Exception:
+            bm25_future.cancel()  # 아직 시작 전이라면 BM25 요청 취소
+            raise
+        bm25_documents = bm25_future.result()["documents"]
+
+        joined = run_component(
+            "search",
+            "document_joiner",
+            self.document_joiner,
+            documents=[bm25_documents, embedding_documents],
+            top_k=depth,
+        )
+        return joined["documents"]
+
+    def _pipeline_retrieve(self, query_sentence: str, filters) -> dict:
+        return self.hybrid_retrieval.run(
             {
                 "text_embedder": {
                     "text": query_sentence,
@@ -84,10 +613,3 @@ class SearchService:
                 "ranker": {"query": query_sentence},
             }
         )
-
-        results: List[Document] = result["ranker"]["documents"]
-        documents = []
-        for doc in results:
-            document = DocumentResponse(id=doc.id, meta=doc.meta, weight=doc.score)
-            documents.append(document)
-        return documents
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+from starlette.requests import Request
+from utils.logger import log_on_init
+from utils.metrics import CallbackGauge
+
+admission_in_flight = CallbackGauge(
+    "admission_in_flight",
+    "Number of admitted requests currently running",
+    labelnames=("endpoint",),
+)
+admission_queued = CallbackGauge(
+    "admission_queued",
+    "Number of requests waiting for an admission slot",
+    labelnames=("endpoint",),
+)
+admission_queue_wait_seconds = Histogram(
+    "admission_queue_wait_seconds",
+    "Time a request waited for an admission slot before it started",
+    labelnames=("endpoint",),
+)
+admission_rejected = Counter(
+    "admission_rejected_total",
+    "Number of requests rejected or dropped before they started",
+    labelnames=("endpoint", "reason"),
+)
+
+
+class Overloaded(Exception):
+    """동시 실행 / 대기 한도를 넘어서 거절된 요청 (503 + Retry-After로 응답)"""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"{endpoint} is overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """slot을 기다리는 동안 client가 연결을 끊어서 취소된 요청"""
+
+
+@log_on_init()
+class AdmissionController:
+    """
+    추론이 필요한 endpoint의 동시 실행 수와 대기열 길이를 제한하는 admission controller
+
+    - max_concurrency개까지 바로 실행하고, 그 이상은 max_queue개까지 대기
+    - 대기열이 가득 찼거나 queue_timeout 동안 slot을 얻지 못하면 Overloaded
+    - 대기 중에 client 연결이 끊기면 실행하지 않고 ClientDisconnected
+      (아무도 기다리지 않는 요청에 GPU / CPU를 쓰지 않도록)
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: Optional[float] = 10.0,
+        retry_after: int = 1,
+        disconnect_check_interval: float = 0.1,
+    ):
+        """
+        :param queue_timeout: slot을 기다리는 최대 시간(초) (None이면 제한 없음)
+        :param retry_after: 거절 응답의 Retry-After (초)
+        :param disconnect_check_interval: 대기 중 client 연결 상태를 확인하는 주기(초)
+        """
+        self.endpoint = endpoint
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.disconnect_check_interval = disconnect_check_interval
+        self._slots: Optional[asyncio.Semaphore] = None  # running loop 안에서 생성
+        self._running = 0
+        self._queued = 0
+        admission_in_flight.set_function(lambda: self._running, endpoint=endpoint)
+        admission_queued.set_function(lambda: self._queued, endpoint=endpoint)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _reject(self, reason: str) -> Overloaded:
+        admission_rejected.labels(endpoint=self.endpoint, reason=reason).inc()
+        return Overloaded(self.endpoint, reason, self.retry_after)
+
+    async def acquire(self, request: Optional[Request] = None) -> None:
+        """
+        실행 slot을 얻을 때까지 대기 (얻은 slot은 release()로 반환)
+        :param request: 대기 중 연결 끊김을 확인할 client 요청 (None이면 확인하지 않음)
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        started = time.perf_counter()
+        if not self._slots.locked():
+            # 남은 slot이 있으면 대기하지 않고 바로 실행
+            await self._slots.acquire()
+            self._running += 1
+            admission_queue_wait_seconds.labels(endpoint=self.endpoint).observe(0.0)
+            return
+        if self._running + self._queued >= self.max_concurrency + self.max_queue:
+            raise self._reject("queue_full")
+
+        self._queued += 1
+        waiter = asyncio.ensure_future(self._slots.acquire())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {waiter}, timeout=self.disconnect_check_interval
+                )
+                if done:
+                    break
+                if request is not None and await request.is_disconnected():
+                    admission_rejected.labels(
+                        endpoint=self.endpoint, reason="disconnected"
+                    ).inc()
+                    raise ClientDisconnected()
+                waited = time.perf_counter() - started
+                if self.queue_timeout is not None and waited >= self.queue_timeout:
+                    raise self._reject("queue_timeout")
+        except BaseException:
+            if not waiter.cancel():
+                # 취소 직전에 slot을 얻었으면 다음 대기 요청을 위해 반환
+                self._slots.release()
+            raise
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        admission_queue_wait_seconds.labels(endpoint=self.endpoint).observe(
+            time.perf_counter() - started
+        )
+
+    def release(self) -> None:
+        self._running -= 1
+        self._slots.release()
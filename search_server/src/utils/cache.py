@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+from prometheus_client import Counter
+from utils.metrics import CallbackGauge
+
+cache_requests = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit / miss)",
+    labelnames=("cache", "result"),
+)
+cache_bytes = CallbackGauge(
+    "cache_bytes",
+    "Approximate bytes held by each cache",
+    labelnames=("cache",),
+)
+
+
+def normalize_query(text: str) -> str:
+    """
+    cache key용 query 정규화 (unicode NFKC, 대소문자, 연속 공백 제거)
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def estimate_size(value: Any) -> int:
+    """cache 용량 계산을 위한 대략적인 객체 크기(byte)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    byte 단위 용량 제한, LRU eviction, 선택적 TTL을 가진 thread-safe cache
+    name을 주면 hit/miss, 사용량을 /metrics 에 노출
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self._sizeof = sizeof
+        # key -> (value, size, expires_at)
+        self._store: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if name:
+            cache_bytes.set_function(lambda: self.current_bytes, cache=name)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                expires_at = entry[2]
+                if expires_at is not None and expires_at <= time.monotonic():
+                    self._remove(key)  # TTL 만료
+                    entry = None
+            if entry is None:
+                self._record(hit=False)
+                return default
+            self._store.move_to_end(key)
+            self._record(hit=True)
+            return entry[0]
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.name:
+            cache_requests.labels(
+                cache=self.name, result="hit" if hit else "miss"
+            ).inc()
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(key) + self._sizeof(value)
+        if size > self.max_bytes:
+            return  # 용량보다 큰 항목은 cache 하지 않음
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            self._store[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._store))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._store.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._store),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
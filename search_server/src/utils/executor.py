@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils.logger import logger
+from utils.metrics import CallbackGauge
+from utils.tracing import enable_metrics_tracing
+
+EXECUTOR_MODES = ("thread", "process")
+
+executor_in_flight = CallbackGauge(
+    "inference_executor_in_flight",
+    "Number of inference tasks submitted to the executor or waiting for a slot",
+)
+executor_queue_depth = CallbackGauge(
+    "inference_executor_queue_depth",
+    "Number of inference tasks waiting for a free worker",
+)
+
+# process 모드에서 각 worker process가 들고 있는 추론 대상 (이름 -> service 객체)
+_worker_targets: Dict[str, Any] = {}
+
+
+def _init_worker(target_factory: Callable[[], Dict[str, Any]]):
+    """
+    worker process 시작 시 한 번 실행되어 process 전용 service(모델, pipeline)를 생성
+    pipeline 단계별 metric도 worker에서 기록 (PROMETHEUS_MULTIPROC_DIR이 설정되어 있어야
+    API process의 /metrics에 포함됨)
+    """
+    enable_metrics_tracing()
+    _worker_targets.update(target_factory())
+
+
+def _call_worker_target(name: str, method: str, args: tuple, kwargs: dict):
+    return getattr(_worker_targets[name], method)(*args, **kwargs)
+
+
+def _warm_up_worker(name: str, method: str) -> int:
+    """worker process에서 target의 warm-up 메서드를 실행하고 실행한 process id 반환"""
+    getattr(_worker_targets[name], method)()
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """
+    blocking 추론 작업(Pipeline.run 등)을 event loop 밖에서 실행하는 executor
+
+    - thread 모드: 같은 process의 thread pool에서 등록된 service의 메서드를 실행
+    - process 모드: spawn된 worker process마다 target_factory로 service를 새로 만들고
+      (이름, 메서드, 인자)만 넘겨서 실행. 모델이 worker 수만큼 메모리에 올라가므로
+      GIL 경합이 문제가 되는 CPU 추론 환경에서만 사용
+
+    동시에 pool에 들어가는 작업 수는 max_workers + max_queue_size로 제한되고,
+    그 이상의 요청은 event loop에서 대기한다.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 2,
+        max_queue_size: int = 64,
+        target_factory: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f"Unknown executor mode: {mode} (expected {EXECUTOR_MODES})"
+            )
+        if mode == "process" and target_factory is None:
+            raise ValueError("process mode requires a picklable target_factory")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._targets: Dict[str, Any] = {}
+        self._slots: Optional[asyncio.Semaphore] = None  # running loop 안에서 생성
+        self._in_flight = 0
+
+        # thread pool은 thread 모드의 추론과 process 모드의 I/O 작업(run)에 함께 사용
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._process_pool = None
+        if mode == "process":
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(target_factory,),
+            )
+        executor_in_flight.set_function(lambda: self._in_flight)
+        executor_queue_depth.set_function(
+            lambda: max(0, self._in_flight - self.max_workers)
+        )
+        logger.info(
+            f"InferenceExecutor mode={mode} max_workers={max_workers} max_queue_size={max_queue_size}"
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """pool에 제출되었거나 slot을 기다리는 작업 수"""
+        return self._in_flight
+
+    def register(self, name: str, target: Any) -> None:
+        """thread 모드에서 call()로 실행할 service 등록"""
+        self._targets[name] = target
+
+    async def call(self, name: str, method: str, *args, **kwargs):
+        """
+        등록된 service의 blocking 메서드를 추론 pool에서 실행하고 결과를 await
+        """
+        if self._process_pool is not None:
+            fn = functools.partial(_call_worker_target, name, method, args, kwargs)
+            return await self._submit(self._process_pool, fn)
+
+        target = self._targets[name]
+        fn = functools.partial(getattr(target, method), *args, **kwargs)
+        return await self._submit(self._thread_pool, fn)
+
+    async def warm_up(self, name: str, method: str, poll_interval: float = 0.5):
+        """
+        등록된 target의 warm-up 메서드를 모든 worker에서 한 번씩 실행
+        process 모드에서는 worker process가 모두 뜨고 초기화(target_factory)가 끝날 때까지
+        대기한다. 먼저 초기화가 끝난 worker가 여러 번 실행할 수 있으므로 process id로 확인
+        """
+        if self._process_pool is None:
+            await self.call(name, method)
+            return
+
+        warmed = set()
+        while True:
+            pids = await asyncio.gather(
+                *(
+                    self._submit(
+                        self._process_pool,
+                        functools.partial(_warm_up_worker, name, method),
+                    )
+                    for _ in range(self.max_workers - len(warmed))
+                )
+            )
+            warmed.update(pids)
+            if len(warmed) >= self.max_workers:
+                return
+            await asyncio.sleep(poll_interval)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        임의의 blocking 함수를 thread pool에서 실행 (process 모드에서도 thread 사용)
+        """
+        return await self._submit(
+            self._thread_pool, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def _submit(self, pool, fn: Callable):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue_size)
+
+        self._in_flight += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(pool, fn)
+        finally:
+            self._in_flight -= 1
+
+    def shutdown(self) -> None:
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+import os
+import threading
+from typing import Callable, Dict, Iterable, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Counter / Gauge / Histogram은 prometheus_client를 그대로 사용하고, 여기서는
+#   - scrape 시점에 값을 읽는 CallbackGauge
+#   - process 모드 executor의 worker metric까지 합쳐서 노출하는 render_metrics
+# 만 제공한다.
+#
+# process 모드 executor에서 worker의 metric(pipeline 단계별 latency 등)을 /metrics에 포함하려면
+# 서버 시작 전에 PROMETHEUS_MULTIPROC_DIR을 비어 있는 폴더로 설정해야 한다.
+# (prometheus_client multiprocess mode: process별 값을 mmap 파일에 쓰고 scrape 시점에 합침)
+
+# scrape 시점에 함수로 값을 읽는 gauge (process 메모리 상태라 multiprocess mode에서도 합치지 않음)
+callback_registry = CollectorRegistry(auto_describe=True)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class CallbackGauge(Collector):
+    """
+    queue 길이, cache 사용량처럼 scrape 할 때 set_function으로 등록한 함수를 호출해서 읽는 gauge
+    (process 모드에서는 API process에 등록된 값만 노출되고 worker process의 값은 포함되지 않음)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+        callback_registry.register(self)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._functions[key] = fn
+
+    def get(self, **labels) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return float(self._functions[key]())
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            self.name, self.documentation, labels=self.labelnames
+        )
+        with self._lock:
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            family.add_metric(list(key), float(fn()))
+        yield family
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition format (multiprocess mode면 모든 process의 값을 합침)"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(callback_registry)
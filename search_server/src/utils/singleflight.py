@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import Counter
+from utils.metrics import CallbackGauge
+
+singleflight_requests = Counter(
+    "singleflight_requests_total",
+    "Requests by single-flight group and result (leader: executed / shared: joined an in-flight run)",
+    labelnames=("group", "result"),
+)
+singleflight_in_flight = CallbackGauge(
+    "singleflight_in_flight",
+    "Number of distinct in-flight executions per single-flight group",
+    labelnames=("group",),
+)
+
+
+class SingleFlight:
+    """
+    같은 key로 동시에 들어온 요청이 하나의 실행 결과를 공유하도록 하는 coalescer
+
+    처음 요청(leader)만 fn()을 실행하고, 실행이 끝나기 전에 들어온 같은 key의 요청은
+    그 결과(또는 예외)를 함께 받는다. 실행이 끝나면 key를 지우므로 결과를 저장하지는 않음
+    (저장은 ResponseCache가 담당). 한 요청이 취소되어도 공유 실행은 취소되지 않는다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        singleflight_in_flight.set_function(lambda: len(self._in_flight), group=name)
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is not None:
+            singleflight_requests.labels(group=self.name, result="shared").inc()
+        else:
+            singleflight_requests.labels(group=self.name, result="leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 기다리던 요청이 모두 취소되어도 예외 미확인 경고가 남지 않도록
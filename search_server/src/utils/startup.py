@@ -0,0 +1,84 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import Gauge
+from utils.logger import logger
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+startup_phase_seconds = Gauge(
+    "startup_phase_seconds",
+    "Time spent in each startup phase of this process",
+    labelnames=("phase",),
+    multiprocess_mode="max",  # startup은 API process에서만 기록
+)
+startup_ready = Gauge(
+    "startup_ready",
+    "1 when models are loaded and the services accept traffic",
+    multiprocess_mode="max",
+)
+
+
+class StartupState:
+    """
+    background startup(모델 loading, service 생성, warm-up 추론)의 진행 상태와 단계별 소요 시간
+
+    /livez는 startup이 실패하지 않았으면 바로 응답하고, /readyz는 모든 단계가 끝난 뒤에만
+    ready로 응답한다.
+    """
+
+    def __init__(self):
+        self.status = STARTING
+        self.phase: Optional[str] = None
+        self.error: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._total: Optional[float] = None
+        startup_ready.set(0)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    @property
+    def failed(self) -> bool:
+        return self.status == FAILED
+
+    @contextmanager
+    def track(self, phase: str) -> Iterator[None]:
+        """한 startup 단계의 소요 시간 기록 (예외가 나면 failed 상태로 변경)"""
+        self.phase = phase
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.status = FAILED
+            self.error = f"{phase}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases[phase] = round(elapsed, 3)
+            startup_phase_seconds.labels(phase=phase).set(elapsed)
+
+    def mark_ready(self) -> None:
+        self._total = time.perf_counter() - self._started
+        self.status = READY
+        self.phase = None
+        startup_ready.set(1)
+        startup_phase_seconds.labels(phase="total").set(self._total)
+        logger.info(f"Startup finished in {self._total:.2f}s phases={self.phases}")
+
+    def to_dict(self) -> dict:
+        elapsed = self._total
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._started
+        return {
+            "status": self.status,
+            "phase": self.phase,
+            "error": self.error,
+            "elapsed_seconds": round(elapsed, 3),
+            "phases": dict(self.phases),
+        }
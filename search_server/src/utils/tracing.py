@@ -0,0 +1,135 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from haystack import tracing
+from haystack.tracing import Span, Tracer
+from prometheus_client import Histogram
+
+COMPONENT_RUN = "haystack.component.run"
+PIPELINE_RUN = "haystack.pipeline.run"
+# pipeline 밖에서 component를 직접 실행할 때 metric label로 사용할 pipeline 이름 tag
+PIPELINE_TAG = "search_server.pipeline"
+
+pipeline_seconds = Histogram(
+    "pipeline_seconds",
+    "Latency of one pipeline run",
+    labelnames=("pipeline",),
+)
+pipeline_component_seconds = Histogram(
+    "pipeline_component_seconds",
+    "Latency of one component (stage) run inside a pipeline",
+    labelnames=("pipeline", "component"),
+)
+pipeline_component_documents = Histogram(
+    "pipeline_component_documents",
+    "Number of documents returned by one component (stage) run",
+    labelnames=("pipeline", "component"),
+    buckets=(0, 5, 10, 20, 30, 40, 50, 75, 100, 200),
+)
+
+
+class _MetricsSpan(Span):
+    """metric에 필요한 값(component 이름, 출력 문서 수)만 기록하는 span"""
+
+    def __init__(self, tags: Optional[Dict[str, Any]]):
+        tags = tags or {}
+        self.component = tags.get("haystack.component.name")
+        self.pipeline = tags.get(PIPELINE_TAG)
+        self.documents: Optional[int] = None
+
+    def set_tag(self, key: str, value: Any) -> None:
+        pass
+
+    def set_content_tag(self, key: str, value: Any) -> None:
+        # content tracing 설정과 관계없이 출력 문서 수만 확인
+        if key == "haystack.component.output" and isinstance(value, dict):
+            documents = value.get("documents")
+            if isinstance(documents, list):
+                self.documents = len(documents)
+
+
+class MetricsTracer(Tracer):
+    """
+    haystack tracing hook으로 pipeline / component 실행 시간과 출력 문서 수를 /metrics 에 기록
+
+    component span의 pipeline label은 현재 thread에서 실행 중인 pipeline의
+    metadata["name"]을 사용하고, pipeline 밖에서 실행하는 component는 trace_stage()로
+    pipeline 이름을 직접 지정한다.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def trace(
+        self, operation_name: str, tags: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Span]:
+        span = _MetricsSpan(tags)
+        stack = self._stack()
+        if operation_name == PIPELINE_RUN:
+            metadata = (tags or {}).get("haystack.pipeline.metadata") or {}
+            span.pipeline = span.pipeline or metadata.get("name", "pipeline")
+        elif span.pipeline is None:
+            span.pipeline = stack[-1].pipeline if stack else "none"
+
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            elapsed = time.perf_counter() - started
+            # 같은 thread의 event loop에서 여러 coroutine의 span이 섞일 수 있으므로 자기 span만 제거
+            stack.remove(span)
+            if operation_name == PIPELINE_RUN:
+                pipeline_seconds.labels(pipeline=span.pipeline).observe(elapsed)
+            elif operation_name == COMPONENT_RUN and span.component:
+                labels = {"pipeline": span.pipeline, "component": span.component}
+                pipeline_component_seconds.labels(**labels).observe(elapsed)
+                if span.documents is not None:
+                    pipeline_component_documents.labels(**labels).observe(
+                        span.documents
+                    )
+
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+
+def enable_metrics_tracing() -> None:
+    """다른 tracer(OpenTelemetry 등)가 설정되어 있지 않으면 MetricsTracer 사용"""
+    if not tracing.is_tracing_enabled():
+        tracing.enable_tracing(MetricsTracer())
+
+
+@contextmanager
+def trace_pipeline(pipeline: str) -> Iterator[Span]:
+    """pipeline 객체 없이 component를 직접 실행하는 경로를 하나의 pipeline run으로 기록"""
+    with tracing.tracer.trace(PIPELINE_RUN, tags={PIPELINE_TAG: pipeline}) as span:
+        yield span
+
+
+@contextmanager
+def trace_stage(pipeline: str, name: str) -> Iterator[Span]:
+    """
+    pipeline 밖에서 실행하는 단계(component 직접 호출, _msearch 등)를 component run으로 기록
+    출력 문서 수를 기록하려면 span.set_content_tag("haystack.component.output", 결과)
+    """
+    tags = {"haystack.component.name": name, PIPELINE_TAG: pipeline}
+    with tracing.tracer.trace(COMPONENT_RUN, tags=tags) as span:
+        yield span
+
+
+def run_component(pipeline: str, name: str, component, **inputs) -> Dict[str, Any]:
+    """component.run(**inputs)를 trace_stage로 감싸서 실행"""
+    with trace_stage(pipeline, name) as span:
+        result = component.run(**inputs)
+        span.set_content_tag("haystack.component.output", result)
+        return result
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 각 test 폴더에서 공용 fake(tests/fakes.py)를 import 할 수 있도록 tests 폴더를 path에 추가
+sys.path.insert(0, os.path.dirname(__file__))
@@ -0,0 +1,137 @@
+"""
+여러 test에서 공용으로 사용하는 fake document store client / 모델
+(tests/conftest.py가 tests 폴더를 path에 추가하므로 `from fakes import ...` 로 사용)
+"""
+
+import time
+from typing import List
+
+from haystack import component
+from models.document import DocumentMeta
+from services.ranker import RankerService
+
+
+def make_sources(count: int) -> dict:
+    """id 순서대로 content 길이가 1 ~ 7로 반복되는 OpenSearch _source 목록"""
+    sources = {}
+    for i in range(count):
+        source = {name: f"{name} {i}" for name in DocumentMeta.model_fields}
+        source.update(id=f"doc-{i}", content="x" * (i % 7 + 1))
+        sources[source["id"]] = source
+    return sources
+
+
+class FakeIndices:
+    def exists(self, index):
+        return True
+
+
+class FakeClient:
+    """
+    저장된 _source를 돌려주고 요청을 기록하는 테스트용 OpenSearch client
+        - search: 저장 순서대로 최대 size개 (점수는 순위의 역수)
+        - msearch: multi_match query를 문서 id로 보고 해당 문서 하나
+        - mget: 저장된 문서 (없는 id는 found=False)
+    :param delay: search / msearch 응답 전에 대기할 시간(초)
+    """
+
+    def __init__(self, sources: dict, delay: float = 0.0):
+        self.sources = sources
+        self.delay = delay
+        self.requests = []
+        self.searches = []
+        self.indices = FakeIndices()
+
+    def search(self, index, body):
+        self.searches.append(body)
+        time.sleep(self.delay)
+        hits = [
+            {"_id": doc_id, "_source": dict(source), "_score": 1.0 / (rank + 1)}
+            for rank, (doc_id, source) in enumerate(self.sources.items())
+        ]
+        return {"hits": {"hits": hits[: body.get("size", len(hits))]}}
+
+    def msearch(self, body, index):
+        self.requests.append(("msearch", len(body)))
+        time.sleep(self.delay)
+        responses = []
+        for search in body[1::2]:
+            self.searches.append(search)
+            query = search["query"]["bool"]["must"][0]["multi_match"]["query"]
+            source = self.sources[query]
+            hit = {"_id": query, "_source": dict(source), "_score": 1.0}
+            responses.append({"hits": {"hits": [hit]}})
+        return {"responses": responses}
+
+    def mget(self, index, body, **params):
+        self.requests.append((body["ids"], params))
+        docs = []
+        for doc_id in body["ids"]:
+            if doc_id in self.sources:
+                source = dict(self.sources[doc_id])
+                docs.append({"_id": doc_id, "found": True, "_source": source})
+            else:
+                docs.append({"_id": doc_id, "found": False})
+        return {"docs": docs}
+
+
+class FakeAsyncClient:
+    """FakeClient의 search / msearch를 async로 노출하는 테스트용 async client"""
+
+    def __init__(self, client: FakeClient):
+        self.client = client
+        self.calls = 0
+        self.closed = False
+
+    async def search(self, index, body):
+        self.calls += 1
+        return self.client.search(index, body)
+
+    async def msearch(self, body, index):
+        self.calls += 1
+        return self.client.msearch(body, index)
+
+    async def close(self):
+        self.closed = True
+
+
+class LengthRanker(RankerService):
+    """content 길이를 점수로 사용하는 테스트용 reranker 모델"""
+
+    def __init__(self, top_k: int = 1000):
+        super().__init__(model="test-model", top_k=top_k)
+        self.warm_ups = 0
+
+    def warm_up(self):
+        self.warm_ups += 1
+
+    def score_pairs(self, pairs):
+        return [float(len(document)) for _, document in pairs]
+
+
+class RecordingEmbedder:
+    """
+    문장 길이를 embedding으로 사용하고 forward pass 별 batch 크기를 기록하는 테스트용 embedder
+    :param delay: forward pass 한 번에 걸리는 시간(초)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def warm_up(self):
+        pass
+
+    def embed_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        time.sleep(self.delay)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@component
+class FakeTextEmbedder:
+    """모든 query에 같은 embedding을 돌려주는 text embedder component"""
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str):
+        return {"embedding": [1.0, 0.0]}
@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+from repositories.ann_index import LocalAnnIndex, UnsupportedFilterError
+from utils.filter import get_filters
+
+embedding_dim = 16
+
+
+class FakeDocumentStore:
+    """scan_documents / count_documents만 구현한 테스트용 document store"""
+
+    def __init__(self, documents: dict):
+        self.documents = documents
+
+    def count_documents(self) -> int:
+        return len(self.documents)
+
+    def scan_documents(self, query=None, fields=None, batch_size=1000):
+        start = None
+        if query:
+            start = query["range"]["datestamp"]["gte"]
+        for doc_id, source in self.documents.items():
+            if start is None or source["datestamp"] >= start:
+                yield doc_id, source
+
+
+def make_documents(count: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    categories = ["cs.AI cs.LG", "cs.CL", "cs.CV"]
+    return {
+        f"doc-{i}": {
+            "embedding": rng.normal(size=embedding_dim).tolist(),
+            "datestamp": f"2024-01-{i % 28 + 1:02d}",
+            "categories": categories[i % 3],
+        }
+        for i in range(count)
+    }
+
+
+def exact_top_k(documents: dict, query, top_k: int, accept=lambda source: True):
+    scored = []
+    for doc_id, source in documents.items():
+        if not accept(source):
+            continue
+        vector = np.asarray(source["embedding"])
+        scored.append((float(vector @ query / np.linalg.norm(vector)), doc_id))
+    return [doc_id for _, doc_id in sorted(scored, reverse=True)[:top_k]]
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.documents = make_documents(600)
+        self.store = FakeDocumentStore(self.documents)
+        self.index = LocalAnnIndex(
+            self.store, embedding_dim=embedding_dim, n_lists=8, n_probe=8
+        )
+        self.index.refresh()
+
+    def test_search_matches_exact_when_probing_all_lists(self):
+        query = np.asarray(self.documents["doc-7"]["embedding"])
+        hits = self.index.search(query, top_k=5)
+
+        self.assertEqual(hits[0][0], "doc-7")
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        expected = exact_top_k(self.documents, query / np.linalg.norm(query), 5)
+        self.assertEqual([doc_id for doc_id, _ in hits], expected)
+
+    def test_filters(self):
+        query = np.asarray(self.documents["doc-3"]["embedding"])
+        filters = get_filters(["cs.lg"], "2024-01-05", "2024-01-10")
+        hits = self.index.search(query, top_k=10, filters=filters)
+
+        self.assertEqual(len(hits), 10)
+        for doc_id, _ in hits:
+            source = self.documents[doc_id]
+            self.assertIn("cs.LG", source["categories"])
+            self.assertTrue("2024-01-05" <= source["datestamp"] <= "2024-01-10")
+
+        with self.assertRaises(UnsupportedFilterError):
+            self.index.search(
+                query,
+                filters={"field": "meta.title", "operator": "==", "value": "x"},
+            )
+
+    def test_incremental_refresh(self):
+        rng = np.random.default_rng(1)
+        new_vector = rng.normal(size=embedding_dim).tolist()
+        self.documents["doc-new"] = {
+            "embedding": new_vector,
+            "datestamp": "2024-02-01",
+            "categories": "cs.CL",
+        }
+        # 기존 문서의 embedding 변경
+        self.documents["doc-7"] = dict(
+            self.documents["doc-7"], embedding=new_vector, datestamp="2024-02-01"
+        )
+        self.index.refresh()
+
+        self.assertEqual(len(self.index), 601)
+        hits = self.index.search(np.asarray(new_vector), top_k=2)
+        self.assertEqual({doc_id for doc_id, _ in hits}, {"doc-new", "doc-7"})
+
+
+if __name__ == "__main__":
+    unittest.main()
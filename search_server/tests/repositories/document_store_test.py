@@ -0,0 +1,186 @@
+import asyncio
+import unittest
+
+from fakes import FakeAsyncClient, FakeClient, FakeIndices
+from opensearchpy.exceptions import AuthorizationException
+from repositories.document_store import AwsOpenSearch, OpenSearchDocumentStore
+from repositories.retrievers import ProjectedBM25Retriever
+
+
+class ExpiredAuthClient:
+    """자격 증명이 만료된 client (모든 요청이 status_code로 실패)"""
+
+    def __init__(self, status_code=403):
+        self.status_code = status_code
+        self.indices = FakeIndices()
+
+    def mget(self, index, body, **params):
+        raise AuthorizationException(self.status_code, "security_exception", {})
+
+
+class ExpiredAuthAsyncClient:
+    """자격 증명이 만료된 async client (다른 요청과 동시에 대기하다가 403으로 실패)"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def search(self, index, body):
+        await asyncio.sleep(0.01)
+        raise AuthorizationException(403, "security_exception", {})
+
+    async def close(self):
+        self.closed = True
+
+
+class RefreshingAwsOpenSearch(AwsOpenSearch):
+    """AWS 호출 없이 자격 증명 갱신 시 refreshed client로 바꾸는 테스트용 document store"""
+
+    def __init__(self, client, refreshed):
+        OpenSearchDocumentStore.__init__(
+            self, hosts="http://localhost:9200", index="test"
+        )
+        self._client = client
+        self.refreshed = refreshed
+        self.refreshes = 0
+
+    def update_auth_credentials(self):
+        self.refreshes += 1
+        self._client = self.refreshed
+
+    def _async_http_auth(self):
+        return None
+
+    def _create_async_client(self, http_auth):
+        self.refreshes += 1
+        return FakeAsyncClient(self.refreshed)
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = OpenSearchDocumentStore(
+            hosts="http://localhost:9200", index="test"
+        )
+        self.client = FakeClient(
+            {
+                f"doc-{i}": {
+                    "id": f"doc-{i}",
+                    "content": f"content {i}",
+                    "title": f"title {i}",
+                }
+                for i in range(5)
+            }
+        )
+        self.store._client = self.client
+
+    def test_get_documents_by_ids(self):
+        documents = self.store.get_documents_by_ids(
+            ["doc-3", "missing", "doc-1", "doc-4"],
+            exclude_fields=["embedding"],
+            batch_size=2,
+        )
+
+        self.assertEqual([doc.id for doc in documents], ["doc-3", "doc-1", "doc-4"])
+        self.assertEqual(documents[0].content, "content 3")
+        self.assertEqual(documents[0].meta["title"], "title 3")
+        self.assertEqual(len(self.client.requests), 2)  # batch_size 단위로 mget
+        self.assertEqual(
+            self.client.requests[0][1], {"_source_excludes": ["embedding"]}
+        )
+
+    def test_id_without_source_field(self):
+        documents = self.store.get_documents_by_ids(["doc-2"], fields=["content"])
+        self.assertEqual(documents[0].id, "doc-2")
+        self.assertEqual(self.client.requests[0][1], {"_source_includes": ["content"]})
+
+    def test_source_projection(self):
+        self.store._bm25_retrieval("content")
+        self.assertEqual(
+            self.client.searches[-1]["_source"], {"excludes": ["embedding"]}
+        )
+
+        retriever = ProjectedBM25Retriever(
+            document_store=self.store, source_fields=["id", "content"]
+        )
+        documents = retriever.run(query="content")["documents"]
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(self.client.searches[-1]["_source"], ["id", "content"])
+
+        # with 블록 밖에서는 기본값으로 돌아감
+        self.store._bm25_retrieval("content")
+        self.assertEqual(
+            self.client.searches[-1]["_source"], {"excludes": ["embedding"]}
+        )
+
+    def test_collect_searches_and_multi_search(self):
+        retriever = ProjectedBM25Retriever(
+            document_store=self.store, source_fields=["id", "content"]
+        )
+        with self.store.collect_searches() as bodies:
+            for doc_id in ["doc-1", "doc-3"]:
+                result = retriever.run(query=doc_id)
+                self.assertEqual(result["documents"], [])
+        self.assertEqual(self.client.searches, [])  # with 블록 안에서는 요청하지 않음
+        self.assertEqual(bodies[0]["_source"], ["id", "content"])
+
+        results = self.store.multi_search(bodies)
+        self.assertEqual(self.client.requests, [("msearch", 4)])
+        self.assertEqual([docs[0].id for docs in results], ["doc-1", "doc-3"])
+
+        # with 블록 밖에서는 다시 바로 검색
+        self.assertEqual(len(retriever.run(query="content")["documents"]), 5)
+
+    def test_async_retrieval(self):
+        async_client = FakeAsyncClient(self.client)
+        self.store._async_client = async_client
+        self.store._client = None  # sync client로 요청하면 실패하도록 제거
+        retriever = ProjectedBM25Retriever(
+            document_store=self.store, source_fields=["id", "content"]
+        )
+
+        documents = asyncio.run(retriever.run_async(query="content"))["documents"]
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(self.client.searches[-1]["_source"], ["id", "content"])
+
+        with self.store.collect_searches() as bodies:
+            retriever.run(query="doc-2")
+        results = asyncio.run(self.store.multi_search_async(bodies))
+        self.assertEqual(results[0][0].id, "doc-2")
+        self.assertEqual(async_client.calls, 2)
+
+    def test_aws_retries_once_after_expired_auth(self):
+        store = RefreshingAwsOpenSearch(ExpiredAuthClient(), refreshed=self.client)
+        documents = store.get_documents_by_ids(["doc-1"])
+        self.assertEqual([doc.id for doc in documents], ["doc-1"])
+        self.assertEqual(store.refreshes, 1)
+
+        # 403이 아닌 인증 오류는 갱신 없이 그대로 raise
+        store = RefreshingAwsOpenSearch(ExpiredAuthClient(401), refreshed=self.client)
+        with self.assertRaises(AuthorizationException):
+            store.get_documents_by_ids(["doc-1"])
+        self.assertEqual(store.refreshes, 0)
+
+    def test_aws_swaps_async_client_once_for_concurrent_expired_auth(self):
+        store = RefreshingAwsOpenSearch(None, refreshed=self.client)
+        store._timeout = 0.05  # 이전 client를 종료하기 전 대기 시간
+        expired = ExpiredAuthAsyncClient()
+        store._async_client = expired
+
+        async def run():
+            responses = await asyncio.gather(
+                *(store._search_async({"size": 1}) for _ in range(3))
+            )
+            # 동시에 받은 403에 대해 client는 한 번만 교체하고, 이전 client는 바로 닫지 않음
+            self.assertEqual(store.refreshes, 1)
+            self.assertFalse(expired.closed)
+            await asyncio.sleep(0.1)
+            self.assertTrue(expired.closed)
+            await store.close_async()
+            return responses
+
+        responses = asyncio.run(run())
+        self.assertEqual([len(r["hits"]["hits"]) for r in responses], [1, 1, 1])
+        self.assertEqual(store._async_generation, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
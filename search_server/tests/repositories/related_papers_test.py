@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from repositories.related_papers import (
+    HEADER,
+    MAGIC,
+    RelatedPapersSync,
+    RelatedPapersTable,
+)
+
+
+def write_table(path, related: dict):
+    """ETL batch job과 같은 구조로 related papers table 작성"""
+    ids = sorted(related, key=lambda doc_id: doc_id.encode("utf-8"))
+    position = {doc_id: i for i, doc_id in enumerate(ids)}
+    encoded = [doc_id.encode("utf-8") for doc_id in ids]
+    id_offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    id_offsets[1:] = np.cumsum([len(e) for e in encoded])
+    neighbor_offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    neighbor_offsets[1:] = np.cumsum([len(related[doc_id]) for doc_id in ids])
+    neighbors = np.asarray(
+        [position[n] for doc_id in ids for n, _ in related[doc_id]], dtype=np.uint32
+    )
+    scores = np.asarray(
+        [s for doc_id in ids for _, s in related[doc_id]], dtype=np.float32
+    )
+
+    with open(path, "wb") as handle:
+        handle.write(
+            HEADER.pack(MAGIC, len(ids), len(neighbors), int(id_offsets[-1]), 0)
+        )
+        handle.write(id_offsets.tobytes())
+        handle.write(b"".join(encoded))
+        handle.write(b"\0" * (-handle.tell() % 8))
+        handle.write(neighbor_offsets.tobytes())
+        handle.write(neighbors.tobytes())
+        handle.write(b"\0" * (-handle.tell() % 8))
+        handle.write(scores.tobytes())
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "related_papers.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup(self):
+        write_table(
+            self.path,
+            {
+                "b": [("b", 1.0), ("a", 0.8), ("c", 0.5)],
+                "a": [("a", 1.0), ("b", 0.8), ("c", 0.1)],
+                "c": [("c", 1.0), ("b", 0.5)],
+            },
+        )
+        table = RelatedPapersTable(self.path)
+
+        self.assertEqual(len(table), 3)
+        hits = table.lookup("b", top_k=2)
+        self.assertEqual([doc_id for doc_id, _ in hits], ["b", "a"])
+        self.assertAlmostEqual(hits[1][1], 0.8, places=5)
+        self.assertIsNone(table.lookup("c", top_k=3))  # 저장된 neighbor 부족
+        self.assertIsNone(table.lookup("missing", top_k=1))
+
+    def test_missing_file_and_reload(self):
+        table = RelatedPapersTable(self.path, check_interval=0)
+        self.assertFalse(table.ready)
+        self.assertIsNone(table.lookup("a", top_k=1))
+
+        write_table(self.path, {"a": [("a", 1.0)]})
+        self.assertEqual(table.lookup("a", top_k=1), [("a", 1.0)])
+
+        time.sleep(0.01)
+        write_table(self.path, {"a": [("a", 1.0), ("x", 0.3)], "x": [("x", 1.0)]})
+        os.utime(self.path, (time.time() + 5, time.time() + 5))
+        self.assertEqual(len(table.lookup("a", top_k=2)), 2)
+
+    def test_replacement_notifies_listeners(self):
+        write_table(self.path, {"a": [("a", 1.0)]})
+        table = RelatedPapersTable(self.path, check_interval=0)
+        sync = RelatedPapersSync(self.path, notify_delay=0)
+        reloads = []
+        table.add_listener(lambda: reloads.append("table"))
+        self.assertFalse(sync.refresh())  # 파일이 바뀌지 않음
+
+        write_table(self.path, {"a": [("a", 1.0), ("x", 0.3)], "x": [("x", 1.0)]})
+        os.utime(self.path, (time.time() + 5, time.time() + 5))
+        self.assertTrue(sync.refresh())
+        self.assertFalse(sync.refresh())
+        table.lookup("a", top_k=1)
+        self.assertEqual(reloads, ["table"])
+
+
+if __name__ == "__main__":
+    unittest.main()
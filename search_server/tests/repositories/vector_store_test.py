@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+import numpy as np
+from repositories.vector_store import ArrayVectorStore, TempDocument
+
+embedding_dim = 8
+
+
+def make_entity(doc_id: str, value: float) -> TempDocument:
+    embedding = [value] * embedding_dim
+    return TempDocument(doc_id, embedding, f"content of {doc_id}")
+
+
+class MyTestCase(unittest.TestCase):
+    def test_set_and_get(self):
+        store = ArrayVectorStore(embedding_dim=embedding_dim, stripes=2)
+        store.set("doc-1", make_entity("doc-1", 0.5))
+
+        entity = store.get_entity("doc-1")
+        self.assertEqual(entity.id, "doc-1")
+        self.assertEqual(entity.content, "content of doc-1")
+        np.testing.assert_allclose(store.get_vector("doc-1"), [0.5] * embedding_dim)
+
+        # 반환된 vector를 수정해도 스토어 내부 행렬은 바뀌지 않아야 함
+        entity.embedding[0] = 100
+        self.assertEqual(store.get_vector("doc-1")[0], 0.5)
+
+        with self.assertRaises(ValueError):
+            store.get_entity("missing")
+
+    def test_update_existing(self):
+        store = ArrayVectorStore(embedding_dim=embedding_dim, stripes=1)
+        store.set("doc-1", make_entity("doc-1", 0.1))
+        store.set("doc-1", make_entity("doc-1", 0.9))
+        self.assertEqual(len(store), 1)
+        self.assertAlmostEqual(float(store.get_vector("doc-1")[0]), 0.9, places=5)
+
+    def test_lru_eviction_by_bytes(self):
+        entry_bytes = 200  # 대략적인 (행렬 row + id + content) 크기
+        store = ArrayVectorStore(
+            embedding_dim=embedding_dim, capacity_bytes=entry_bytes * 3, stripes=1
+        )
+        for i in range(10):
+            store.set(f"doc-{i}", make_entity(f"doc-{i}", i))
+            store.get_vector("doc-0")  # doc-0은 계속 최근 사용으로 유지
+
+        self.assertLessEqual(store.stats()["used_bytes"], store.capacity_bytes)
+        self.assertLess(len(store), 10)
+        self.assertEqual(store.get_entity("doc-0").id, "doc-0")
+        self.assertEqual(store.get_entity("doc-9").id, "doc-9")
+        with self.assertRaises(ValueError):
+            store.get_entity("doc-1")
+
+    def test_float16_storage(self):
+        store = ArrayVectorStore(embedding_dim=embedding_dim, dtype=np.float16)
+        store.set("doc-1", make_entity("doc-1", 0.25))
+        self.assertEqual(store.get_vector("doc-1").dtype, np.float16)
+
+    def test_concurrent_access(self):
+        store = ArrayVectorStore(embedding_dim=embedding_dim, stripes=4)
+
+        def worker(offset: int):
+            for i in range(200):
+                doc_id = f"doc-{offset}-{i}"
+                store.set(doc_id, make_entity(doc_id, i))
+                self.assertEqual(store.get_vector(doc_id)[0], i)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(store), 8 * 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
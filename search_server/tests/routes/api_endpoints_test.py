@@ -0,0 +1,168 @@
+import asyncio
+import json
+import time
+import unittest
+
+import httpx
+from fakes import FakeClient, LengthRanker, RecordingEmbedder, make_sources
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from repositories.document_store import OpenSearchDocumentStore
+from routes.api_endpoints import router
+from services.embedding import BatchingTextEmbedder
+from services.ranker import RankerView
+from services.search import SearchService
+from utils.admission import AdmissionController
+from utils.executor import InferenceExecutor
+
+
+class SlowRanker(LengthRanker):
+    """rerank 한 번에 delay초가 걸리는 테스트용 reranker 모델"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+
+    def score_pairs(self, pairs):
+        time.sleep(self.delay)
+        return super().score_pairs(pairs)
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.executor = InferenceExecutor(mode="thread", max_workers=2)
+        self.ranker = SlowRanker()
+        store = OpenSearchDocumentStore(hosts="http://localhost:9200", index="test")
+        store._client = FakeClient(make_sources(30))
+        self.embedder = RecordingEmbedder()
+        self.service = SearchService(
+            document_store=store,
+            ranker=RankerView(self.ranker, top_k=20),
+            text_embedder=BatchingTextEmbedder(self.embedder, max_wait_ms=0),
+            top_k=10,
+            executor=self.executor,
+        )
+        # slot이 반환되지 않으면 다음 요청이 바로 503 (queue_full)
+        self.admission = AdmissionController(
+            "stream_test", max_concurrency=1, max_queue=0, queue_timeout=None
+        )
+        self.app = FastAPI()
+        self.app.include_router(router)
+        self.app.state.search_service = self.service
+        self.app.state.admission = {"search": self.admission}
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_ndjson_stream_sends_retrieved_then_reranked(self):
+        with TestClient(self.app) as client:
+            response = client.get(
+                "/search", params={"query": "llm", "stream": "ndjson"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith("application/x-ndjson")
+        )
+        self.assertTrue(response.text.endswith("\n"))
+        frames = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(
+            [frame["stage"] for frame in frames], ["retrieved", "reranked"]
+        )
+
+        retrieved, reranked = (frame["results"] for frame in frames)
+        self.assertEqual(len(reranked), 10)
+        self.assertTrue(
+            {doc["id"] for doc in reranked} <= {doc["id"] for doc in retrieved}
+        )
+        # reranked는 rerank 점수(content 길이) 순서
+        weights = [doc["weight"] for doc in reranked]
+        self.assertEqual(weights, sorted(weights, reverse=True))
+        self.assertEqual(self.admission.running, 0)
+
+    def test_sse_stream_frames(self):
+        with TestClient(self.app) as client:
+            response = client.get("/search", params={"query": "llm", "stream": "sse"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith("text/event-stream")
+        )
+        self.assertTrue(response.text.endswith("\n\n"))
+        events = []
+        for frame in response.text.split("\n\n")[:-1]:
+            event, data = frame.split("\n")
+            self.assertTrue(event.startswith("event: "))
+            self.assertTrue(data.startswith("data: "))
+            events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+        self.assertEqual([stage for stage, _ in events], ["retrieved", "reranked"])
+        self.assertEqual(len(events[1][1]), 10)
+
+        # 같은 검색의 stream 결과와 일반 응답의 최종 결과가 같아야 함
+        with TestClient(self.app) as client:
+            plain = client.get("/search", params={"query": "llm"}).json()
+        self.assertEqual(events[1][1], plain)
+
+    def test_client_disconnect_releases_slot(self):
+        """retrieved 전송 후 rerank 중에 client가 끊으면 slot을 반환하고 다음 요청은 정상 처리"""
+        self.ranker.delay = 0.3
+
+        async def run():
+            sent = []
+            first_frame = asyncio.Event()
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await first_frame.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if message["type"] == "http.response.body" and message["body"]:
+                    first_frame.set()
+
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0", "spec_version": "2.3"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/search",
+                "raw_path": b"/search",
+                "root_path": "",
+                "query_string": b"query=llm&stream=ndjson",
+                "headers": [],
+                "client": ("testclient", 50000),
+                "server": ("testserver", 80),
+            }
+            await self.app(scope, receive, send)
+            running_after_disconnect = self.admission.running
+
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://testserver"
+            ) as client:
+                response = await client.get("/search", params={"query": "next"})
+            return sent, running_after_disconnect, response
+
+        sent, running_after_disconnect, response = asyncio.run(run())
+
+        bodies = [
+            message["body"]
+            for message in sent
+            if message["type"] == "http.response.body"
+        ]
+        self.assertEqual(len(bodies), 1)
+        self.assertEqual(json.loads(bodies[0])["stage"], "retrieved")
+        self.assertEqual(running_after_disconnect, 0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 10)
+        self.assertEqual(self.embedder.batch_sizes, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
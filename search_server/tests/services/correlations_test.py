@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+from fakes import FakeClient, LengthRanker
+from repositories.document_store import OpenSearchDocumentStore
+from repositories.vector_store import ArrayVectorStore
+from services.correlations import CorrelationService
+from services.ranker import RankerView
+from utils.executor import InferenceExecutor
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        store = OpenSearchDocumentStore(hosts="http://localhost:9200", index="test")
+        store._client = FakeClient({})  # 어떤 문서도 찾지 못함
+        self.executor = InferenceExecutor(mode="thread", max_workers=2)
+        self.service = CorrelationService(
+            document_store=store,
+            ranker=RankerView(LengthRanker(), top_k=10),
+            vector_store=ArrayVectorStore(embedding_dim=2, capacity_bytes=1024),
+            executor=self.executor,
+        )
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_unknown_document_has_no_correlations(self):
+        # 단건 / batch 조회 모두 index에 없는 문서는 빈 목록
+        self.assertEqual(asyncio.run(self.service.similar_docs("missing")), [])
+        self.assertEqual(
+            asyncio.run(self.service.similar_docs_batch(["missing"])),
+            {"missing": []},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from fakes import RecordingEmbedder
+from services.embedding import BatchingTextEmbedder, CachedTextEmbedder
+from utils.cache import LRUCache
+
+
+class MyTestCase(unittest.TestCase):
+    def test_concurrent_async_requests_share_one_batch(self):
+        model = RecordingEmbedder()
+        embedder = CachedTextEmbedder(
+            BatchingTextEmbedder(model, max_batch_size=32, max_wait_ms=50),
+            cache=LRUCache(name="test_query_embedding", max_bytes=1024 * 1024),
+        )
+        queries = [f"query {'x' * i}" for i in range(8)]
+
+        async def run():
+            return await asyncio.gather(*(embedder.embed_async(q) for q in queries))
+
+        embeddings = asyncio.run(run())
+        self.assertEqual([e[0] for e in embeddings], [float(len(q)) for q in queries])
+        # 추론 worker 수(기본 2)와 상관없이 동시에 들어온 query가 한 번에 계산됨
+        self.assertEqual(model.batch_sizes, [8])
+
+        # 두 번째 요청은 cache에서 반환
+        self.assertEqual(asyncio.run(embedder.embed_async(queries[0])), embeddings[0])
+        self.assertEqual(model.batch_sizes, [8])
+
+    def test_cancelled_request_does_not_stop_batch_worker(self):
+        model = RecordingEmbedder()
+        embedder = BatchingTextEmbedder(model, max_batch_size=32, max_wait_ms=50)
+
+        async def run():
+            # batch를 모으는 동안 요청이 취소됨 (예: stream client 연결 종료)
+            cancelled = asyncio.ensure_future(embedder.embed_async("cancelled"))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            await asyncio.sleep(0.1)
+            return await asyncio.wait_for(embedder.embed_async("next"), timeout=5)
+
+        self.assertEqual(asyncio.run(run()), [4.0, 1.0])
+        self.assertTrue(embedder._worker.is_alive())
+        self.assertEqual(model.batch_sizes, [1])  # 취소된 query는 embedding 하지 않음
+
+
+if __name__ == "__main__":
+    unittest.main()
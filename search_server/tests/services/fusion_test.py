@@ -0,0 +1,57 @@
+import unittest
+
+from haystack import Document
+from services.fusion import FusionJoiner
+
+
+def make_documents(prefix, scores, identifiers=None):
+    identifiers = identifiers or [f"{prefix}-{i}" for i in range(len(scores))]
+    return [
+        Document(id=doc_id, content=doc_id, score=score, meta={"identifier": doc_id})
+        for doc_id, score in zip(identifiers, scores)
+    ]
+
+
+class MyTestCase(unittest.TestCase):
+    def test_rrf_prefers_documents_found_by_both_retrievers(self):
+        bm25 = make_documents("bm25", [30.0, 20.0, 10.0], ["a", "b", "c"])
+        knn = make_documents("knn", [0.9, 0.8, 0.7], ["d", "c", "e"])
+
+        fused = FusionJoiner(mode="rrf").run(documents=[bm25, knn])["documents"]
+        self.assertEqual([doc.id for doc in fused][:1], ["c"])
+        self.assertEqual(len(fused), 5)
+        self.assertTrue(all(0 < doc.score <= 1 for doc in fused))
+        scores = [doc.score for doc in fused]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_weighted_mode_uses_normalized_scores(self):
+        bm25 = make_documents("bm25", [30.0, 10.0], ["a", "b"])
+        knn = make_documents("knn", [0.9, 0.1], ["b", "c"])
+
+        joiner = FusionJoiner(mode="weighted", weights=[1.0, 3.0])
+        fused = joiner.run(documents=[bm25, knn])["documents"]
+        self.assertEqual([doc.id for doc in fused], ["b", "a", "c"])
+        self.assertAlmostEqual(fused[0].score, 0.75)
+
+    def test_dedupes_chunks_of_same_paper_and_bounds_candidates(self):
+        bm25 = [
+            Document(id="chunk-1", content="a", score=3.0, meta={"identifier": "p1"}),
+            Document(id="chunk-2", content="b", score=2.0, meta={"identifier": "p1"}),
+            Document(id="chunk-3", content="c", score=1.0, meta={"identifier": "p2"}),
+        ]
+        knn = make_documents("knn", [0.5, 0.4, 0.3])
+
+        fused = FusionJoiner(top_k=3).run(documents=[bm25, knn])["documents"]
+        self.assertEqual(len(fused), 3)
+        identifiers = [doc.meta["identifier"] for doc in fused]
+        self.assertEqual(len(set(identifiers)), 3)
+        self.assertIn("chunk-1", [doc.id for doc in fused])
+        self.assertNotIn("chunk-2", [doc.id for doc in fused])
+
+    def test_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            FusionJoiner(mode="max")
+
+
+if __name__ == "__main__":
+    unittest.main()
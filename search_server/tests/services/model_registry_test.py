@@ -0,0 +1,33 @@
+import unittest
+
+from fakes import LengthRanker
+from haystack import Document
+from services.model_registry import ModelRegistry
+from services.ranker import RankerView
+
+
+class MyTestCase(unittest.TestCase):
+    def test_views_share_one_model(self):
+        models = ModelRegistry(backend="onnx")
+        search_ranker = models.reranker(top_k=20)
+        similar_ranker = models.reranker(top_k=10)
+
+        self.assertIs(search_ranker.ranker, similar_ranker.ranker)
+        self.assertIs(models.reranker_model(), search_ranker.ranker)
+        self.assertEqual((search_ranker.top_k, similar_ranker.top_k), (20, 10))
+        self.assertEqual(len(models.models), 1)
+
+    def test_view_uses_own_top_k(self):
+        model = LengthRanker()
+        view = RankerView(model, top_k=2)
+        documents = [Document(content=c) for c in ("a", "abc", "ab", "abcd")]
+
+        ranked = view.run(query="q", documents=documents)["documents"]
+        self.assertEqual([doc.content for doc in ranked], ["abcd", "abc"])
+        ranked = view.run(query="q", documents=documents, top_k=3)["documents"]
+        self.assertEqual(len(ranked), 3)
+        self.assertEqual(view.model_version, "test-model")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+import torch
+from services.onnx_backend import (
+    OnnxCrossEncoder,
+    check_embedding_parity,
+    check_ranker_parity,
+    export_cross_encoder,
+    model_dir,
+)
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+
+def save_tiny_cross_encoder(path: str) -> None:
+    """download 없이 export를 확인할 수 있도록 작은 BERT cross-encoder를 생성해서 저장"""
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "graph", "neural", "network"]
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(vocab_file).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+        num_labels=1,
+    )
+    BertForSequenceClassification(config).save_pretrained(path)
+
+
+class MyTestCase(unittest.TestCase):
+    def test_model_dir_per_quantization(self):
+        self.assertEqual(
+            model_dir("/models", "BAAI/bge-m3", None), "/models/BAAI--bge-m3-fp32"
+        )
+        self.assertEqual(
+            model_dir("/models", "BAAI/bge-m3", "int8"), "/models/BAAI--bge-m3-int8"
+        )
+
+    def test_embedding_parity(self):
+        reference = [[1.0, 0.0], [0.0, 1.0]]
+        result = check_embedding_parity(reference, [[2.0, 0.0], [0.0, 0.5]])
+        self.assertTrue(result["passed"])
+        self.assertAlmostEqual(result["min_cosine"], 1.0, places=5)
+
+        result = check_embedding_parity(reference, [[1.0, 0.0], [1.0, 0.0]])
+        self.assertFalse(result["passed"])
+
+    def test_ranker_parity(self):
+        reference = [3.0, 2.0, 1.0, 0.0]
+        result = check_ranker_parity(reference, [3.1, 1.9, 1.0, 0.1], top_k=2)
+        self.assertTrue(result["passed"])
+        self.assertEqual(result["top_k_overlap"], 1.0)
+
+        result = check_ranker_parity(reference, [0.0, 1.0, 2.0, 3.0], top_k=2)
+        self.assertFalse(result["passed"])
+        self.assertEqual(result["top_k_overlap"], 0.0)
+
+    def test_export_cross_encoder(self):
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as output:
+            save_tiny_cross_encoder(source)
+            path = export_cross_encoder(source, output)
+            self.assertTrue(os.path.exists(path))
+
+            pairs = [["graph", "neural network"], ["network", "graph graph neural"]]
+            model = BertForSequenceClassification.from_pretrained(source).eval()
+            features = BertTokenizerFast.from_pretrained(source)(
+                [query for query, _ in pairs],
+                [document for _, document in pairs],
+                padding=True,
+                return_tensors="pt",
+            )
+            with torch.inference_mode():
+                reference = model(**features).logits[:, 0].tolist()
+            scores = OnnxCrossEncoder(output).score(pairs)
+            self.assertTrue(
+                check_ranker_parity(reference, scores, max_abs_diff=1e-3)["passed"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
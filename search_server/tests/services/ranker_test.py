@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import unittest
+
+from haystack import Document
+from services.ranker import (
+    CachedPairRanker,
+    CascadeRanker,
+    RankerService,
+    RerankScheduler,
+)
+from utils.cache import LRUCache
+
+
+class CountingRanker:
+    """content 길이를 점수로 사용하고 계산한 pair 수를 기록하는 테스트용 ranker"""
+
+    model_version = "test-model"
+    top_k = 10
+    scale_score = False
+    calibration_factor = 1.0
+    score_threshold = None
+
+    def __init__(self):
+        self.scored_pairs = 0
+
+    def warm_up(self):
+        pass
+
+    def score_documents(self, query, documents):
+        self.scored_pairs += len(documents)
+        return [float(len(doc.content)) for doc in documents]
+
+    def score_documents_batch(self, queries, document_lists):
+        return [
+            self.score_documents(query, documents)
+            for query, documents in zip(queries, document_lists)
+        ]
+
+    def rank_documents(self, documents, scores, top_k=None, **kwargs):
+        return RankerService.rank_documents(self, documents, scores, top_k, **kwargs)
+
+
+class BlockingPairRanker:
+    """release 될 때까지 flush를 멈추고, flush별 pair 수와 warm_up 횟수를 기록하는 테스트용 모델"""
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.flushes = []
+        self.warm_ups = 0
+
+    def warm_up(self):
+        self.warm_ups += 1
+
+    def score_pairs(self, pairs):
+        self.released.wait()
+        self.flushes.append(len(pairs))
+        return [float(len(document)) for _, document in pairs]
+
+
+def make_documents(*contents):
+    return [Document(id=f"doc-{i}", content=c) for i, c in enumerate(contents)]
+
+
+class MyTestCase(unittest.TestCase):
+    def test_scores_only_unseen_pairs(self):
+        ranker = CountingRanker()
+        cached_ranker = CachedPairRanker(ranker, LRUCache(max_bytes=1024 * 1024))
+
+        first = cached_ranker.run(
+            query="source",
+            documents=make_documents("a", "abc", "ab"),
+            top_k=2,
+            source_id="source-1",
+        )["documents"]
+        self.assertEqual([doc.content for doc in first], ["abc", "ab"])
+        self.assertEqual(ranker.scored_pairs, 3)
+
+        # 같은 source의 반복 요청: 새 후보 하나만 계산
+        documents = make_documents("a", "abc", "ab", "abcd")
+        second = cached_ranker.run(
+            query="source", documents=documents, top_k=2, source_id="source-1"
+        )["documents"]
+        self.assertEqual([doc.content for doc in second], ["abcd", "abc"])
+        self.assertEqual(ranker.scored_pairs, 4)
+
+        # 다른 source는 cache를 공유하지 않음
+        cached_ranker.run(
+            query="other", documents=make_documents("a"), source_id="source-2"
+        )
+        self.assertEqual(ranker.scored_pairs, 5)
+
+    def test_model_version_is_part_of_key(self):
+        cache = LRUCache(max_bytes=1024 * 1024)
+        ranker = CountingRanker()
+        CachedPairRanker(ranker, cache).run(
+            query="q", documents=make_documents("a"), source_id="s"
+        )
+        CachedPairRanker(ranker, cache, model_version="v2").run(
+            query="q", documents=make_documents("a"), source_id="s"
+        )
+        self.assertEqual(ranker.scored_pairs, 2)
+
+    def test_cascade_stops_when_tail_cannot_enter_top_k(self):
+        ranker = CountingRanker()
+        cascade = CascadeRanker(ranker, top_k=2, step=2, margin=0.1)
+        # fused score와 rerank 점수(content 길이)의 순서가 같은 후보
+        documents = [
+            Document(id=f"doc-{i}", content="x" * (20 - i), score=1 - i * 0.05)
+            for i in range(20)
+        ]
+
+        ranked = cascade.run(query="q", documents=documents)["documents"]
+        self.assertEqual(ranker.scored_pairs, 4)
+        self.assertEqual(len(ranked), ranker.top_k)
+        self.assertEqual([doc.id for doc in ranked], [f"doc-{i}" for i in range(10)])
+        scores = [doc.score for doc in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_cascade_goes_deeper_when_reranker_disagrees(self):
+        ranker = CountingRanker()
+        cascade = CascadeRanker(ranker, top_k=2, step=2, margin=0.1)
+        # fused score가 낮은 후보일수록 rerank 점수가 높음
+        documents = [
+            Document(id=f"doc-{i}", content="x" * (i + 1), score=1 - i * 0.05)
+            for i in range(20)
+        ]
+
+        ranked = cascade.run(query="q", documents=documents)["documents"]
+        self.assertEqual(ranker.scored_pairs, 20)
+        self.assertEqual([doc.id for doc in ranked[:2]], ["doc-19", "doc-18"])
+
+    def test_scheduler_merges_async_requests(self):
+        model = BlockingPairRanker()
+        model.released.set()
+        scheduler = RerankScheduler(model, max_batch_pairs=128, max_wait_ms=50)
+        scheduler.warm_up()
+
+        async def run():
+            return await asyncio.gather(
+                *(scheduler.score_async([["q", "x" * i], ["q", "y"]]) for i in range(6))
+            )
+
+        scores = asyncio.run(run())
+        self.assertEqual(scores, [[float(i), 1.0] for i in range(6)])
+        self.assertEqual(model.flushes, [12])
+        self.assertEqual(model.warm_ups, 1)  # score 마다 warm_up 하지 않음
+
+    def test_scheduler_times_out_stuck_flush(self):
+        model = BlockingPairRanker()
+        scheduler = RerankScheduler(model, max_wait_ms=0, timeout=0.05)
+        scheduler.warm_up()
+
+        # 첫 요청의 flush가 멈춘 동안 두 번째 요청은 queue에서 timeout
+        with self.assertRaises(TimeoutError):
+            scheduler.score([["q", "a"]])
+        with self.assertRaises(TimeoutError):
+            asyncio.run(scheduler.score_async([["q", "b"]]))
+        self.assertEqual(scheduler._pending_pairs, 0)
+
+        model.released.set()
+        self.assertEqual(scheduler.score([["q", "abc"]]), [3.0])
+        self.assertEqual(model.flushes, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
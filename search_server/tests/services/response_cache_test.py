@@ -0,0 +1,93 @@
+import unittest
+
+from models.document import DocumentResponse
+from services.response_cache import (
+    CursorError,
+    IndexGenerationTracker,
+    ResponseCache,
+    SearchResultSets,
+)
+
+META = {
+    "identifier": "0000.0000",
+    "datestamp": "2024-01-01",
+    "title": "title",
+    "abstract": "abstract",
+    "authors": "author",
+    "categories": "cs.IR",
+    "comments": None,
+    "license": None,
+    "submitter": None,
+}
+
+
+class FakeStore:
+    def __init__(self):
+        self.generation = (100, "v1")
+
+    def get_index_generation(self):
+        return self.generation
+
+
+def make_results(count):
+    return [
+        DocumentResponse(id=f"doc-{i}", weight=float(count - i), meta=META)
+        for i in range(count)
+    ]
+
+
+class MyTestCase(unittest.TestCase):
+    def test_pages_are_served_from_stored_results(self):
+        result_sets = SearchResultSets()
+        page, cursor = result_sets.first_page(make_results(25), page_size=10)
+        self.assertEqual([doc.id for doc in page], [f"doc-{i}" for i in range(10)])
+
+        ids = []
+        while cursor is not None:
+            page, cursor = result_sets.page(cursor, page_size=10)
+            ids.extend(doc.id for doc in page)
+        self.assertEqual(ids, [f"doc-{i}" for i in range(10, 25)])
+
+    def test_single_page_has_no_cursor(self):
+        page, cursor = SearchResultSets().first_page(make_results(5), page_size=10)
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(cursor)
+
+    def test_invalid_or_expired_cursor(self):
+        result_sets = SearchResultSets()
+        with self.assertRaises(CursorError):
+            result_sets.page("not-a-cursor", page_size=10)
+        with self.assertRaises(CursorError):
+            result_sets.page("unknown.10", page_size=10)
+
+    def test_result_computed_across_generation_change_is_dropped(self):
+        store = FakeStore()
+        tracker = IndexGenerationTracker(store, check_interval=3600)
+        tracker.refresh()
+        cache = ResponseCache(tracker)
+
+        key = cache.bind(("search", "query"))  # 계산 시작 전에 generation 확인
+        store.generation = (120, "v2")
+        tracker.refresh()  # 계산하는 동안 ETL로 index 갱신
+        cache.set(key, make_results(3))
+        self.assertIsNone(cache.get(cache.bind(("search", "query"))))
+
+        key = cache.bind(("search", "query"))
+        cache.set(key, make_results(3))
+        self.assertEqual(len(cache.get(cache.bind(("search", "query")))), 3)
+
+    def test_invalidate_drops_cached_and_in_flight_results(self):
+        tracker = IndexGenerationTracker(FakeStore(), check_interval=3600)
+        tracker.refresh()
+        cache = ResponseCache(tracker)
+        cache.set(cache.bind(("correlations", "a")), make_results(3))
+
+        key = cache.bind(("correlations", "b"))
+        cache.invalidate()  # 계산하는 동안 연관 논문 table 교체
+        cache.set(key, make_results(3))
+        self.assertIsNone(cache.get(cache.bind(("correlations", "a"))))
+        self.assertIsNone(cache.get(cache.bind(("correlations", "b"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
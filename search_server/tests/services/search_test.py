@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from fakes import (
+    FakeClient,
+    FakeTextEmbedder,
+    LengthRanker,
+    RecordingEmbedder,
+    make_sources,
+)
+from repositories.document_store import OpenSearchDocumentStore
+from services.embedding import BatchingTextEmbedder
+from services.fusion import FusionJoiner
+from services.ranker import CascadeRanker, RankerView
+from services.search import SearchService
+from utils.executor import InferenceExecutor
+
+
+class SignallingClient(FakeClient):
+    """첫 검색 요청이 들어오면 event를 set 하는 테스트용 client"""
+
+    def __init__(self, sources: dict):
+        super().__init__(sources)
+        self.searched = threading.Event()
+
+    def search(self, index, body):
+        self.searched.set()
+        return super().search(index, body)
+
+
+class WaitingEmbedder(RecordingEmbedder):
+    """검색 요청이 들어올 때까지 (최대 2초) forward pass를 끝내지 않는 테스트용 embedder"""
+
+    def __init__(self, searched: threading.Event):
+        super().__init__()
+        self.searched = searched
+        self.searched_while_embedding = False
+
+    def embed_batch(self, texts):
+        self.searched_while_embedding = self.searched.wait(timeout=2)
+        return super().embed_batch(texts)
+
+
+class RetrievalClient(FakeClient):
+    """
+    BM25는 저장 순서대로 raw BM25 점수, kNN은 역순으로 0 ~ 1 점수를 돌려주는 테스트용 client
+    (msearch는 body별로 search와 같은 결과)
+    """
+
+    def search(self, index, body):
+        response = super().search(index, dict(body, size=len(self.sources)))
+        hits = response["hits"]["hits"]
+        if "knn" in body["query"]["bool"]["must"][0]:
+            hits = hits[::-1]
+            for rank, hit in enumerate(hits):
+                hit["_score"] = 0.9 - 0.01 * rank
+        else:
+            for rank, hit in enumerate(hits):
+                hit["_score"] = 20.0 / (rank + 1)
+        return {"hits": {"hits": hits[: body["size"]]}}
+
+    def msearch(self, body, index):
+        self.requests.append(("msearch", len(body)))
+        return {"responses": [self.search(index, search) for search in body[1::2]]}
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.executor = InferenceExecutor(mode="thread", max_workers=2)
+        self.service = self.create_service(
+            FakeClient(make_sources(200)),
+            text_embedder=FakeTextEmbedder(),
+            pagination_depth=60,
+        )
+
+    def create_service(
+        self, client, text_embedder, top_k=10, **kwargs
+    ) -> SearchService:
+        store = OpenSearchDocumentStore(hosts="http://localhost:9200", index="test")
+        store._client = client
+        return SearchService(
+            document_store=store,
+            ranker=RankerView(LengthRanker(), top_k=20),
+            text_embedder=text_embedder,
+            top_k=top_k,
+            executor=self.executor,
+            **kwargs,
+        )
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_pages_go_deeper_than_unpaged_results(self):
+        async def run():
+            unpaged = await self.service.query("query")
+            pages, cursor = [], None
+            page, cursor = await self.service.query_page("query", page_size=20)
+            pages.extend(page)
+            while cursor:
+                page, cursor = self.service.next_page(cursor, page_size=20)
+                pages.extend(page)
+            return unpaged, pages
+
+        unpaged, pages = asyncio.run(run())
+        self.assertEqual(len(unpaged), 10)  # retriever별 top_k 10개, 같은 문서
+        self.assertEqual(len(pages), 60)
+        unpaged_ids = {doc.id for doc in unpaged}
+        self.assertEqual(len({doc.id for doc in pages}), 60)
+        # 다음 page에는 일반 검색 결과에 없는 문서가 포함됨
+        self.assertTrue({doc.id for doc in pages[20:]} - unpaged_ids)
+
+    def test_bm25_is_in_flight_while_query_embedding_is_pending(self):
+        client = SignallingClient(make_sources(20))
+        model = WaitingEmbedder(client.searched)
+        service = self.create_service(
+            client, text_embedder=BatchingTextEmbedder(model, max_wait_ms=0)
+        )
+
+        documents = asyncio.run(service.query("query"))
+        self.assertEqual(len(documents), 10)
+        # kNN 검색은 embedding 이후에 요청하므로 embedding 중의 검색 요청은 BM25
+        self.assertTrue(model.searched_while_embedding)
+
+    def test_bm25_overlaps_query_embedding_and_knn(self):
+        delay = 0.4  # BM25, embedding, kNN 각각의 소요 시간
+        service = self.create_service(
+            FakeClient(make_sources(20), delay=delay),
+            text_embedder=BatchingTextEmbedder(
+                RecordingEmbedder(delay=delay), max_wait_ms=0
+            ),
+        )
+
+        started = time.monotonic()
+        documents = service._parallel_retrieve("query", filters=None)
+        elapsed = time.monotonic() - started
+        self.assertEqual(len(documents), 10)  # 두 retriever가 같은 문서 top_k 10개
+        # 순차 실행이면 BM25 + embed + kNN, 겹치면 max(BM25, embed + kNN)
+        self.assertGreaterEqual(elapsed, 2 * delay)
+        self.assertLess(elapsed, 3 * delay - 0.1)
+
+    def test_batch_results_match_single_queries(self):
+        requests = [
+            {"query": "first"},
+            {"query": "second", "filter_categories": ["cs"]},
+        ]
+        for rerank_mode in ("full", "cascade"):
+            with self.subTest(rerank_mode=rerank_mode):
+                client = RetrievalClient(make_sources(30))
+                service = self.create_service(
+                    client,
+                    text_embedder=BatchingTextEmbedder(
+                        RecordingEmbedder(), max_wait_ms=0
+                    ),
+                    top_k=30,
+                    rerank_mode=rerank_mode,
+                    # margin 0: 남은 후보의 fused score가 상위 결과보다 낮으면 바로 중단
+                    cascade_ranker=CascadeRanker(
+                        RankerView(LengthRanker(), top_k=20), margin=0.0
+                    ),
+                    # min-max 정규화 점수를 합치므로 BM25 점수 scaling에 따라 후보가 달라짐
+                    document_joiner=FusionJoiner(mode="weighted", top_k=20),
+                )
+                service.bm25_retriever._scale_score = True
+
+                async def run():
+                    batch = await service.query_batch(requests)
+                    single = [
+                        await service.query(request["query"], **request)
+                        for request in requests
+                    ]
+                    return batch, single
+
+                batch, single = asyncio.run(run())
+                self.assertIn(("msearch", 8), client.requests)
+                self.assertEqual(batch, single)
+
+
+if __name__ == "__main__":
+    unittest.main()
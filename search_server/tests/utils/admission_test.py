@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+
+from prometheus_client import REGISTRY
+from utils.admission import AdmissionController, ClientDisconnected, Overloaded
+
+
+class FakeRequest:
+    def __init__(self, disconnected: bool = False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+class MyTestCase(unittest.TestCase):
+    def test_rejects_when_queue_is_full(self):
+        async def run():
+            controller = AdmissionController(
+                "test_full", max_concurrency=1, max_queue=1, queue_timeout=None
+            )
+            await controller.acquire()
+            waiting = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0.01)
+            self.assertEqual(controller.queued, 1)
+
+            with self.assertRaises(Overloaded) as ctx:
+                await controller.acquire()
+            self.assertEqual(ctx.exception.reason, "queue_full")
+
+            controller.release()  # 대기 중인 요청이 slot을 얻음
+            await waiting
+            self.assertEqual((controller.running, controller.queued), (1, 0))
+            controller.release()
+
+        asyncio.run(run())
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "admission_rejected_total",
+                {"endpoint": "test_full", "reason": "queue_full"},
+            ),
+            1,
+        )
+
+    def test_queue_timeout_and_disconnect(self):
+        async def run():
+            controller = AdmissionController(
+                "test_timeout",
+                max_concurrency=1,
+                max_queue=4,
+                queue_timeout=0.05,
+                disconnect_check_interval=0.01,
+            )
+            await controller.acquire()
+            with self.assertRaises(Overloaded) as ctx:
+                await controller.acquire(FakeRequest())
+            self.assertEqual(ctx.exception.reason, "queue_timeout")
+
+            with self.assertRaises(ClientDisconnected):
+                await controller.acquire(FakeRequest(disconnected=True))
+
+            # 취소된 요청이 slot을 가져가지 않았는지 확인
+            controller.release()
+            await asyncio.wait_for(controller.acquire(), timeout=1)
+            self.assertEqual((controller.running, controller.queued), (1, 0))
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
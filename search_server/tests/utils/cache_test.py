@@ -0,0 +1,49 @@
+import time
+import unittest
+
+import numpy as np
+from utils.cache import LRUCache, normalize_query
+
+
+class MyTestCase(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(
+            normalize_query("  Large   Language\tModels "), "large language models"
+        )
+        # 전각 문자 / 호환 문자는 NFKC로 통일
+        self.assertEqual(normalize_query("ＬＬＭ"), "llm")
+
+    def test_lru_eviction_by_bytes(self):
+        vector = np.zeros(256, dtype=np.float32)  # 1024 byte
+        cache = LRUCache(max_bytes=3 * 1300)
+        cache.set("a", vector)
+        cache.set("b", vector)
+        cache.set("c", vector)
+        cache.get("a")  # a를 최근 사용으로 갱신
+        cache.set("d", vector)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("d"))
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(ttl=0.05)
+        cache.set("query", [1.0, 2.0])
+        self.assertEqual(cache.get("query"), [1.0, 2.0])
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("query"))
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_hit_miss_counters(self):
+        cache = LRUCache(name="test_cache")
+        cache.get("missing")
+        cache.set("key", "value")
+        cache.get("key")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
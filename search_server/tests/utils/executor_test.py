@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+
+from utils.executor import InferenceExecutor
+
+
+class BlockingService:
+    def __init__(self):
+        self.thread_names = []
+
+    def slow_echo(self, value, delay=0.2):
+        self.thread_names.append(threading.current_thread().name)
+        time.sleep(delay)
+        return value
+
+
+class WarmUpTarget:
+    def warm_up(self):
+        return os.getpid()
+
+
+def create_warm_up_targets():
+    """process 모드 worker에서 실행되는 target factory (모델 load 대신 잠깐 대기)"""
+    time.sleep(0.2)
+    return {"warm_up_target": WarmUpTarget()}
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.executor = InferenceExecutor(mode="thread", max_workers=2)
+        self.service = BlockingService()
+        self.executor.register("blocking", self.service)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_call_runs_off_event_loop(self):
+        async def scenario():
+            call = asyncio.ensure_future(
+                self.executor.call("blocking", "slow_echo", "result")
+            )
+            # blocking 작업이 실행되는 동안에도 event loop는 다른 coroutine을 처리해야 함
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            loop_latency = time.monotonic() - started
+            return await call, loop_latency
+
+        result, loop_latency = asyncio.run(scenario())
+        self.assertEqual(result, "result")
+        self.assertLess(loop_latency, 0.1)
+        self.assertTrue(self.service.thread_names[0].startswith("inference"))
+
+    def test_bounded_concurrency(self):
+        async def scenario():
+            calls = [
+                self.executor.call("blocking", "slow_echo", i, delay=0.1)
+                for i in range(4)
+            ]
+            return await asyncio.gather(*calls)
+
+        started = time.monotonic()
+        results = asyncio.run(scenario())
+        elapsed = time.monotonic() - started
+        self.assertEqual(results, [0, 1, 2, 3])
+        # worker 2개로 4개 작업 -> 최소 2 라운드
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual(self.executor.in_flight, 0)
+
+    def test_warm_up_starts_every_worker_process(self):
+        executor = InferenceExecutor(
+            mode="process", max_workers=2, target_factory=create_warm_up_targets
+        )
+        try:
+            asyncio.run(executor.warm_up("warm_up_target", "warm_up", 0.05))
+            pids = {
+                process.pid for process in executor._process_pool._processes.values()
+            }
+            self.assertEqual(len(pids), 2)
+        finally:
+            executor.shutdown()
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            InferenceExecutor(mode="gpu")
+        with self.assertRaises(ValueError):
+            InferenceExecutor(mode="process")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import List
+
+from haystack import Document, component
+from prometheus_client.parser import text_string_to_metric_families
+from utils.tracing import run_component, trace_pipeline
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+
+# PROMETHEUS_MULTIPROC_DIR은 prometheus_client import 시점에 읽으므로 별도 process에서 실행
+PROCESS_MODE_SCRIPT = """
+import asyncio
+
+from metrics_test import create_traced_targets
+from utils.executor import InferenceExecutor
+from utils.metrics import render_metrics
+
+
+async def main():
+    executor = InferenceExecutor(
+        mode="process", max_workers=1, target_factory=create_traced_targets
+    )
+    try:
+        await executor.call("traced", "run", "llm")
+    finally:
+        executor.shutdown()
+
+
+asyncio.run(main())
+print(render_metrics().decode())
+"""
+
+
+@component
+class FakeRetriever:
+    @component.output_types(documents=List[Document])
+    def run(self, query: str):
+        return {"documents": [Document(content=f"{query} {i}") for i in range(3)]}
+
+
+class TracedTarget:
+    def run(self, query: str) -> int:
+        with trace_pipeline("process_worker"):
+            result = run_component(
+                "process_worker", "retriever", FakeRetriever(), query=query
+            )
+        return len(result["documents"])
+
+
+def create_traced_targets():
+    """process 모드 worker에서 실행되는 target factory"""
+    return {"traced": TracedTarget()}
+
+
+def sample_value(exposition: str, name: str, labels: dict) -> float:
+    for family in text_string_to_metric_families(exposition):
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    raise KeyError(f"{name}{labels} not found")
+
+
+class MyTestCase(unittest.TestCase):
+    def test_process_worker_metrics_are_exposed(self):
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            env = dict(
+                os.environ,
+                PROMETHEUS_MULTIPROC_DIR=multiproc_dir,
+                PYTHONPATH=os.pathsep.join([SRC_DIR, os.path.dirname(__file__)]),
+            )
+            result = subprocess.run(
+                [sys.executable, "-W", "ignore", "-c", PROCESS_MODE_SCRIPT],
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=120,
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        labels = {"pipeline": "process_worker"}
+        self.assertEqual(
+            sample_value(result.stdout, "pipeline_seconds_count", labels), 1
+        )
+        labels["component"] = "retriever"
+        self.assertEqual(
+            sample_value(result.stdout, "pipeline_component_documents_sum", labels), 3
+        )
+        # scrape 시점 gauge는 API process 값으로 함께 노출
+        self.assertEqual(
+            sample_value(result.stdout, "inference_executor_in_flight", {}), 0
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+from utils.singleflight import SingleFlight
+
+
+class MyTestCase(unittest.TestCase):
+    def test_concurrent_requests_share_one_run(self):
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return f"result {key}"
+
+        async def run():
+            flight = SingleFlight("test_share")
+            results = await asyncio.gather(
+                flight.run("a", lambda: compute("a")),
+                flight.run("a", lambda: compute("a")),
+                flight.run("b", lambda: compute("b")),
+            )
+            # 실행이 끝난 key는 다시 실행
+            results.append(await flight.run("a", lambda: compute("a")))
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual(results, ["result a", "result a", "result b", "result a"])
+        self.assertEqual(calls, ["a", "b", "a"])
+
+    def test_error_and_cancel(self):
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            flight = SingleFlight("test_error")
+            results = await asyncio.gather(
+                flight.run("a", fail), flight.run("a", fail), return_exceptions=True
+            )
+            self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+            # 먼저 요청한 쪽이 취소되어도 같은 key를 기다리는 요청은 결과를 받음
+            first = asyncio.ensure_future(flight.run("b", slow))
+            second = asyncio.ensure_future(flight.run("b", slow))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.assertEqual(await second, "done")
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from prometheus_client import REGISTRY
+from utils.startup import StartupState
+
+
+class MyTestCase(unittest.TestCase):
+    def test_phases_and_ready(self):
+        startup = StartupState()
+        with startup.track("load_models"):
+            pass
+        self.assertFalse(startup.ready)
+        self.assertEqual(startup.to_dict()["phase"], "load_models")
+
+        startup.mark_ready()
+        state = startup.to_dict()
+        self.assertEqual(state["status"], "ready")
+        self.assertIn("load_models", state["phases"])
+        self.assertGreaterEqual(
+            REGISTRY.get_sample_value("startup_phase_seconds", {"phase": "total"}), 0
+        )
+
+    def test_failed_phase(self):
+        startup = StartupState()
+        with self.assertRaises(RuntimeError):
+            with startup.track("create_services"):
+                raise RuntimeError("connection refused")
+        self.assertTrue(startup.failed)
+        self.assertEqual(startup.error, "create_services: connection refused")
+
+
+if __name__ == "__main__":
+    unittest.main()
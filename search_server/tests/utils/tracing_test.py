@@ -0,0 +1,80 @@
+import unittest
+from typing import List
+
+from haystack import Document, Pipeline, component, tracing
+from prometheus_client import REGISTRY
+from utils.tracing import MetricsTracer, run_component, trace_pipeline
+
+
+@component
+class FakeRetriever:
+    @component.output_types(documents=List[Document])
+    def run(self, query: str):
+        return {"documents": [Document(content=f"{query} {i}") for i in range(3)]}
+
+
+@component
+class FakeTruncator:
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]):
+        return {"documents": documents[:2]}
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.previous = tracing.tracer.actual_tracer
+        tracing.enable_tracing(MetricsTracer())
+
+    def tearDown(self):
+        if self.previous is None:
+            tracing.disable_tracing()
+        else:
+            tracing.enable_tracing(self.previous)
+
+    def test_pipeline_component_metrics(self):
+        pipeline = Pipeline(metadata={"name": "tracing_test"})
+        pipeline.add_component("retriever", FakeRetriever())
+        pipeline.add_component("truncator", FakeTruncator())
+        pipeline.connect("retriever", "truncator")
+
+        pipeline.run({"retriever": {"query": "llm"}})
+
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "pipeline_seconds_count", {"pipeline": "tracing_test"}
+            ),
+            1,
+        )
+        labels = {"pipeline": "tracing_test", "component": "truncator"}
+        self.assertEqual(
+            REGISTRY.get_sample_value("pipeline_component_seconds_count", labels), 1
+        )
+        self.assertEqual(
+            REGISTRY.get_sample_value("pipeline_component_documents_sum", labels), 2
+        )
+        labels["component"] = "retriever"
+        self.assertEqual(
+            REGISTRY.get_sample_value("pipeline_component_documents_sum", labels), 3
+        )
+
+    def test_run_component_outside_pipeline(self):
+        with trace_pipeline("tracing_direct"):
+            run_component("tracing_direct", "retriever", FakeRetriever(), query="a")
+
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "pipeline_seconds_count", {"pipeline": "tracing_direct"}
+            ),
+            1,
+        )
+        labels = {"pipeline": "tracing_direct", "component": "retriever"}
+        self.assertEqual(
+            REGISTRY.get_sample_value("pipeline_component_seconds_count", labels), 1
+        )
+        self.assertEqual(
+            REGISTRY.get_sample_value("pipeline_component_documents_sum", labels), 3
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()